@@ -0,0 +1 @@
+"""python"""
\ No newline at end of file
@@ -0,0 +1,69 @@
+# coding=utf-8
+#
+#-- micro-benchmark of the rows per second converted to dictionary by
+#-- SecurityAttributeServices.query, on an in-memory sqlite database
+#-- run with the parent directory of the project folder in PYTHONPATH:
+#--     python -m security_data.benchmarks.query_benchmark
+import timeit
+from datetime import datetime
+from sqlalchemy import bindparam, create_engine
+from sqlalchemy.orm import sessionmaker
+from security_data.models.security_attribute import SecurityAttribute
+from security_data.services.security_attribute_services import SecurityAttributeServices
+
+def _get_test_security_attributes(rows):
+	now = datetime.now()
+	numeric_column_names = set(SecurityAttributeServices.row_reader.numeric_column_names)
+	security_attribute_infos = []
+	for i in range(rows):
+		security_attribute_info = {}
+		for column_name in SecurityAttributeServices.row_reader.column_names:
+			security_attribute_info[column_name] = 0.5 if column_name in numeric_column_names else "value"
+		security_attribute_info["security_id_type"] = "ISIN"
+		security_attribute_info["security_id"] = "XS" + str(i).zfill(10)
+		security_attribute_info["created_at"] = now
+		security_attribute_infos.append(security_attribute_info)
+	return security_attribute_infos
+
+#-- the orm query and the model2dict before the fast read path
+def _query_orm(session):
+	columns = [getattr(SecurityAttribute, column_name).label(column_name) \
+				for column_name in SecurityAttributeServices.row_reader.column_names]
+	security_attributes = session.query(*columns) \
+		.filter(SecurityAttribute.security_id_type == "ISIN") \
+		.order_by(SecurityAttribute.created_at)
+	def model2dict(row):
+		d = {}
+		for column in row.keys():
+			if column == "first_year_default_probability" or \
+					column == "tier_1_common_equity_ratio" or \
+					column == "trading_volume_90_days":
+				d[column] = float(getattr(row, column))
+			else:
+				d[column] = str(getattr(row, column))
+		return d
+	return [model2dict(t) for t in security_attributes]
+
+def _query_row_reader(session, statement):
+	return SecurityAttributeServices.row_reader.read(session, statement, \
+													{"security_id_type" : "ISIN"})
+
+def run(rows=5000, number=5):
+	engine = create_engine("sqlite://")
+	SecurityAttribute.metadata.create_all(engine)
+	engine.execute(SecurityAttribute.__table__.insert(), _get_test_security_attributes(rows))
+	session = sessionmaker(bind=engine)()
+	statement = SecurityAttributeServices.row_reader.select( \
+			SecurityAttribute.security_id_type == bindparam("security_id_type"), \
+			order_by=SecurityAttribute.created_at)
+	assert _query_orm(session) == _query_row_reader(session, statement)
+	print("%-12s %14s" % ("method", "rows/sec"))
+	for method_name, query in [
+			("orm", lambda: _query_orm(session)),
+			("row_reader", lambda: _query_row_reader(session, statement))]:
+		seconds = timeit.timeit(query, number=number) / number
+		print("%-12s %14.0f" % (method_name, rows / seconds))
+	session.close()
+
+if __name__ == "__main__":
+	run()
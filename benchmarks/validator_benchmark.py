@@ -0,0 +1,62 @@
+# coding=utf-8
+# 
+#-- micro-benchmark of the input validation cost per call
+#-- run with the parent directory of the project folder in PYTHONPATH:
+#--     python -m security_data.benchmarks.validator_benchmark
+import timeit
+from security_data.utils.validator import AppValidatorFactory, AppValidatorRegistry
+
+def _get_test_security_attribute():
+	security_attribute_info = {
+		"security_id_type" : "ISIN",
+		"security_id" : "XS1936784161",
+		"gics_sector" : "Financials",
+		"gics_industry_group" : "Banks",
+		"country_of_risk" : "CN",
+		"s_p_rating" : "BBB+",
+		"bond_classification" : "",
+		"first_year_default_probability" : 0.000172683,
+		"tier_1_common_equity_ratio" : 0,
+		"private_placement_indicator" : "N",
+		"trading_volume_90_days" : 24634300
+	}
+	return security_attribute_info
+
+def _get_test_security_base():
+	security_info = {
+		"geneva_id" : "700 HK",
+		"geneva_asset_type" : "Equities",
+		"geneva_investment_type" : "Common Stock",
+		"ticker" : "700 HK Equity",
+		"isin" : "KYG875721634",
+		"bloomberg_id" : "BBG000BJ35N5",
+		"sedol" : "BMMV2K8",
+		"currency" : "HKD",
+		"is_private" : "N",
+		"description" : "Tencent Holdings",
+		"exchange_name" : "HKEX"
+	}
+	return security_info
+
+def run(number=2000):
+	registry = AppValidatorRegistry()
+	registry.compile_all()
+	cases = [
+		("get_security_basic_info", {"geneva_id" : "700 HK"}),
+		("add_security_basic_info", _get_test_security_base()),
+		("add_security_attribute", _get_test_security_attribute())
+	]
+	print("%-28s %14s %14s %8s" % ("method", "factory (us)", "registry (us)", "speedup"))
+	for method_name, document in cases:
+		#-- before: parse the yaml schema and build a validator on every call
+		before = timeit.timeit(
+			lambda: AppValidatorFactory().get_validator(method_name).validate(document),
+			number=number) / number * 1e6
+		#-- after: reuse the compiled validator of the registry
+		after = timeit.timeit(
+			lambda: registry.get_validator(method_name).validate(document),
+			number=number) / number * 1e6
+		print("%-28s %14.1f %14.1f %7.1fx" % (method_name, before, after, before / after))
+
+if __name__ == "__main__":
+	run()
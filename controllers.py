@@ -1,13 +1,26 @@
 # coding=utf-8
 # 
 import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
 from cerberus import SchemaError
 from datetime import datetime
 from security_data.constants import Constants
 from security_data.utils.error_handling import (NoDataClearingInProuctionModeError,
+											IdentifierResolverNotEnabledError,
 											DataStoreNotYetInitializeError)
-from security_data.utils.database import DBConn
-from security_data.utils.validator import AppValidatorFactory
+from security_data.utils.database import DBConn, SessionManager
+from security_data.utils.cache import LruCache
+from security_data.utils.collation import fold
+from security_data.utils.bloom_filter import BloomFilter
+from security_data.utils.batch import chunked
+from security_data.utils.delimited_file import read_delimited_file
+from security_data.utils.identifier_resolver import IdentifierResolver
+from security_data.utils.reconcile import Reconciler
+from security_data.utils.snapshot_file import write_snapshot_file, SnapshotFileReader
+from security_data.utils.validator import validator_registry
 from security_data.services.security_base_services import SecurityBaseServices
 from security_data.services.futures_services import FuturesServices
 from security_data.services.fixed_deposit_services import FixedDepositServices
@@ -31,10 +44,35 @@ class AppController:
 	fixed_deposit_services = None
 	fx_forward_services = None
 	security_attribute_services = None
+	session_manager = None
+	security_base_cache = None
+	negative_lookup_false_positive_rate = None
+	negative_lookup_filters = None
+	identifier_resolver = None
+
+	#-- minimum number of keys a negative lookup filter is sized for
+	NEGATIVE_LOOKUP_MIN_CAPACITY = 10000
+	#-- max number of rejected rows with details in the report of a file load
+	MAX_REJECTED_ROWS_REPORTED = 1000
+	#-- updated_at of a change export watermark
+	WATERMARK_FORMAT = "%Y-%m-%d %H:%M:%S"
+	#-- seconds the changed rows are held back by default, longer than the
+	#-- longest write transaction so that no row commits behind a watermark
+	CHANGE_SAFETY_LAG = 60
+	#-- max number of records of a reconciled file joined in memory, a larger
+	#-- file is sorted in runs of this size on disk and merge joined
+	RECONCILE_HASH_JOIN_MAX_ROWS = 100000
 
 	def __init__(self):
 		self.logger = logging.getLogger(__name__)
 		self.dbmode = None
+		self.security_base_cache = None
+		self.negative_lookup_false_positive_rate = None
+		self.negative_lookup_filters = None
+		self.negative_lookup_skips = {}
+		self.identifier_resolver = None
+		self.negative_lookup_lock = threading.RLock()
+		self.transaction_local = threading.local()
 
 	def initialize_datastore(self, mode):
 		if (mode == "production"):
@@ -46,15 +84,363 @@ class AppController:
 		else:
 			self.dbmode = Constants.DBMODE_TEST
 			self.logger.info("Change datastore mode to DBMODE_TEST")
+		#-- parse and compile all the validation schemas once
+		validator_registry.compile_all()
 		db = DBConn.get_db(self.dbmode)
-		self.security_base_services = SecurityBaseServices(db)
-		self.futures_services = FuturesServices(db)
-		self.otc_counter_party_services = OtcCounterPartyServices(db)
-		self.fixed_deposit_services = FixedDepositServices(db, self.otc_counter_party_services)
-		self.fx_forward_services = FxForwardServices(db, self.otc_counter_party_services)
-		self.security_attribute_services = SecurityAttributeServices(db)
+		#-- all services share one session factory
+		self.session_manager = SessionManager(db)
+		self.security_base_services = SecurityBaseServices(self.session_manager)
+		self.futures_services = FuturesServices(self.session_manager)
+		self.otc_counter_party_services = OtcCounterPartyServices(self.session_manager)
+		self.fixed_deposit_services = FixedDepositServices(self.session_manager, \
+									self.otc_counter_party_services)
+		self.fx_forward_services = FxForwardServices(self.session_manager, \
+									self.otc_counter_party_services)
+		self.security_attribute_services = SecurityAttributeServices(self.session_manager)
+		#-- cached records belong to the previous datastore
+		if self.security_base_cache is not None:
+			self.security_base_cache.clear()
+		if self.negative_lookup_false_positive_rate is not None:
+			self._build_negative_lookup_filters()
+		if self.identifier_resolver is not None:
+			self._build_identifier_resolver()
+		return 0
+
+	def dispose_datastore(self):
+		#-- close the pooled connections of all modes, the datastore needs to
+		#-- be initialized again before use
+		DBConn.dispose()
+		self.dbmode = None
+		self.logger.info("Datastore disposed")
+		return 0
+
+	#-- run the data calls inside the block in one DB transaction, commit at
+	#-- the end or rollback if an exception is raised
+	@contextmanager
+	def transaction(self):
+		if self.dbmode is None:
+			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
+		session_manager = self.session_manager
+		if session_manager.in_transaction():
+			#-- nested transaction joins the outer one
+			with session_manager.transaction():
+				yield
+			return
+		self.transaction_local.geneva_ids = []
+		self.transaction_local.security_attribute_keys = []
+		try:
+			with session_manager.transaction():
+				yield
+		finally:
+			#-- drop the records cached before they were written in the
+			#-- transaction, counter parties may be added as well
+			geneva_ids = self.transaction_local.geneva_ids
+			security_attribute_keys = self.transaction_local.security_attribute_keys
+			self.transaction_local.geneva_ids = None
+			self.transaction_local.security_attribute_keys = None
+			if self.security_base_cache is not None:
+				for geneva_id in geneva_ids:
+					self.security_base_cache.invalidate(fold(geneva_id))
+			self.otc_counter_party_services.bump_version()
+			#-- the written records are committed or rolled back by now
+			self._refresh_identifier_resolver(geneva_ids, security_attribute_keys)
+
+	def enable_security_basic_info_cache(self, max_size, ttl):
+		self.security_base_cache = LruCache(max_size, ttl)
+		self.logger.info("Enable security basic info cache with max_size: " + \
+							str(max_size) + ", ttl: " + str(ttl))
+		return 0
+
+	def disable_security_basic_info_cache(self):
+		self.security_base_cache = None
+		self.logger.info("Disable security basic info cache")
+		return 0
+
+	def get_security_basic_info_cache_stats(self):
+		if self.security_base_cache is None:
+			return {}
+		return self.security_base_cache.stats()
+
+	def enable_negative_lookup_filter(self, false_positive_rate):
+		if not 0 < false_positive_rate < 1:
+			message = "false_positive_rate must be between 0 and 1: " + str(false_positive_rate)
+			self.logger.error(message)
+			raise ValueError(message)
+		self.negative_lookup_false_positive_rate = false_positive_rate
+		self.logger.info("Enable negative lookup filter with false_positive_rate: " + \
+							str(false_positive_rate))
+		#-- build now if the datastore is ready, otherwise on initialize_datastore
+		if self.dbmode is not None:
+			self._build_negative_lookup_filters()
+		return 0
+
+	def disable_negative_lookup_filter(self):
+		with self.negative_lookup_lock:
+			self.negative_lookup_false_positive_rate = None
+			self.negative_lookup_filters = None
+		self.logger.info("Disable negative lookup filter")
+		return 0
+
+	def get_negative_lookup_filter_stats(self):
+		filters = self.negative_lookup_filters
+		if filters is None:
+			return {}
+		stats = {}
+		for table, key_filter in filters.items():
+			stats[table] = {
+				"keys" : key_filter.count,
+				"capacity" : key_filter.capacity,
+				"false_positive_rate" : key_filter.false_positive_rate,
+				"skipped_lookups" : self.negative_lookup_skips.get(table, 0)
+			}
+		return stats
+
+	#-- load every identifier of security_base and the keys of
+	#-- security_attributes in memory to resolve any identifier to geneva_id.
+	#-- the resolver is refreshed on the writes through this controller
+	def enable_identifier_resolver(self):
+		if self.dbmode is None:
+			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
+		self._build_identifier_resolver()
+		return 0
+
+	def disable_identifier_resolver(self):
+		self.identifier_resolver = None
+		self.logger.info("Disable identifier resolver")
 		return 0
 
+	def get_identifier_resolver_stats(self):
+		if self.identifier_resolver is None:
+			return {}
+		return self.identifier_resolver.stats()
+
+	def resolve_geneva_id(self, value, id_type):
+		if self.identifier_resolver is None:
+			raise IdentifierResolverNotEnabledError("Please call enable_identifier_resolver first")
+		return self._resolve_geneva_id(value, id_type)
+
+	def resolve_geneva_id_many(self, values, id_type):
+		if self.identifier_resolver is None:
+			raise IdentifierResolverNotEnabledError("Please call enable_identifier_resolver first")
+		if not isinstance(values, list):
+			message = "Input validation error. Details: input must be of list type"
+			self.logger.error(message)
+			raise ValueError(message)
+		found = {}
+		missing = []
+		for value in values:
+			geneva_id = self._resolve_geneva_id(value, id_type)
+			if geneva_id is None:
+				missing.append(value)
+			else:
+				found[value] = geneva_id
+		return {
+			"found" : found,
+			"missing" : missing
+		}
+
+	def resolve_security_attribute_key(self, value, id_type):
+		if self.identifier_resolver is None:
+			raise IdentifierResolverNotEnabledError("Please call enable_identifier_resolver first")
+		geneva_id = self._resolve_geneva_id(value, id_type)
+		if geneva_id is None:
+			return None
+		return self.identifier_resolver.resolve_security_attribute_key(geneva_id)
+
+	def _resolve_geneva_id(self, value, id_type):
+		try:
+			return self.identifier_resolver.resolve(value, id_type)
+		except ValueError as e:
+			self.logger.error(str(e))
+			raise
+
+	def _build_identifier_resolver(self):
+		#-- build a new resolver so that readers never see a partial one
+		resolver = IdentifierResolver()
+		for identifiers in self.security_base_services.iter_identifiers():
+			resolver.put_security_base(identifiers)
+		for security_id_type, security_id in self.security_attribute_services.iter_keys():
+			resolver.add_security_attribute_key(security_id_type, security_id)
+		self.identifier_resolver = resolver
+		self.logger.info("Identifier resolver built with " + str(resolver.stats()))
+
+	#-- reload the identifiers of the given records from the datastore
+	def _refresh_identifier_resolver(self, geneva_ids, security_attribute_keys):
+		resolver = self.identifier_resolver
+		if resolver is None:
+			return
+		if len(geneva_ids) > 0:
+			geneva_ids = list(dict.fromkeys(geneva_ids))
+			security_bases = self.security_base_services.query_many(geneva_ids)
+			for security_base in security_bases:
+				resolver.put_security_base(security_base)
+			found = set(security_base["geneva_id"] for security_base in security_bases)
+			for geneva_id in geneva_ids:
+				if geneva_id not in found:
+					resolver.remove_security_base(geneva_id)
+		if len(security_attribute_keys) > 0:
+			security_attribute_keys = list(dict.fromkeys(security_attribute_keys))
+			found = self.security_attribute_services.query_many(security_attribute_keys)
+			found = set((d["security_id_type"], d["security_id"]) for d in found)
+			for security_id_type, security_id in security_attribute_keys:
+				if (security_id_type, security_id) in found:
+					resolver.add_security_attribute_key(security_id_type, security_id)
+				else:
+					resolver.remove_security_attribute_key(security_id_type, security_id)
+
+	def _get_negative_lookup_key_services(self):
+		return {
+			"security_base" : self.security_base_services,
+			"futures" : self.futures_services,
+			"fixed_deposits" : self.fixed_deposit_services,
+			"fx_forwards" : self.fx_forward_services
+		}
+
+	def _build_negative_lookup_filters(self):
+		with self.negative_lookup_lock:
+			#-- build into a new dict so that readers never see a partial one
+			filters = {}
+			for table in self._get_negative_lookup_key_services():
+				filters[table] = self._build_negative_lookup_filter(table)
+			self.negative_lookup_filters = filters
+			self.negative_lookup_skips = dict.fromkeys(filters, 0)
+
+	def _build_negative_lookup_filter(self, table):
+		#-- the caller holds the lock while the keys are read so that no key
+		#-- added by this process can be missed by the new filter
+		keys = self._get_negative_lookup_key_services()[table].query_keys()
+		#-- leave room for the keys added later on before a rebuild is needed
+		capacity = max(2 * len(keys), self.NEGATIVE_LOOKUP_MIN_CAPACITY)
+		key_filter = BloomFilter(capacity, self.negative_lookup_false_positive_rate)
+		for key in keys:
+			key_filter.add(fold(key))
+		self.logger.info("Negative lookup filter of " + table + " built with " + \
+							str(len(keys)) + " keys")
+		return key_filter
+
+	#-- False means the key does not exist for sure, True means it may exist.
+	#-- the filters hold the folded keys as the database does not tell case
+	#-- variants apart, a lookup by any variant of a stored key may exist
+	def _may_exist(self, table, key):
+		filters = self.negative_lookup_filters
+		if filters is None or fold(key) in filters[table]:
+			return True
+		self.negative_lookup_skips[table] = self.negative_lookup_skips.get(table, 0) + 1
+		return False
+
+	def _add_negative_lookup_key(self, table, key):
+		with self.negative_lookup_lock:
+			if self.negative_lookup_filters is None:
+				return
+			key_filter = self.negative_lookup_filters[table]
+			key_filter.add(fold(key))
+			#-- false positive rate grows beyond the configured one, resize
+			if key_filter.is_saturated():
+				self.negative_lookup_filters[table] = self._build_negative_lookup_filter(table)
+
+	#-- validate a list of records with the validator of method_name, return
+	#-- the valid records and the index and errors of the invalid records
+	def _validate_many(self, method_name, infos, add_timestamp):
+		if not isinstance(infos, list):
+			message = "Input validation error. Details: input must be of list type"
+			self.logger.error(message)
+			raise ValueError(message)
+		v = validator_registry.get_validator(method_name)
+		records = []
+		invalid = []
+		now = datetime.now()
+		timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
+		for index, info in enumerate(infos):
+			if not isinstance(info, dict):
+				invalid.append({
+					"index" : index,
+					"errors" : "must be of dict type"
+				})
+			elif not v.validate(info):
+				invalid.append({
+					"index" : index,
+					"errors" : v.errors
+				})
+			else:
+				#-- data parsing
+				#-- 1. add timestamp with curent date time
+				record = dict(info)
+				if add_timestamp:
+					record["timestamp"] = timestamp
+				records.append(record)
+		if len(invalid) > 0:
+			self.logger.warn(str(len(invalid)) + " invalid records skipped. Details: " + str(invalid))
+		return records, invalid
+
+	#-- insert or update one record validated by the validator of method_name
+	def _upsert(self, method_name, services, info, add_timestamp):
+		if self.dbmode is None:
+			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
+		v = validator_registry.get_validator(method_name)
+		if not v.validate(info):
+			message = "Input validation error. Details: " + str(v.errors)
+			self.logger.error(message)
+			raise ValueError(message)
+		#-- data parsing
+		#-- 1. add timestamp with curent date time
+		if add_timestamp:
+			now = datetime.now()
+			info["timestamp"] = now.strftime("%Y-%m-%d %H:%M:%S")
+		services.upsert_many([info], 1)
+
+	#-- insert or update the valid records, the written records are returned
+	#-- under "records" for the caller to update the lookup structures
+	def _upsert_many(self, method_name, services, infos, chunk_size, add_timestamp):
+		if self.dbmode is None:
+			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
+		records, invalid = self._validate_many(method_name, infos, add_timestamp)
+		written = services.upsert_many(records, chunk_size)
+		return {
+			"upserted" : len(records),
+			"written" : written,
+			"skipped" : len(records) - written,
+			"invalid" : invalid,
+			"records" : records
+		}
+
+	#-- keep the cache and the negative lookup filter in line with the
+	#-- security_base records written
+	def _on_security_base_written(self, geneva_ids):
+		transaction_geneva_ids = getattr(self.transaction_local, "geneva_ids", None)
+		for geneva_id in geneva_ids:
+			if transaction_geneva_ids is not None:
+				transaction_geneva_ids.append(geneva_id)
+			if self.security_base_cache is not None:
+				self.security_base_cache.invalidate(fold(geneva_id))
+			self._add_negative_lookup_key("security_base", geneva_id)
+		#-- inside transaction() the resolver is refreshed at the end
+		if transaction_geneva_ids is None:
+			self._refresh_identifier_resolver(geneva_ids, [])
+
+	#-- keep the identifier resolver in line with the security_attributes
+	#-- records written
+	def _on_security_attribute_written(self, security_attribute_keys):
+		if self.identifier_resolver is None:
+			return
+		transaction_keys = getattr(self.transaction_local, "security_attribute_keys", None)
+		if transaction_keys is not None:
+			transaction_keys.extend(security_attribute_keys)
+			return
+		for security_id_type, security_id in security_attribute_keys:
+			self.identifier_resolver.add_security_attribute_key(security_id_type, security_id)
+
+	#-- keep the identifier resolver in line with the security_attributes
+	#-- records deleted
+	def _on_security_attribute_deleted(self, security_attribute_keys):
+		if self.identifier_resolver is None:
+			return
+		transaction_keys = getattr(self.transaction_local, "security_attribute_keys", None)
+		if transaction_keys is not None:
+			transaction_keys.extend(security_attribute_keys)
+			return
+		for security_id_type, security_id in security_attribute_keys:
+			self.identifier_resolver.remove_security_attribute_key(security_id_type, security_id)
+
 	def clear_security_data(self):
 		if self.dbmode is None:
 			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
@@ -66,6 +452,8 @@ class AppController:
 		else:
 			self.logger.warn("clear data in security_base table")
 			self.security_base_services.delete_all()
+			if self.security_base_cache is not None:
+				self.security_base_cache.clear()
 			self.logger.warn("clear data in futures table")
 			self.futures_services.delete_all()
 			self.logger.debug("clear data in fixed_deposit table")
@@ -76,6 +464,10 @@ class AppController:
 			self.otc_counter_party_services.delete_all()
 			self.logger.debug("clear data in security_attribute table")
 			self.security_attribute_services.delete_all()
+			if self.negative_lookup_false_positive_rate is not None:
+				self._build_negative_lookup_filters()
+			if self.identifier_resolver is not None:
+				self._build_identifier_resolver()
 			return 0
 	
 	def get_security_basic_info(self, geneva_id):
@@ -84,23 +476,124 @@ class AppController:
 		params = {
 			"geneva_id" : geneva_id
 		}
-		v = AppValidatorFactory().get_validator("get_security_basic_info")
+		v = validator_registry.get_validator("get_security_basic_info")
 		#-- validate input fields
 		if not v.validate(params):
 			message = "Input validation error. Details: " + str(v.errors)
 			self.logger.error(message)
 			raise ValueError(message)
+		#-- serve from the cache if it is enabled, return a copy so that
+		#-- the caller cannot modify the cached record. the cache is keyed by
+		#-- the folded geneva_id as the database does not tell case variants
+		#-- apart
+		cache = self.security_base_cache
+		if cache is not None:
+			security_base = cache.get(fold(geneva_id))
+			if security_base is not None:
+				return dict(security_base)
+			#-- read before the query so that a record outdated by a write
+			#-- meanwhile is not cached
+			generation = cache.generation
+		#-- no DB round trip if the geneva_id does not exist for sure
+		if not self._may_exist("security_base", geneva_id):
+			return {}
 		#-- get the first value from the dictionary and return
 		security_base_l = self.security_base_services.query(params)
 		security_base = {}
 		if len(security_base_l) > 0:
 			security_base = security_base_l[0]
+			#-- uncommitted records read inside transaction() are not cached
+			if cache is not None and not self.session_manager.in_transaction():
+				cache.put(fold(geneva_id), dict(security_base), generation)
 		return security_base
 
+	def get_security_basic_info_many(self, geneva_ids):
+		if self.dbmode is None:
+			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
+		params = {
+			"geneva_ids" : geneva_ids
+		}
+		v = validator_registry.get_validator("get_security_basic_info_many")
+		#-- validate input fields
+		if not v.validate(params):
+			message = "Input validation error. Details: " + str(v.errors)
+			self.logger.error(message)
+			raise ValueError(message)
+		#-- remove duplicated geneva_id and keep the input order
+		geneva_ids = list(dict.fromkeys(geneva_ids))
+		found = {}
+		geneva_ids_to_query = []
+		cache = self.security_base_cache
+		if cache is not None:
+			#-- read before the query so that a record outdated by a write
+			#-- meanwhile is not cached
+			generation = cache.generation
+		for geneva_id in geneva_ids:
+			if cache is not None:
+				security_base = cache.get(fold(geneva_id))
+				if security_base is not None:
+					found[geneva_id] = dict(security_base)
+					continue
+			if self._may_exist("security_base", geneva_id):
+				geneva_ids_to_query.append(geneva_id)
+		if len(geneva_ids_to_query) > 0:
+			for security_base in self.security_base_services.query_many(geneva_ids_to_query):
+				found[security_base["geneva_id"]] = security_base
+				if cache is not None and not self.session_manager.in_transaction():
+					cache.put(fold(security_base["geneva_id"]), dict(security_base), generation)
+		missing = [geneva_id for geneva_id in geneva_ids if geneva_id not in found]
+		return {
+			"found" : found,
+			"missing" : missing
+		}
+
+	def get_security_basic_info_by(self, id_type, value):
+		if self.dbmode is None:
+			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
+		params = {
+			"id_type" : id_type,
+			"value" : value
+		}
+		v = validator_registry.get_validator("get_security_basic_info_by")
+		#-- validate input fields
+		if not v.validate(params):
+			message = "Input validation error. Details: " + str(v.errors)
+			self.logger.error(message)
+			raise ValueError(message)
+		#-- geneva_id is unique and can be served from the cache
+		if id_type == "geneva_id":
+			security_base = self.get_security_basic_info(value)
+			return [security_base] if len(security_base) > 0 else []
+		return self.security_base_services.query_by(id_type, value)
+
+	def get_security_basic_info_by_many(self, id_type, values):
+		if self.dbmode is None:
+			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
+		params = {
+			"id_type" : id_type,
+			"values" : values
+		}
+		v = validator_registry.get_validator("get_security_basic_info_by_many")
+		#-- validate input fields
+		if not v.validate(params):
+			message = "Input validation error. Details: " + str(v.errors)
+			self.logger.error(message)
+			raise ValueError(message)
+		#-- remove duplicated value and keep the input order
+		values = list(dict.fromkeys(values))
+		found = {}
+		for security_base in self.security_base_services.query_by_many(id_type, values):
+			found.setdefault(security_base[id_type], []).append(security_base)
+		missing = [value for value in values if value not in found]
+		return {
+			"found" : found,
+			"missing" : missing
+		}
+
 	def add_security_basic_info(self, security_info):
 		if self.dbmode is None:
 			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
-		v = AppValidatorFactory().get_validator("add_security_basic_info")
+		v = validator_registry.get_validator("add_security_basic_info")
 		if not v.validate(security_info):
 			message = "Input validation error. Details: " + str(v.errors)
 			self.logger.error(message)
@@ -111,12 +604,35 @@ class AppController:
 		security_info["timestamp"] = now.strftime("%Y-%m-%d %H:%M:%S")
 		#-- create data model
 		self.security_base_services.create(security_info)
+		self._on_security_base_written([security_info["geneva_id"]])
+		return 0
+
+	def add_security_basic_info_many(self, security_infos, chunk_size):
+		if self.dbmode is None:
+			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
+		#-- validate the whole batch and report the invalid records
+		records, invalid = self._validate_many("add_security_basic_info", security_infos, True)
+		#-- create data model
+		report = self.security_base_services.create_many(records, chunk_size)
+		report["invalid"] = invalid
+		self._on_security_base_written(report["inserted"])
+		return report
+
+	def upsert_security_basic_info(self, security_info):
+		self._upsert("add_security_basic_info", self.security_base_services, security_info, True)
+		self._on_security_base_written([security_info["geneva_id"]])
 		return 0
 
+	def upsert_security_basic_info_many(self, security_infos, chunk_size):
+		report = self._upsert_many("add_security_basic_info", self.security_base_services, \
+									security_infos, chunk_size, True)
+		self._on_security_base_written([r["geneva_id"] for r in report.pop("records")])
+		return report
+
 	def update_security_basic_info(self, security_info):
 		if self.dbmode is None:
 			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
-		v = AppValidatorFactory().get_validator("update_security_basic_info")
+		v = validator_registry.get_validator("update_security_basic_info")
 		#-- validate input fields
 		if not v.validate(security_info):
 			message = "Input validation error. Details: " + str(v.errors)
@@ -128,20 +644,205 @@ class AppController:
 		security_info["timestamp"] = now.strftime("%Y-%m-%d %H:%M:%S")
 		#-- create data model
 		self.security_base_services.update(security_info)
+		self._on_security_base_written([security_info["geneva_id"]])
 		return 0
 	
+	#-- columnar copy of security_base and security_attributes, read in one
+	#-- transaction. requires numpy
+	def load_security_snapshot(self):
+		if self.dbmode is None:
+			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
+		#-- numpy is an optional dependency, only imported when used
+		from security_data.utils.columnar_snapshot import ColumnarTableBuilder, SecuritySnapshot
+		security_base = ColumnarTableBuilder(self.security_base_services.row_reader.column_names, \
+											[], ["geneva_id"])
+		security_attributes = ColumnarTableBuilder( \
+				self.security_attribute_services.row_reader.column_names, \
+				self.security_attribute_services.numeric_columns, \
+				["security_id_type", "security_id"])
+		with self.session_manager.transaction():
+			for row in self.security_base_services.iter_all():
+				security_base.append(row)
+			for row in self.security_attribute_services.iter_all():
+				security_attributes.append(row)
+		snapshot = SecuritySnapshot(security_base.build(), security_attributes.build())
+		self.logger.info("Security snapshot loaded. Memory usage: " + str(snapshot.memory_usage()))
+		return snapshot
+
+	#-- services and key columns of the tables in the snapshot file
+	def _get_snapshot_file_tables(self):
+		return [
+			("security_base", self.security_base_services, ["geneva_id"]),
+			("futures", self.futures_services, ["ticker"]),
+			("fixed_deposits", self.fixed_deposit_services, ["geneva_id"]),
+			("fx_forwards", self.fx_forward_services, ["factset_id"]),
+			("security_attributes", self.security_attribute_services, \
+				["security_id_type", "security_id"])
+		]
+
+	#-- write the tables read in one transaction to a memory mappable file,
+	#-- the file is replaced atomically
+	def write_security_snapshot_file(self, file_path):
+		if self.dbmode is None:
+			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
+		start = time.time()
+		tables = []
+		for table_name, services, key_names in self._get_snapshot_file_tables():
+			tables.append({
+				"name" : table_name,
+				"column_names" : services.row_reader.column_names,
+				"numeric_column_names" : services.row_reader.numeric_column_names,
+				"key_names" : key_names,
+				"rows" : services.iter_all()
+			})
+		with self.session_manager.transaction():
+			written = write_snapshot_file(file_path, tables)
+		report = {table_name : table["rows"] for table_name, table in written.items()}
+		report["bytes"] = os.path.getsize(file_path)
+		report["seconds"] = time.time() - start
+		self.logger.info("Security snapshot file " + file_path + " written: " + str(report))
+		return report
+
+	def open_security_snapshot_file(self, file_path):
+		return SnapshotFileReader(file_path)
+
+	#-- write each table read in one transaction to path/<table name>.parquet
+	#-- or path/<table name>.arrow. requires pyarrow
+	def export_security_data(self, path, file_format, row_group_size):
+		if self.dbmode is None:
+			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
+		#-- pyarrow is an optional dependency, only imported when used
+		from security_data.utils.arrow_export import FORMATS, write_arrow_file
+		if file_format not in FORMATS:
+			message = "Input validation error. Details: format must be one of " + str(list(FORMATS))
+			self.logger.error(message)
+			raise ValueError(message)
+		if not isinstance(row_group_size, int) or row_group_size <= 0:
+			message = "Input validation error. Details: row_group_size must be a positive integer"
+			self.logger.error(message)
+			raise ValueError(message)
+		os.makedirs(path, exist_ok=True)
+		report = {}
+		start = time.time()
+		with self.session_manager.transaction():
+			for table_name, services in self._get_table_services().items():
+				report[table_name] = write_arrow_file( \
+						os.path.join(path, table_name + FORMATS[file_format]), file_format, \
+						services.row_reader.column_names, services.row_reader.numeric_column_names, \
+						services.iter_all(), row_group_size)
+		rows = sum(report.values())
+		report["seconds"] = time.time() - start
+		report["rows_per_second"] = rows / report["seconds"] if report["seconds"] > 0 else 0
+		self.logger.info("Security data exported to " + path + ": " + str(report))
+		return report
+
+	def _get_table_services(self):
+		return {
+			"security_base" : self.security_base_services,
+			"futures" : self.futures_services,
+			"fixed_deposits" : self.fixed_deposit_services,
+			"fx_forwards" : self.fx_forward_services,
+			"otc_counter_parties" : self.otc_counter_party_services,
+			"security_attributes" : self.security_attribute_services
+		}
+
+	#-- number of records written and skipped as identical to the stored rows
+	#-- of each table since the datastore is initialized
+	def get_write_stats(self):
+		if self.dbmode is None:
+			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
+		return {table : services.content_hasher.stats() \
+				for table, services in self._get_table_services().items()}
+
+	def _get_change_services(self, table):
+		if self.dbmode is None:
+			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
+		services = self._get_table_services().get(table)
+		if services is None:
+			message = "Input validation error. Details: table must be one of " + \
+						str(list(self._get_table_services()))
+			self.logger.error(message)
+			raise ValueError(message)
+		return services
+
+	#-- watermark as {"updated_at" : "yyyy-mm-dd hh:mm:ss", "id" : id or None}.
+	#-- a timestamp string or datetime is a watermark without id
+	def _parse_watermark(self, watermark):
+		if watermark is None:
+			return None
+		if not isinstance(watermark, dict):
+			watermark = {"updated_at" : watermark}
+		updated_at = watermark.get("updated_at")
+		watermark_id = watermark.get("id")
+		try:
+			if isinstance(updated_at, str):
+				updated_at = datetime.strptime(updated_at, self.WATERMARK_FORMAT)
+			if not isinstance(updated_at, datetime):
+				raise ValueError("updated_at must be a datetime or string of " + self.WATERMARK_FORMAT)
+			if watermark_id is not None and not isinstance(watermark_id, int):
+				raise ValueError("id must be an integer")
+		except ValueError as e:
+			message = "Input validation error. Details: watermark " + str(e)
+			self.logger.error(message)
+			raise ValueError(message)
+		return {
+			"updated_at" : updated_at.strftime(self.WATERMARK_FORMAT),
+			"id" : watermark_id
+		}
+
+	#-- None is the default CHANGE_SAFETY_LAG
+	def _validate_safety_lag(self, safety_lag):
+		if safety_lag is None:
+			return self.CHANGE_SAFETY_LAG
+		if not isinstance(safety_lag, int) or safety_lag < 0:
+			message = "Input validation error. Details: safety_lag must be a non-negative integer"
+			self.logger.error(message)
+			raise ValueError(message)
+		return safety_lag
+
+	#-- one page of the rows changed after watermark in the order of
+	#-- (updated_at, id). rows updated in the last safety_lag seconds are held
+	#-- back, a row written in a transaction that commits after safety_lag
+	#-- seconds can be skipped. deleted rows are not returned
+	def export_changes_since(self, table, watermark, limit, safety_lag=None):
+		services = self._get_change_services(table)
+		if not isinstance(limit, int) or limit <= 0:
+			message = "Input validation error. Details: limit must be a positive integer"
+			self.logger.error(message)
+			raise ValueError(message)
+		safety_lag = self._validate_safety_lag(safety_lag)
+		watermark = self._parse_watermark(watermark)
+		rows = services.read_changes(watermark, limit, safety_lag)
+		if len(rows) > 0:
+			watermark = {
+				"updated_at" : rows[-1]["updated_at"],
+				"id" : rows[-1]["id"]
+			}
+		return {
+			"rows" : rows,
+			"watermark" : watermark,
+			"has_more" : len(rows) == limit
+		}
+
+	def get_change_high_water_mark(self, table, safety_lag=None):
+		services = self._get_change_services(table)
+		return services.read_high_water_mark(self._validate_safety_lag(safety_lag))
+
 	def get_futures_info(self, ticker):
 		if self.dbmode is None:
 			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
 		params = {
 			"ticker" : ticker
 		}
-		v = AppValidatorFactory().get_validator("get_futures_info")
+		v = validator_registry.get_validator("get_futures_info")
 		#-- validate input fields
 		if not v.validate(params):
 			message = "Input validation error. Details: " + str(v.errors)
 			self.logger.error(message)
 			raise ValueError(message)
+		#-- no DB round trip if the ticker does not exist for sure
+		if not self._may_exist("futures", ticker):
+			return {}
 		#-- get the first value from the dictionary and return
 		futures_l = self.futures_services.query(params)
 		futures = {}
@@ -152,7 +853,7 @@ class AppController:
 	def add_futures_info(self, security_info):
 		if self.dbmode is None:
 			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
-		v = AppValidatorFactory().get_validator("add_futures_info")
+		v = validator_registry.get_validator("add_futures_info")
 		if not v.validate(security_info):
 			message = "Input validation error. Details: " + str(v.errors)
 			self.logger.error(message)
@@ -163,12 +864,25 @@ class AppController:
 		security_info["timestamp"] = now.strftime("%Y-%m-%d %H:%M:%S")
 		#-- create data model
 		self.futures_services.create(security_info)
+		self._add_negative_lookup_key("futures", security_info["ticker"])
 		return 0
 
+	def upsert_futures_info(self, security_info):
+		self._upsert("add_futures_info", self.futures_services, security_info, True)
+		self._add_negative_lookup_key("futures", security_info["ticker"])
+		return 0
+
+	def upsert_futures_info_many(self, security_infos, chunk_size):
+		report = self._upsert_many("add_futures_info", self.futures_services, \
+									security_infos, chunk_size, True)
+		for record in report.pop("records"):
+			self._add_negative_lookup_key("futures", record["ticker"])
+		return report
+
 	def update_futures_info(self, security_info):
 		if self.dbmode is None:
 			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
-		v = AppValidatorFactory().get_validator("update_futures_info")
+		v = validator_registry.get_validator("update_futures_info")
 		#-- validate input fields
 		if not v.validate(security_info):
 			message = "Input validation error. Details: " + str(v.errors)
@@ -188,12 +902,15 @@ class AppController:
 		params = {
 			"geneva_id" : geneva_id
 		}
-		v = AppValidatorFactory().get_validator("get_fixed_deposit_info")
+		v = validator_registry.get_validator("get_fixed_deposit_info")
 		#-- validate input fields
 		if not v.validate(params):
 			message = "Input validation error. Details: " + str(v.errors)
 			self.logger.error(message)
 			raise ValueError(message)
+		#-- no DB round trip if the geneva_id does not exist for sure
+		if not self._may_exist("fixed_deposits", geneva_id):
+			return {}
 		#-- get the first value from the dictionary and return
 		fixed_deposit_l = self.fixed_deposit_services.query(params)
 		fixed_deposit = {}
@@ -204,7 +921,7 @@ class AppController:
 	def add_fixed_deposit_info(self, security_info):
 		if self.dbmode is None:
 			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
-		v = AppValidatorFactory().get_validator("add_fixed_deposit_info")
+		v = validator_registry.get_validator("add_fixed_deposit_info")
 		if not v.validate(security_info):
 			message = "Input validation error. Details: " + str(v.errors)
 			self.logger.error(message)
@@ -214,12 +931,36 @@ class AppController:
 		#-- create data model
 		#-- reuse the security_info
 		self.fixed_deposit_services.create(security_info)
+		self._add_negative_lookup_key("fixed_deposits", security_info["geneva_id"])
+		return 0
+
+	def add_fixed_deposit_info_many(self, security_infos, chunk_size):
+		if self.dbmode is None:
+			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
+		#-- validate the whole batch and report the invalid records
+		records, invalid = self._validate_many("add_fixed_deposit_info", security_infos, False)
+		report = self.fixed_deposit_services.create_many(records, chunk_size)
+		report["invalid"] = invalid
+		for geneva_id in report["inserted"]:
+			self._add_negative_lookup_key("fixed_deposits", geneva_id)
+		return report
+
+	def upsert_fixed_deposit_info(self, security_info):
+		self._upsert("add_fixed_deposit_info", self.fixed_deposit_services, security_info, False)
+		self._add_negative_lookup_key("fixed_deposits", security_info["geneva_id"])
 		return 0
 
+	def upsert_fixed_deposit_info_many(self, security_infos, chunk_size):
+		report = self._upsert_many("add_fixed_deposit_info", self.fixed_deposit_services, \
+									security_infos, chunk_size, False)
+		for record in report.pop("records"):
+			self._add_negative_lookup_key("fixed_deposits", record["geneva_id"])
+		return report
+
 	def update_fixed_deposit_info(self, security_info):
 		if self.dbmode is None:
 			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
-		v = AppValidatorFactory().get_validator("update_fixed_deposit_info")
+		v = validator_registry.get_validator("update_fixed_deposit_info")
 		#-- validate input fields
 		if not v.validate(security_info):
 			message = "Input validation error. Details: " + str(v.errors)
@@ -232,18 +973,30 @@ class AppController:
 		self.fixed_deposit_services.update(security_info)
 		return 0
 	
+	def update_fixed_deposit_info_many(self, security_infos, chunk_size):
+		if self.dbmode is None:
+			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
+		#-- validate the whole batch and report the invalid records
+		records, invalid = self._validate_many("update_fixed_deposit_info", security_infos, False)
+		report = self.fixed_deposit_services.update_many(records, chunk_size)
+		report["invalid"] = invalid
+		return report
+
 	def get_fx_forward_info(self, factset_id):
 		if self.dbmode is None:
 			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
 		params = {
 			"factset_id" : factset_id
 		}
-		v = AppValidatorFactory().get_validator("get_fx_forward_info")
+		v = validator_registry.get_validator("get_fx_forward_info")
 		#-- validate input fields
 		if not v.validate(params):
 			message = "Input validation error. Details: " + str(v.errors)
 			self.logger.error(message)
 			raise ValueError(message)
+		#-- no DB round trip if the factset_id does not exist for sure
+		if not self._may_exist("fx_forwards", factset_id):
+			return {}
 		#-- get the first value from the dictionary and return
 		fx_forward_l = self.fx_forward_services.query(params)
 		fx_forward = {}
@@ -254,7 +1007,7 @@ class AppController:
 	def add_fx_forward_info(self, security_info):
 		if self.dbmode is None:
 			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
-		v = AppValidatorFactory().get_validator("add_fx_forward_info")
+		v = validator_registry.get_validator("add_fx_forward_info")
 		if not v.validate(security_info):
 			message = "Input validation error. Details: " + str(v.errors)
 			self.logger.error(message)
@@ -264,12 +1017,36 @@ class AppController:
 		#-- create data model
 		#-- reuse the security_info
 		self.fx_forward_services.create(security_info)
+		self._add_negative_lookup_key("fx_forwards", security_info["factset_id"])
 		return 0
 
+	def add_fx_forward_info_many(self, security_infos, chunk_size):
+		if self.dbmode is None:
+			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
+		#-- validate the whole batch and report the invalid records
+		records, invalid = self._validate_many("add_fx_forward_info", security_infos, False)
+		report = self.fx_forward_services.create_many(records, chunk_size)
+		report["invalid"] = invalid
+		for factset_id in report["inserted"]:
+			self._add_negative_lookup_key("fx_forwards", factset_id)
+		return report
+
+	def upsert_fx_forward_info(self, security_info):
+		self._upsert("add_fx_forward_info", self.fx_forward_services, security_info, False)
+		self._add_negative_lookup_key("fx_forwards", security_info["factset_id"])
+		return 0
+
+	def upsert_fx_forward_info_many(self, security_infos, chunk_size):
+		report = self._upsert_many("add_fx_forward_info", self.fx_forward_services, \
+									security_infos, chunk_size, False)
+		for record in report.pop("records"):
+			self._add_negative_lookup_key("fx_forwards", record["factset_id"])
+		return report
+
 	def update_fx_forward_info(self, security_info):
 		if self.dbmode is None:
 			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
-		v = AppValidatorFactory().get_validator("update_fx_forward_info")
+		v = validator_registry.get_validator("update_fx_forward_info")
 		#-- validate input fields
 		if not v.validate(security_info):
 			message = "Input validation error. Details: " + str(v.errors)
@@ -291,10 +1068,39 @@ class AppController:
 		otc_counter_party_l = self.otc_counter_party_services.query()
 		return otc_counter_party_l
 
+	#-- one page of counterparties in the order of id. pass the id of the
+	#-- last record as after to get the next page
+	def get_counter_parties(self, party_type, after, limit):
+		if self.dbmode is None:
+			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
+		params = {
+			"party_type" : party_type,
+			"after" : after,
+			"limit" : limit
+		}
+		v = validator_registry.get_validator("get_counter_parties")
+		#-- validate input fields
+		if not v.validate(params):
+			message = "Input validation error. Details: " + str(v.errors)
+			self.logger.error(message)
+			raise ValueError(message)
+		return self.otc_counter_party_services.query_page(party_type, after, limit)
+
+	#-- generator of all counterparties read page by page, one session per page
+	def iter_counter_parties(self, party_type, page_size):
+		after = None
+		while True:
+			otc_counter_party_l = self.get_counter_parties(party_type, after, page_size)
+			for otc_counter_party in otc_counter_party_l:
+				yield otc_counter_party
+			if len(otc_counter_party_l) < page_size:
+				return
+			after = otc_counter_party_l[-1]["id"]
+
 	def add_counter_party_info(self, counter_party_info):
 		if self.dbmode is None:
 			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
-		v = AppValidatorFactory().get_validator("add_counter_party_info")
+		v = validator_registry.get_validator("add_counter_party_info")
 		if not v.validate(counter_party_info):
 			message = "Input validation error. Details: " + str(v.errors)
 			self.logger.error(message)
@@ -306,10 +1112,20 @@ class AppController:
 		self.otc_counter_party_services.create(counter_party_info)
 		return 0
 
+	def upsert_counter_party_info(self, counter_party_info):
+		self._upsert("add_counter_party_info", self.otc_counter_party_services, counter_party_info, False)
+		return 0
+
+	def upsert_counter_party_info_many(self, counter_party_infos, chunk_size):
+		report = self._upsert_many("add_counter_party_info", self.otc_counter_party_services, \
+									counter_party_infos, chunk_size, False)
+		report.pop("records")
+		return report
+
 	def update_counter_party_info(self, counter_party_info):
 		if self.dbmode is None:
 			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
-		v = AppValidatorFactory().get_validator("update_counter_party_info")
+		v = validator_registry.get_validator("update_counter_party_info")
 		#-- validate input fields
 		if not v.validate(counter_party_info):
 			message = "Input validation error. Details: " + str(v.errors)
@@ -322,30 +1138,53 @@ class AppController:
 		self.otc_counter_party_services.update(counter_party_info)
 		return 0
 	
-	def get_security_attribute(self, security_id_type, security_id):
+	def get_security_attribute(self, security_id_type, security_id, fields=None):
 		if self.dbmode is None:
 			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
 		params = {
 			"security_id_type" : security_id_type,
 			"security_id" : security_id
 		}
-		v = AppValidatorFactory().get_validator("get_security_attribute")
+		v = validator_registry.get_validator("get_security_attribute")
 		#-- validate input fields
-		if not v.validate(params):
+		if not v.validate(dict(params, fields=fields)):
 			message = "Input validation error. Details: " + str(v.errors)
 			self.logger.error(message)
 			raise ValueError(message)
+		#-- remove duplicated field and keep the input order
+		if fields is not None:
+			fields = list(dict.fromkeys(fields))
 		#-- get the first value from the dictionary and return
-		security_attribute_l = self.security_attribute_services.query(params)
+		security_attribute_l = self.security_attribute_services.query(params, fields)
 		security_attribute = {}
 		if len(security_attribute_l) > 0:
 			security_attribute = security_attribute_l[0]
 		return security_attribute
 
+	def get_security_attributes_many(self, pairs):
+		if self.dbmode is None:
+			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
+		params = {
+			"pairs" : pairs
+		}
+		v = validator_registry.get_validator("get_security_attributes_many")
+		#-- validate input fields
+		if not v.validate(params):
+			message = "Input validation error. Details: " + str(v.errors)
+			self.logger.error(message)
+			raise ValueError(message)
+		#-- remove duplicated pairs
+		pairs = list(dict.fromkeys(tuple(pair) for pair in pairs))
+		security_attributes = {}
+		for security_attribute in self.security_attribute_services.query_many(pairs):
+			security_attributes[(security_attribute["security_id_type"], \
+								security_attribute["security_id"])] = security_attribute
+		return security_attributes
+
 	def add_security_attribute(self, security_attribute_info):
 		if self.dbmode is None:
 			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
-		v = AppValidatorFactory().get_validator("add_security_attribute")
+		v = validator_registry.get_validator("add_security_attribute")
 		if not v.validate(security_attribute_info):
 			message = "Input validation error. Details: " + str(v.errors)
 			self.logger.error(message)
@@ -355,12 +1194,180 @@ class AppController:
 		#-- create data model
 		#-- reuse the security_attribute
 		self.security_attribute_services.create(security_attribute_info)
+		self._on_security_attribute_written([(security_attribute_info["security_id_type"], \
+											security_attribute_info["security_id"])])
 		return 0
 
+	def upsert_security_attribute(self, security_attribute_info):
+		self._upsert("add_security_attribute", self.security_attribute_services, \
+						security_attribute_info, False)
+		self._on_security_attribute_written([(security_attribute_info["security_id_type"], \
+											security_attribute_info["security_id"])])
+		return 0
+
+	def upsert_security_attribute_many(self, security_attribute_infos, chunk_size):
+		report = self._upsert_many("add_security_attribute", self.security_attribute_services, \
+									security_attribute_infos, chunk_size, False)
+		self._on_security_attribute_written([(r["security_id_type"], r["security_id"]) \
+											for r in report.pop("records")])
+		return report
+
+	#-- stream the rows of a delimited file with a header row, validated with
+	#-- the validator of method_name. the number of rows and the rejected rows
+	#-- are counted in report
+	def _read_file_records(self, method_name, file_path, delimiter, encoding, numeric_columns, \
+							add_timestamp, report):
+		v = validator_registry.get_validator(method_name)
+		report["rows"] = 0
+		report["rejected"] = 0
+		report["rejected_rows"] = []
+		def reject(line_number, errors):
+			report["rejected"] += 1
+			#-- keep the memory use flat if most of the rows are rejected
+			if len(report["rejected_rows"]) < self.MAX_REJECTED_ROWS_REPORTED:
+				report["rejected_rows"].append({
+					"line" : line_number,
+					"errors" : errors
+				})
+		timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+		for line_number, row in read_delimited_file(file_path, delimiter, encoding):
+			report["rows"] += 1
+			if row is None:
+				reject(line_number, "number of columns does not match the header")
+				continue
+			#-- empty numeric values are loaded as NULL, kept as None rather than
+			#-- left out so that the stored value is overwritten and all rows
+			#-- have the same columns
+			empty_columns = [column for column in numeric_columns if row.get(column) == ""]
+			for column in empty_columns:
+				del row[column]
+			if not v.validate(row):
+				reject(line_number, v.errors)
+				continue
+			for column in empty_columns:
+				row[column] = None
+			if add_timestamp:
+				row["timestamp"] = timestamp
+			yield row
+
+	#-- stream a delimited file with a header row of security attribute
+	#-- columns, validate each row and upsert the valid rows chunk by chunk,
+	#-- one transaction per chunk
+	def load_security_attribute_file(self, file_path, delimiter, encoding, chunk_size):
+		if self.dbmode is None:
+			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
+		report = {
+			"rows" : 0,
+			"upserted" : 0,
+			"written" : 0,
+			"skipped" : 0,
+			"rejected" : 0,
+			"rejected_rows" : []
+		}
+		start = time.time()
+		rows = self._read_file_records("add_security_attribute", file_path, delimiter, encoding, \
+							self.security_attribute_services.numeric_columns, False, report)
+		for records in chunked(rows, chunk_size):
+			written = self.security_attribute_services.upsert_many(records, chunk_size)
+			report["upserted"] += len(records)
+			report["written"] += written
+			report["skipped"] += len(records) - written
+			self._on_security_attribute_written([(r["security_id_type"], r["security_id"]) \
+												for r in records])
+		report["seconds"] = time.time() - start
+		report["rows_per_second"] = report["rows"] / report["seconds"] if report["seconds"] > 0 else 0
+		self.logger.info("Loaded " + file_path + ": " + str(report["upserted"]) + " rows upserted, " + \
+						str(report["rejected"]) + " rows rejected, " + \
+						str(int(report["rows_per_second"])) + " rows per second")
+		return report
+
+	#-- method name of the validator, whether a timestamp is added and the
+	#-- counter party type of the tables that can be reconciled with a file
+	def _get_reconcile_tables(self):
+		return {
+			"security_base" : ("add_security_basic_info", True, None),
+			"futures" : ("add_futures_info", True, None),
+			"fixed_deposits" : ("add_fixed_deposit_info", False, \
+								Constants.COUNTER_PARTY_SECURITY_TYPE_FIXED_DEPOSIT),
+			"fx_forwards" : ("add_fx_forward_info", False, Constants.COUNTER_PARTY_SECURITY_TYPE_FX_FORWARD),
+			"security_attributes" : ("add_security_attribute", False, None)
+		}
+
+	#-- make table match a delimited file with a header row holding all its
+	#-- records: the records of the file not in the table are inserted, the
+	#-- records that differ are updated and the records of the table not in
+	#-- the file are deleted, in batches of chunk_size records with one
+	#-- transaction per batch. the changes are not applied in a dry run, if a
+	#-- row of the file is rejected as the rejected records would be deleted,
+	#-- or if keys of the file differ only in case or accents as the unique
+	#-- key takes them as the same. return a report of the changes
+	def reconcile_security_data_file(self, table, file_path, delimiter, encoding, chunk_size, dry_run, \
+										hash_join_max_rows=None):
+		if self.dbmode is None:
+			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
+		reconcile_tables = self._get_reconcile_tables()
+		if table not in reconcile_tables:
+			message = "Input validation error. Details: table must be one of " + str(list(reconcile_tables))
+			self.logger.error(message)
+			raise ValueError(message)
+		if not isinstance(chunk_size, int) or chunk_size <= 0:
+			message = "Input validation error. Details: chunk_size must be a positive integer"
+			self.logger.error(message)
+			raise ValueError(message)
+		if hash_join_max_rows is None:
+			hash_join_max_rows = self.RECONCILE_HASH_JOIN_MAX_ROWS
+		method_name, add_timestamp, counter_party_type = reconcile_tables[table]
+		services = self._get_table_services()[table]
+		report = {
+			"table" : table,
+			"rows" : 0,
+			"rejected" : 0,
+			"rejected_rows" : [],
+			"dry_run" : dry_run,
+			"applied" : False,
+			"counter_parties_added" : 0
+		}
+		start = time.time()
+		records = self._read_file_records(method_name, file_path, delimiter, encoding, \
+							services.row_reader.numeric_column_names, add_timestamp, report)
+		reconciler = Reconciler(self.session_manager, services.content_hasher, hash_join_max_rows)
+		try:
+			report.update(reconciler.classify(records))
+			if not dry_run and report["rejected"] == 0 and report["conflict"] == 0:
+				counter_parties_added = 0
+				def prepare(session, records):
+					nonlocal counter_parties_added
+					if counter_party_type is not None:
+						counter_parties_added = self.otc_counter_party_services.add_missing(session, \
+								[r["geneva_counter_party"] for r in records], counter_party_type)
+						report["counter_parties_added"] += counter_parties_added
+				def on_applied(written_keys, deleted_keys):
+					nonlocal counter_parties_added
+					if table == "security_base":
+						self._on_security_base_written(written_keys + deleted_keys)
+					elif table == "security_attributes":
+						self._on_security_attribute_written(written_keys)
+						self._on_security_attribute_deleted(deleted_keys)
+					else:
+						for key in written_keys:
+							self._add_negative_lookup_key(table, key)
+					if counter_parties_added > 0:
+						self.otc_counter_party_services.bump_version()
+						counter_parties_added = 0
+				reconciler.apply(chunk_size, prepare, on_applied)
+				report["applied"] = True
+		finally:
+			reconciler.close()
+		report["seconds"] = time.time() - start
+		report["rows_per_second"] = report["rows"] / report["seconds"] if report["seconds"] > 0 else 0
+		self.logger.info("Reconciled " + table + " with " + file_path + ": " + \
+						str({k : v for k, v in report.items() if k != "rejected_rows"}))
+		return report
+
 	def update_security_attribute(self, security_attribute_info):
 		if self.dbmode is None:
 			raise DataStoreNotYetInitializeError("Plase call initializeDatastore to initialize datastore")
-		v = AppValidatorFactory().get_validator("update_security_attribute")
+		v = validator_registry.get_validator("update_security_attribute")
 		#-- validate input fields
 		if not v.validate(security_attribute_info):
 			message = "Input validation error. Details: " + str(v.errors)
@@ -17,6 +17,30 @@ def initialize_datastore(mode):
 	
 
 
+def dispose_datastore():
+	"""
+	Side effect: close all the pooled database connections, e.g. on
+	shutdown. initialize_datastore needs to be called before using the
+	datastore again.
+	"""
+	return controller.dispose_datastore()
+
+
+
+def transaction():
+	"""
+	=> [Context manager] run the data calls inside the with block in one
+	database transaction. The changes are committed at the end of the block,
+	or rolled back if an exception is raised inside the block, e.g.
+
+	with transaction():
+		add_security_basic_info(security_info)
+		add_futures_info(futures_info)
+	"""
+	return controller.transaction()
+
+
+
 def clear_security_data():
 	"""
 	Clears all the data in the factset tables including: 
@@ -37,6 +61,38 @@ def get_security_basic_info(geneva_investment_id):
 
 
 
+def get_security_basic_info_many(geneva_investment_ids):
+	"""
+	[List][String] Geneva investment ids => [Dictionary] with keys
+	"found": [Dictionary] geneva id => security info and
+	"missing": [List] geneva ids not found
+	"""
+	return controller.get_security_basic_info_many(geneva_investment_ids)
+
+
+
+def get_security_basic_info_by(id_type, value):
+	"""
+	[String] id type ('geneva_id', 'ticker', 'isin', 'bloomberg_id' or
+	'sedol'), [String] value => [List][Dictionary] security info
+
+	More than one security can have the same identifier other than geneva_id.
+	"""
+	return controller.get_security_basic_info_by(id_type, value)
+
+
+
+def get_security_basic_info_by_many(id_type, values):
+	"""
+	[String] id type ('geneva_id', 'ticker', 'isin', 'bloomberg_id' or
+	'sedol'), [List] values => [Dictionary] with keys
+	"found": [Dictionary] value => [List][Dictionary] security info,
+	"missing": [List] values not found
+	"""
+	return controller.get_security_basic_info_by_many(id_type, values)
+
+
+
 def add_security_basic_info(security_info):
 	"""
 	[Dictionary] security info
@@ -49,6 +105,21 @@ def add_security_basic_info(security_info):
 
 
 
+def add_security_basic_info_many(security_infos, chunk_size=1000):
+	"""
+	[List][Dictionary] security info, [Integer] number of records written
+	in one transaction => [Dictionary] report with keys
+	"inserted": [List] geneva ids added,
+	"duplicate": [List] geneva ids already exist or repeated in the list,
+	"invalid": [List][Dictionary] index and validation errors of the records
+	failed the input validation
+
+	Side effect: add the valid and new security info to datastore
+	"""
+	return controller.add_security_basic_info_many(security_infos, chunk_size)
+
+
+
 def update_security_basic_info(security_info):
 	"""
 	[Dictionary] security info
@@ -61,6 +132,276 @@ def update_security_basic_info(security_info):
 
 
 
+def enable_security_basic_info_cache(max_size=10000, ttl=300):
+	"""
+	[Integer] max number of cached securities, [Number] time to live in
+	seconds (None means never expire)
+
+	Side effect: cache the result of get_security_basic_info in process.
+	The cache is invalidated by add_security_basic_info and
+	update_security_basic_info, changes made by other processes are seen
+	after ttl.
+	"""
+	return controller.enable_security_basic_info_cache(max_size, ttl)
+
+
+
+def disable_security_basic_info_cache():
+	"""
+	Side effect: stop caching the result of get_security_basic_info
+	"""
+	return controller.disable_security_basic_info_cache()
+
+
+
+def get_security_basic_info_cache_stats():
+	"""
+	No argument => [Dictionary] size, max_size, ttl, hits, misses, evictions,
+	expirations and stale_puts, the records read while a write happened and
+	not cached, of the cache, empty if the cache is disabled
+	"""
+	return controller.get_security_basic_info_cache_stats()
+
+
+
+def enable_negative_lookup_filter(false_positive_rate=0.01):
+	"""
+	[Float] false positive rate of the filter, between 0 and 1
+
+	Side effect: build a bloom filter of the unique keys of security_base,
+	futures, fixed_deposits and fx_forwards. get_security_basic_info,
+	get_futures_info, get_fixed_deposit_info and get_fx_forward_info then
+	return {} for keys that do not exist without querying the datastore.
+	Keys added by this process are added to the filters, keys added by other
+	processes are only seen after the filters are rebuilt by calling this
+	function or initialize_datastore again.
+	"""
+	return controller.enable_negative_lookup_filter(false_positive_rate)
+
+
+
+def disable_negative_lookup_filter():
+	"""
+	Side effect: always query the datastore for the key lookups
+	"""
+	return controller.disable_negative_lookup_filter()
+
+
+
+def get_negative_lookup_filter_stats():
+	"""
+	No argument => [Dictionary] table name => keys, capacity,
+	false_positive_rate and skipped_lookups of the filter, empty if the
+	filter is disabled
+	"""
+	return controller.get_negative_lookup_filter_stats()
+
+
+
+def enable_identifier_resolver():
+	"""
+	Side effect: load geneva_id, ticker, isin, bloomberg_id and sedol of all
+	security_base records and the (security_id_type, security_id) keys of all
+	security_attributes records in memory for resolve_geneva_id. Records
+	written by this process are refreshed, records written by other processes
+	are only seen after the resolver is rebuilt by calling this function or
+	initialize_datastore again.
+	"""
+	return controller.enable_identifier_resolver()
+
+
+
+def disable_identifier_resolver():
+	"""
+	Side effect: release the identifiers loaded by enable_identifier_resolver
+	"""
+	return controller.disable_identifier_resolver()
+
+
+
+def get_identifier_resolver_stats():
+	"""
+	No argument => [Dictionary] number of securities and security attribute
+	keys loaded, empty if the resolver is disabled
+	"""
+	return controller.get_identifier_resolver_stats()
+
+
+
+def resolve_geneva_id(value, id_type=None):
+	"""
+	[String] identifier, [String] id type (optional) => [String] geneva id,
+	None if not found
+
+	id_type is 'geneva_id', 'ticker', 'isin', 'bloomberg_id' or 'sedol', or a
+	security_id_type of security attribute such as 'ISIN'. If id_type is None,
+	the identifier is tried as geneva id, ticker, isin, bloomberg id then
+	sedol. Values are matched exactly.
+
+	Throws IdentifierResolverNotEnabledError if enable_identifier_resolver is
+	not called.
+	"""
+	return controller.resolve_geneva_id(value, id_type)
+
+
+
+def resolve_geneva_id_many(values, id_type=None):
+	"""
+	[List] identifiers, [String] id type (optional) => [Dictionary] with keys
+	"found": [Dictionary] identifier => geneva id,
+	"missing": [List] identifiers not found
+	"""
+	return controller.resolve_geneva_id_many(values, id_type)
+
+
+
+def resolve_security_attribute_key(value, id_type=None):
+	"""
+	[String] identifier, [String] id type (optional) => [Tuple] (security id
+	type, security id) of the security attribute of the security, None if
+	not found. The key can be passed to get_security_attribute.
+	"""
+	return controller.resolve_security_attribute_key(value, id_type)
+
+
+
+def upsert_security_basic_info(security_info):
+	"""
+	[Dictionary] security info
+
+	Side effect: add the security info to datastore, or update it if the
+	geneva id already exists, in one statement.
+	"""
+	return controller.upsert_security_basic_info(security_info)
+
+
+
+def upsert_security_basic_info_many(security_infos, chunk_size=1000):
+	"""
+	[List][Dictionary] security info, [Integer] number of records written in one
+	statement and transaction => [Dictionary] report with keys
+	"upserted": [Integer] number of valid records,
+	"written": [Integer] number of records added or updated,
+	"skipped": [Integer] number of records identical to the stored rows and
+	not written,
+	"invalid": [List][Dictionary] index and validation errors of the records
+	failed the input validation
+
+	Side effect: add or update the valid security info to datastore
+	"""
+	return controller.upsert_security_basic_info_many(security_infos, chunk_size)
+
+
+
+def load_security_snapshot():
+	"""
+	No argument => [SecuritySnapshot] columnar copy of all security basic
+	info and security attribute, read in one transaction. Requires numpy.
+
+	Numeric columns are numpy float64 arrays (NULL as nan), string columns
+	are dictionary encoded as int32 codes and the distinct values. Use
+	snapshot.get_security_basic_info(geneva_id) and
+	snapshot.get_security_attribute(security_id_type, security_id) to get a
+	row as dictionary, snapshot.security_base.column(column_name) to get a
+	column and snapshot.memory_usage() to compare the bytes used with the
+	same rows as list of dictionary.
+	"""
+	return controller.load_security_snapshot()
+
+
+
+def write_security_snapshot_file(file_path):
+	"""
+	[String] file path => [Dictionary] number of rows of each table, "bytes"
+	and "seconds" used
+
+	Side effect: write security_base, futures, fixed_deposits, fx_forwards
+	and security_attributes read in one transaction to a memory mappable
+	snapshot file. The file is written to a temporary file in the same
+	directory and renamed to file_path, so readers see either the old or the
+	new file.
+	"""
+	return controller.write_security_snapshot_file(file_path)
+
+
+
+def open_security_snapshot_file(file_path):
+	"""
+	[String] file path => [SnapshotFileReader] read only view of a snapshot
+	file written by write_security_snapshot_file. The file is memory mapped
+	and shared by all processes through the page cache.
+
+	Use reader.get(table_name, key) to get a row as dictionary, the key of
+	security_attributes is a (security_id_type, security_id) tuple.
+	reader.is_stale() returns True once a newer snapshot is written, open
+	the file again to read it. Call reader.close() when done.
+	"""
+	return controller.open_security_snapshot_file(file_path)
+
+
+
+def export_security_data(path, format="parquet", row_group_size=100000):
+	"""
+	[String] directory, [String] format ('parquet' or 'arrow'), [Integer]
+	number of rows in one row group => [Dictionary] number of rows of each
+	table, "seconds" used and "rows_per_second"
+
+	Side effect: write security_base, futures, fixed_deposits, fx_forwards,
+	otc_counter_parties and security_attributes read in one transaction to
+	<path>/<table name>.parquet or <path>/<table name>.arrow (Arrow IPC file).
+	Rows are streamed, at most row_group_size rows are kept in memory.
+	Requires pyarrow.
+	"""
+	return controller.export_security_data(path, format, row_group_size)
+
+
+
+def get_write_stats():
+	"""
+	No argument => [Dictionary] table name => [Dictionary] "written": number
+	of records written, "skipped": number of records identical to the stored
+	rows and not written, since the datastore is initialized
+	"""
+	return controller.get_write_stats()
+
+
+
+def export_changes_since(table, watermark=None, limit=1000, safety_lag=None):
+	"""
+	[String] table name, [Dictionary] watermark, [Integer] max number of rows,
+	[Integer] safety lag in seconds => [Dictionary] "rows": [List] rows
+	changed after watermark, "watermark": [Dictionary] watermark of the last
+	row, "has_more": [Boolean]
+
+	table is one of security_base, futures, fixed_deposits, fx_forwards,
+	otc_counter_parties or security_attributes. Rows are ordered by
+	(updated_at, id) and include id and updated_at. watermark is None to
+	read from the first row, {"updated_at": "yyyy-mm-dd hh:mm:ss", "id": id}
+	returned by the previous call, or a "yyyy-mm-dd hh:mm:ss" timestamp to
+	read the rows updated after it. safety_lag is None for the default of
+	60 seconds.
+
+	updated_at is the time a row is written rather than committed, so rows
+	updated in the last safety_lag seconds and the current second are
+	returned by a later call. safety_lag must be longer than the longest
+	write transaction, such as transaction() blocks and file loads, or a row
+	committed late can be skipped. Deleted rows are not returned.
+	"""
+	return controller.export_changes_since(table, watermark, limit, safety_lag)
+
+
+
+def get_change_high_water_mark(table, safety_lag=None):
+	"""
+	[String] table name, [Integer] safety lag in seconds => [Dictionary]
+	{"updated_at": "yyyy-mm-dd hh:mm:ss", "id": id} of the last changed row
+	updated before the last safety_lag seconds, None if there is no such row.
+	safety_lag is None for the default of 60 seconds.
+	"""
+	return controller.get_change_high_water_mark(table, safety_lag)
+
+
+
 def get_futures_info(ticker):
 	"""
 	[String] Ticker => [Dictionary] security info
@@ -93,6 +434,34 @@ def update_futures_info(security_info):
 
 	
 
+def upsert_futures_info(security_info):
+	"""
+	[Dictionary] security info
+
+	Side effect: add the security info to datastore, or update it if the
+	ticker already exists, in one statement.
+	"""
+	return controller.upsert_futures_info(security_info)
+
+
+
+def upsert_futures_info_many(security_infos, chunk_size=1000):
+	"""
+	[List][Dictionary] security info, [Integer] number of records written in one
+	statement and transaction => [Dictionary] report with keys
+	"upserted": [Integer] number of valid records,
+	"written": [Integer] number of records added or updated,
+	"skipped": [Integer] number of records identical to the stored rows and
+	not written,
+	"invalid": [List][Dictionary] index and validation errors of the records
+	failed the input validation
+
+	Side effect: add or update the valid security info to datastore
+	"""
+	return controller.upsert_futures_info_many(security_infos, chunk_size)
+
+
+
 def get_fixed_deposit_info(geneva_id):
 	"""
 	[String] geneva_id => [Dictionary] security info
@@ -113,6 +482,23 @@ def add_fixed_deposit_info(security_info):
 
 
 
+def add_fixed_deposit_info_many(security_infos, chunk_size=1000):
+	"""
+	[List][Dictionary] security info, [Integer] number of records written
+	in one transaction => [Dictionary] report with keys
+	"inserted": [List] geneva ids added,
+	"duplicate": [List] geneva ids already exist or repeated in the list,
+	"counter_parties_added": [Integer] number of counter parties added,
+	"invalid": [List][Dictionary] index and validation errors of the records
+	failed the input validation
+
+	Side effect: add the valid and new fixed deposits to datastore and the
+	counter parties of them not exist yet
+	"""
+	return controller.add_fixed_deposit_info_many(security_infos, chunk_size)
+
+
+
 def update_fixed_deposit_info(security_info):
 	"""
 	[Dictionary] security info
@@ -125,6 +511,52 @@ def update_fixed_deposit_info(security_info):
 
 	
 
+def upsert_fixed_deposit_info(security_info):
+	"""
+	[Dictionary] security info
+
+	Side effect: add the security info to datastore, or update it if the
+	geneva id already exists, in one statement.
+	The counter party is added if it does not exist.
+	"""
+	return controller.upsert_fixed_deposit_info(security_info)
+
+
+
+def upsert_fixed_deposit_info_many(security_infos, chunk_size=1000):
+	"""
+	[List][Dictionary] security info, [Integer] number of records written in one
+	statement and transaction => [Dictionary] report with keys
+	"upserted": [Integer] number of valid records,
+	"written": [Integer] number of records added or updated,
+	"skipped": [Integer] number of records identical to the stored rows and
+	not written,
+	"invalid": [List][Dictionary] index and validation errors of the records
+	failed the input validation
+
+	Side effect: add or update the valid security info to datastore
+	"""
+	return controller.upsert_fixed_deposit_info_many(security_infos, chunk_size)
+
+
+
+def update_fixed_deposit_info_many(security_infos, chunk_size=1000):
+	"""
+	[List][Dictionary] security info, [Integer] number of records written
+	in one transaction => [Dictionary] report with keys
+	"updated": [List] geneva ids updated,
+	"not_found": [List] geneva ids not exist,
+	"skipped": [Integer] number of records identical to the stored rows and
+	not written,
+	"invalid": [List][Dictionary] index and validation errors of the records
+	failed the input validation
+
+	Side effect: update the valid security info to datastore
+	"""
+	return controller.update_fixed_deposit_info_many(security_infos, chunk_size)
+
+
+
 def get_fx_forward_info(factset_id):
 	"""
 	[String] factset_id => [Dictionary] security info
@@ -145,6 +577,23 @@ def add_fx_forward_info(security_info):
 
 
 
+def add_fx_forward_info_many(security_infos, chunk_size=1000):
+	"""
+	[List][Dictionary] security info, [Integer] number of records written
+	in one transaction => [Dictionary] report with keys
+	"inserted": [List] factset ids added,
+	"duplicate": [List] factset ids already exist or repeated in the list,
+	"counter_parties_added": [Integer] number of counter parties added,
+	"invalid": [List][Dictionary] index and validation errors of the records
+	failed the input validation
+
+	Side effect: add the valid and new FX Forwards to datastore and the
+	counter parties of them not exist yet
+	"""
+	return controller.add_fx_forward_info_many(security_infos, chunk_size)
+
+
+
 def update_fx_forward_info(security_info):
 	"""
 	[Dictionary] security info
@@ -157,6 +606,35 @@ def update_fx_forward_info(security_info):
 	
 
 
+def upsert_fx_forward_info(security_info):
+	"""
+	[Dictionary] security info
+
+	Side effect: add the security info to datastore, or update it if the
+	factset id already exists, in one statement.
+	The counter party is added if it does not exist.
+	"""
+	return controller.upsert_fx_forward_info(security_info)
+
+
+
+def upsert_fx_forward_info_many(security_infos, chunk_size=1000):
+	"""
+	[List][Dictionary] security info, [Integer] number of records written in one
+	statement and transaction => [Dictionary] report with keys
+	"upserted": [Integer] number of valid records,
+	"written": [Integer] number of records added or updated,
+	"skipped": [Integer] number of records identical to the stored rows and
+	not written,
+	"invalid": [List][Dictionary] index and validation errors of the records
+	failed the input validation
+
+	Side effect: add or update the valid security info to datastore
+	"""
+	return controller.upsert_fx_forward_info_many(security_infos, chunk_size)
+
+
+
 def get_all_counter_party_info():
 	"""
 	No argument => [List][Dictionary] security info
@@ -165,6 +643,25 @@ def get_all_counter_party_info():
 
 
 
+def get_counter_parties(party_type=None, after=None, limit=1000):
+	"""
+	[String] party type or None for all, [Integer] id of the last record of
+	the previous page or None for the first page, [Integer] max number of
+	records => [List] counter party info with id, in the order of id
+	"""
+	return controller.get_counter_parties(party_type, after, limit)
+
+
+
+def iter_counter_parties(party_type=None, page_size=1000):
+	"""
+	[String] party type or None for all, [Integer] number of records read in
+	one query => [Generator] counter party info with id, in the order of id
+	"""
+	return controller.iter_counter_parties(party_type, page_size)
+
+
+
 def add_counter_party_info(counter_party):
 	"""
 	[Dictionary] counter party
@@ -189,11 +686,55 @@ def update_counter_party_info(counter_party):
 
 	
 
-def get_security_attribute(security_id_type, security_id):
+def upsert_counter_party_info(counter_party):
+	"""
+	[Dictionary] counter party
+
+	Side effect: add the counter party to datastore, or update it if the
+	(geneva counter party, geneva party type) already exists, in one statement.
+	"""
+	return controller.upsert_counter_party_info(counter_party)
+
+
+
+def upsert_counter_party_info_many(counter_partys, chunk_size=1000):
+	"""
+	[List][Dictionary] counter party, [Integer] number of records written in one
+	statement and transaction => [Dictionary] report with keys
+	"upserted": [Integer] number of valid records,
+	"written": [Integer] number of records added or updated,
+	"skipped": [Integer] number of records identical to the stored rows and
+	not written,
+	"invalid": [List][Dictionary] index and validation errors of the records
+	failed the input validation
+
+	Side effect: add or update the valid counter party to datastore
+	"""
+	return controller.upsert_counter_party_info_many(counter_partys, chunk_size)
+
+
+
+def get_security_attribute(security_id_type, security_id, fields=None):
+	"""
+	[String] security id type, [String] security id,
+	[List] fields (optional) => [Dictionary] security attribute
+
+	Only the columns in fields are returned if fields is given, e.g.
+	["country_of_risk", "s_p_rating", "bond_classification"]. Throws
+	ValueError if a field is not a column of security attribute.
 	"""
-	[String] security id type, [String] security id => [Dictionary] security attribute
+	return controller.get_security_attribute(security_id_type, security_id, fields)
+
+
+
+def get_security_attributes_many(pairs):
 	"""
-	return controller.get_security_attribute(security_id_type, security_id)
+	[List] (security id type, security id) pairs => [Dictionary]
+	(security id type, security id) => security attribute
+
+	Pairs not found are not in the result.
+	"""
+	return controller.get_security_attributes_many(pairs)
 
 
 
@@ -217,4 +758,103 @@ def update_security_attribute(security_attribute_info):
 
 	Throws: SecurityAttributeNotExistError
 	"""
-	return controller.update_security_attribute(security_attribute_info)
\ No newline at end of file
+	return controller.update_security_attribute(security_attribute_info)
+
+
+
+def upsert_security_attribute(security_attribute_info):
+	"""
+	[Dictionary] security attribute
+
+	Side effect: add the security attribute to datastore, or update it if the
+	(security id type, security id) already exists, in one statement.
+	"""
+	return controller.upsert_security_attribute(security_attribute_info)
+
+
+
+def upsert_security_attribute_many(security_attribute_infos, chunk_size=1000):
+	"""
+	[List][Dictionary] security attribute, [Integer] number of records written in one
+	statement and transaction => [Dictionary] report with keys
+	"upserted": [Integer] number of valid records,
+	"written": [Integer] number of records added or updated,
+	"skipped": [Integer] number of records identical to the stored rows and
+	not written,
+	"invalid": [List][Dictionary] index and validation errors of the records
+	failed the input validation
+
+	Side effect: add or update the valid security attribute to datastore
+	"""
+	return controller.upsert_security_attribute_many(security_attribute_infos, chunk_size)
+
+
+
+def load_security_attribute_file(file_path, delimiter=",", encoding="utf-8-sig", chunk_size=1000):
+	"""
+	[String] path of a delimited file with a header row of security attribute
+	columns, [String] delimiter, [String] encoding, [Integer] number of rows
+	written in one statement and transaction => [Dictionary] report with keys
+	"rows": [Integer] number of rows read,
+	"upserted": [Integer] number of valid rows,
+	"written": [Integer] number of rows added or updated,
+	"skipped": [Integer] number of rows identical to the stored rows and not
+	written,
+	"rejected": [Integer] number of rows failed the input validation,
+	"rejected_rows": [List][Dictionary] line number and validation errors of
+	the first 1000 rejected rows,
+	"seconds": [Float] time used,
+	"rows_per_second": [Float] throughput
+
+	The file is read chunk by chunk, so the memory use does not depend on the
+	file size. Each row is validated as in add_security_attribute, empty
+	numeric values are loaded as NULL.
+
+	Side effect: add or update the valid security attribute to datastore
+	"""
+	return controller.load_security_attribute_file(file_path, delimiter, encoding, chunk_size)
+
+
+
+def reconcile_security_data_file(table, file_path, delimiter=",", encoding="utf-8-sig", chunk_size=1000, \
+									dry_run=False):
+	"""
+	[String] table, one of "security_base", "futures", "fixed_deposits",
+	"fx_forwards" or "security_attributes", [String] path of a delimited file
+	with a header row holding all the records of the table, [String]
+	delimiter, [String] encoding, [Integer] number of records written in one
+	statement and transaction, [Boolean] dry_run => [Dictionary] report with
+	keys
+	"table": [String] table,
+	"rows": [Integer] number of rows read,
+	"rejected": [Integer] number of rows failed the input validation,
+	"rejected_rows": [List][Dictionary] line number and validation errors of
+	the first 1000 rejected rows,
+	"duplicate": [Integer] number of rows of a key repeated in the file, the
+	last row of a key is used,
+	"conflict": [Integer] number of keys of the file differ only in case,
+	accents or trailing spaces from another key of the file,
+	"join": [String] "hash" if the file is joined in memory, "merge" if the
+	file and the table are sorted on disk and merge joined,
+	"insert": [Integer] number of records not in the table,
+	"update": [Integer] number of records differ from the table,
+	"delete": [Integer] number of records of the table not in the file,
+	"unchanged": [Integer] number of records identical to the table,
+	"dry_run": [Boolean] dry_run,
+	"applied": [Boolean] whether the changes are applied,
+	"counter_parties_added": [Integer] number of counter parties added,
+	"seconds": [Float] time used,
+	"rows_per_second": [Float] throughput
+
+	Each row is validated as in the add function of the table, empty numeric
+	values are NULL. The file and the table are joined by the unique key and
+	compared by content hash, so the memory use is bounded whatever the size
+	of the file and the table. The changes are not applied in a dry run, if
+	any row is rejected as the record would be deleted otherwise, or if any
+	key is in conflict as the unique key of the table does not tell them
+	apart.
+
+	Side effect: add, update and delete the records of the table in datastore
+	so that it matches the file
+	"""
+	return controller.reconcile_security_data_file(table, file_path, delimiter, encoding, chunk_size, dry_run)
\ No newline at end of file
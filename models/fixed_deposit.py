@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, DateTime, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, Index, Numeric, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 
 BaseModel = declarative_base(name='BaseModel')
 
 class FixedDeposit(BaseModel):
 	__tablename__ = "fixed_deposits"
+	#-- same unique key and index as in sql/create.sql
+	__table_args__ = (UniqueConstraint("geneva_id", name="udx_fixed_deposits__geneva_id"),
+				Index("idx_fixed_deposits__updated_at_id", "updated_at", "id"))
 	id = Column(Integer, primary_key=True)
 	geneva_id = Column(String(50))
 	factset_id = Column(String(100))
@@ -12,6 +15,8 @@ class FixedDeposit(BaseModel):
 	starting_date = Column(DateTime)
 	maturity_date = Column(DateTime)
 	interest_rate = Column(Numeric(asdecimal=False))
+	#-- hash of the business columns, see utils/content_hash.py
+	content_hash = Column(String(32))
 	created_at = Column(DateTime)
 	updated_at = Column(DateTime)
 	created_by = Column(Integer)
@@ -1,16 +1,21 @@
-from sqlalchemy import Column, Integer, String, DateTime, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, Index, Numeric, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 
 BaseModel = declarative_base(name='BaseModel')
 
 class Futures(BaseModel):
 	__tablename__ = "futures"
+	#-- same unique key and index as in sql/create.sql
+	__table_args__ = (UniqueConstraint("ticker", name="udx_futures__ticker"),
+				Index("idx_futures__updated_at_id", "updated_at", "id"))
 	id = Column(Integer, primary_key=True)
 	ticker = Column(String(50))
 	underlying_id = Column(String(100))
 	contract_size = Column(Numeric(asdecimal=False))
 	value_of_1pt = Column(Numeric(asdecimal=False))
 	timestamp = Column(DateTime)
+	#-- hash of the business columns, see utils/content_hash.py
+	content_hash = Column(String(32))
 	created_at = Column(DateTime)
 	updated_at = Column(DateTime)
 	created_by = Column(Integer)
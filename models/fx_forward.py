@@ -1,10 +1,13 @@
-from sqlalchemy import Column, Integer, String, DateTime, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, Index, Numeric, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 
 BaseModel = declarative_base(name='BaseModel')
 
 class FxForward(BaseModel):
 	__tablename__ = "fx_forwards"
+	#-- same unique key and index as in sql/create.sql
+	__table_args__ = (UniqueConstraint("factset_id", name="udx_fx_forwards__factset_id"),
+				Index("idx_fx_forwards__updated_at_id", "updated_at", "id"))
 	id = Column(Integer, primary_key=True)
 	factset_id = Column(String(100))
 	geneva_fx_forward_name = Column(String(100))
@@ -16,6 +19,8 @@ class FxForward(BaseModel):
 	term_currency = Column(String(5))
 	term_currency_quantity = Column(Numeric(asdecimal=False))
 	forward_rate = Column(Numeric(asdecimal=False))
+	#-- hash of the business columns, see utils/content_hash.py
+	content_hash = Column(String(32))
 	created_at = Column(DateTime)
 	updated_at = Column(DateTime)
 	created_by = Column(Integer)
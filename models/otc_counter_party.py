@@ -1,15 +1,22 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 
 BaseModel = declarative_base(name='BaseModel')
 
 class OtcCounterParty(BaseModel):
 	__tablename__ = "otc_counter_parties"
+	#-- same unique key and indexes as in sql/create.sql
+	__table_args__ = (UniqueConstraint("geneva_counter_party", "geneva_party_type", \
+				name="udx_otc_counter_parties__geneva_counter_party_geneva_party_type"),
+				Index("idx_otc_counter_parties__updated_at_id", "updated_at", "id"),
+				Index("idx_otc_counter_parties__geneva_party_type_id", "geneva_party_type", "id"))
 	id = Column(Integer, primary_key=True)
 	geneva_counter_party = Column(String(100))
 	geneva_party_type = Column(String(100))
 	geneva_party_name = Column(String(100))
 	bloomberg_ticker = Column(String(50))
+	#-- hash of the business columns, see utils/content_hash.py
+	content_hash = Column(String(32))
 	created_at = Column(DateTime)
 	updated_at = Column(DateTime)
 	created_by = Column(Integer)
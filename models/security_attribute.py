@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, Index, Numeric, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 
 BaseModel = declarative_base(name='BaseModel')
 
 class SecurityAttribute(BaseModel):
 	__tablename__ = "security_attributes"
+	#-- same unique key and index as in sql/create.sql
+	__table_args__ = (UniqueConstraint("security_id_type", "security_id", \
+				name="udx_security_attributes__security_id_type_security_id"),
+				Index("idx_security_attributes__updated_at_id", "updated_at", "id"))
 	id = Column(Integer, primary_key=True)
 	security_id_type = Column(String(100))
 	security_id = Column(String(100))
@@ -44,6 +48,8 @@ class SecurityAttribute(BaseModel):
 	classif_on_chi_state_owned_enterp = Column(String(100))
 	private_placement_indicator = Column(String(100))
 	trading_volume_90_days = Column(Numeric(asdecimal=False))
+	#-- hash of the business columns, see utils/content_hash.py
+	content_hash = Column(String(32))
 	created_at = Column(DateTime)
 	updated_at = Column(DateTime)
 	created_by = Column(Integer)
@@ -1,10 +1,17 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 
 BaseModel = declarative_base(name='BaseModel')
 
 class SecurityBase(BaseModel):
 	__tablename__ = "security_base"
+	#-- same unique key and indexes as in sql/create.sql
+	__table_args__ = (UniqueConstraint("geneva_id", name="udx_security_base__geneva_id"),
+					Index("idx_security_base__ticker", "ticker"),
+					Index("idx_security_base__isin", "isin"),
+					Index("idx_security_base__bloomberg_id", "bloomberg_id"),
+					Index("idx_security_base__sedol", "sedol"),
+					Index("idx_security_base__updated_at_id", "updated_at", "id"))
 	id = Column(Integer, primary_key=True)
 	geneva_id = Column(String(100))
 	geneva_asset_type = Column(String(100))
@@ -18,6 +25,8 @@ class SecurityBase(BaseModel):
 	description = Column(String(200))
 	exchange_name = Column(String(100))
 	timestamp = Column(DateTime)
+	#-- hash of the business columns, see utils/content_hash.py
+	content_hash = Column(String(32))
 	created_at = Column(DateTime)
 	updated_at = Column(DateTime)
 	created_by = Column(Integer)
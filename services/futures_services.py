@@ -3,31 +3,52 @@
 import logging
 from datetime import datetime
 from security_data.models.futures import Futures
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import bindparam
+from security_data.utils.batch import chunked
+from security_data.utils.change_reader import ChangeReader
+from security_data.utils.content_hash import ContentHasher
+from security_data.utils.row_reader import RowReader, iter_rows_by_id
+from security_data.utils.upsert import upsert
 from security_data.utils.error_handling import (FuturesAlreadyExistError,
 											FuturesNotExistError)
 
 class FuturesServices:
 
-	def __init__(self, db):
+	#-- columns returned by query, numeric columns are returned as float
+	row_reader = RowReader(Futures.__table__, [
+		"ticker",
+		"underlying_id",
+		"contract_size",
+		"value_of_1pt",
+		"timestamp"
+	])
+	query_statement = row_reader.select(Futures.ticker == bindparam("ticker"), \
+			order_by=Futures.created_at)
+	#-- rows changed after a watermark, with id and updated_at
+	change_reader = ChangeReader(row_reader)
+
+	def __init__(self, session_manager):
 		self.logger = logging.getLogger(__name__)
-		self.db = db
+		self.session_manager = session_manager
+		self.db = session_manager.db
+		#-- writes of records identical to the stored rows are skipped
+		self.content_hasher = ContentHasher(self.row_reader, ["ticker"])
 
 	def delete_all(self):
 		try:
-			session = sessionmaker(bind=self.db)()
+			session = self.session_manager.get_session()
 			session.query(Futures).delete()
-			session.commit()
+			self.session_manager.commit(session)
 		except Exception as e:
 			self.logger.error("Failed to delete all records in Futures")
 			self.logger.error(e)
 			raise
 		finally:
-			session.close()
+			self.session_manager.close(session)
 
 	def create(self, security_info):
 		try:
-			session = sessionmaker(bind=self.db)()
+			session = self.session_manager.get_session()
 			has_record = bool(session.query(Futures).filter_by(ticker=security_info['ticker']).first())
 			if has_record:
 				message = "Record " + security_info['ticker'] + " already exists"
@@ -35,8 +56,9 @@ class FuturesServices:
 				raise FuturesAlreadyExistError(message)
 			else:
 				futures = Futures(**security_info)
+				futures.content_hash = self.content_hasher.get_hash(security_info)
 				session.add(futures)
-				session.commit()
+				self.session_manager.commit(session)
 				self.logger.info("Record " + security_info['ticker'] + " added successfully")
 		except FuturesAlreadyExistError:
 			#-- avoid FuturesAlreadyExistError being captured by Exception
@@ -46,26 +68,45 @@ class FuturesServices:
 			self.logger.error(e)
 			raise
 		finally:
-			session.close()
+			self.session_manager.close(session)
+
+	#-- insert or update a list of validated records with one statement per
+	#-- chunk, one transaction per chunk. records identical to the stored
+	#-- rows are skipped, return the number of records written
+	def upsert_many(self, security_infos, chunk_size):
+		try:
+			session = self.session_manager.get_session()
+			written = 0
+			for chunk in chunked(security_infos, chunk_size):
+				records = self.content_hasher.find_changed(session, chunk)[0]
+				if len(records) > 0:
+					upsert(session, Futures.__table__, records, ["ticker"])
+				self.session_manager.commit(session)
+				self.content_hasher.add_written(len(records))
+				written += len(records)
+			self.logger.info(str(written) + " records upserted successfully, " + \
+								str(len(security_infos) - written) + " unchanged records skipped")
+			return written
+		except Exception as e:
+			self.logger.error("Failed to upsert Futures")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
 
 	def update(self, security_info):
 		try:
-			session = sessionmaker(bind=self.db)()
-			futures_to_update = session.query(Futures) \
-								.filter_by(ticker=security_info['ticker']) \
-								.first()
-			#-- throw error if security_base not exists
-			if not bool(futures_to_update):
+			session = self.session_manager.get_session()
+			#-- skipped if identical to the stored row
+			#-- throw error if the record not exists
+			if not self.content_hasher.update(session, security_info):
 				message = "Record with ticker: " + \
 							security_info['ticker'] + \
 							" not found"
 				self.logger.warn(message)
 				raise FuturesNotExistError(message)
-			#-- update Futures
-			for key, value in security_info.items():
-				setattr(futures_to_update, key, value)
-			session.commit()
-			self.logger.info("Record " +  futures_to_update.ticker + " updated successfully")
+			self.session_manager.commit(session)
+			self.logger.info("Record " +  security_info['ticker'] + " updated successfully")
 		except FuturesNotExistError:
 			#-- avoid FuturesNotExistError being captured by Exception
 			raise
@@ -74,40 +115,67 @@ class FuturesServices:
 			self.logger.error(e)
 			raise
 		finally:
-			session.close()
+			self.session_manager.close(session)
 
 	def query(self, params):
 		try:
-			session = sessionmaker(bind=self.db)()
-			futures = session.query(
-					Futures.ticker.label("ticker"), \
-					Futures.underlying_id.label("underlying_id"), \
-					Futures.contract_size.label("contract_size"), \
-					Futures.value_of_1pt.label("value_of_1pt"), \
-					Futures.timestamp.label("timestamp")) \
-				.filter(Futures.ticker == params['ticker']) \
-				.order_by(Futures.created_at)
-			#self.logger.debug("Print the generated SQL:")
-			#self.logger.debug(transaction_histories)
-			#-- return as list of dictionary
-			def model2dict(row):
-				d = {}
-				for column in row.keys():
-					#if column == "timestamp":
-					#	d[column] = str(getattr(row, column))[0:10]
-					if column == "contract_size" or \
-							column == "value_of_1pt":
-						d[column] = float(getattr(row, column))
-					else:
-						d[column] = str(getattr(row, column))
-				return d
-			futures_d = [model2dict(t) for t in futures]
-			#self.logger.error("Print the list of dictionary output:")
-			#self.logger.debug(transaction_histories_d)
+			session = self.session_manager.get_session()
+			futures_d = self.row_reader.read(session, self.query_statement, params)
 			return futures_d
 		except Exception as e:
 			self.logger.error("Error message:")
 			self.logger.error(e)
 			raise
 		finally:
-			session.close()
\ No newline at end of file
+			self.session_manager.close(session)
+
+	#-- return the ticker of all records, used to build the lookup structures
+	def query_keys(self):
+		try:
+			session = self.session_manager.get_session()
+			keys = [row[0] for row in iter_rows_by_id(session, Futures.__table__, [Futures.ticker])]
+			return keys
+		except Exception as e:
+			self.logger.error("Failed to query keys of Futures")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	#-- stream all records in the order of id, used to build the snapshots
+	def iter_all(self):
+		try:
+			session = self.session_manager.get_session()
+			for futures in self.row_reader.iter_read(session):
+				yield futures
+		except Exception as e:
+			self.logger.error("Failed to query all records of Futures")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	#-- one page of the records changed after watermark in the order of
+	#-- (updated_at, id)
+	def read_changes(self, watermark, limit, lag):
+		try:
+			session = self.session_manager.get_session()
+			changes = self.change_reader.read_page(session, watermark, limit, lag)
+			return changes
+		except Exception as e:
+			self.logger.error("Failed to query changes of Futures")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	def read_high_water_mark(self, lag):
+		try:
+			session = self.session_manager.get_session()
+			return self.change_reader.read_high_water_mark(session, lag)
+		except Exception as e:
+			self.logger.error("Failed to query high water mark of Futures")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
\ No newline at end of file
@@ -1,35 +1,67 @@
 # coding=utf-8
 # 
 import logging
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import bindparam
+from sqlalchemy.exc import IntegrityError
+from security_data.utils.batch import chunked
+from security_data.utils.change_reader import ChangeReader
+from security_data.utils.content_hash import ContentHasher
+from security_data.utils.row_reader import RowReader, to_date_string, iter_rows_by_id
+from security_data.utils.upsert import upsert, insert_ignore
 from security_data.constants import Constants
 from security_data.utils.error_handling import (FxForwardAlreadyExistError,
 											FxForwardNotExistError,
 											OtcCounterPartyAlreadyExistError)
 from security_data.models.fx_forward import FxForward
+from security_data.models.otc_counter_party import OtcCounterParty
 
 class FxForwardServices:
 
-	def __init__(self, db, otc_counter_party_services):
+	#-- columns returned by query, numeric columns are returned as float
+	#-- and date columns as yyyy-mm-dd
+	row_reader = RowReader(FxForward.__table__, [
+		"factset_id",
+		"geneva_fx_forward_name",
+		"geneva_counter_party",
+		"starting_date",
+		"maturity_date",
+		"base_currency",
+		"base_currency_quantity",
+		"term_currency",
+		"term_currency_quantity",
+		"forward_rate"
+	], converters={
+		"starting_date" : to_date_string,
+		"maturity_date" : to_date_string
+	})
+	query_statement = row_reader.select(FxForward.factset_id == bindparam("factset_id"), \
+			order_by=FxForward.created_at)
+	#-- rows changed after a watermark, with id and updated_at
+	change_reader = ChangeReader(row_reader)
+
+	def __init__(self, session_manager, otc_counter_party_services):
 		self.logger = logging.getLogger(__name__)
-		self.db = db
+		self.session_manager = session_manager
+		self.db = session_manager.db
+		#-- writes of records identical to the stored rows are skipped
+		self.content_hasher = ContentHasher(self.row_reader, ["factset_id"])
 		self.otc_counter_party_services = otc_counter_party_services
 
 	def delete_all(self):
 		try:
-			session = sessionmaker(bind=self.db)()
+			session = self.session_manager.get_session()
 			session.query(FxForward).delete()
-			session.commit()
+			self.session_manager.commit(session)
 		except Exception as e:
 			self.logger.error("Failed to delete all records in FxForward")
 			self.logger.error(e)
 			raise
 		finally:
-			session.close()
+			self.session_manager.close(session)
 
 	def create(self, security_info):
 		try:
-			session = sessionmaker(bind=self.db)()
+			session = self.session_manager.get_session()
 			has_record = bool(session.query(FxForward).filter_by(factset_id=security_info['factset_id']).first())
 			if has_record:
 				message = "Record " + security_info['factset_id'] + " already exists"
@@ -37,20 +69,26 @@ class FxForwardServices:
 				raise FxForwardAlreadyExistError(message)
 			else:
 				fx_forward = FxForward(**security_info)
+				fx_forward.content_hash = self.content_hasher.get_hash(security_info)
 				session.add(fx_forward)
 				#-- add the otc counter party
+				counter_party_added = False
 				try:
 					otc_counter_party_info = {
 						"geneva_counter_party" : security_info['geneva_counter_party'],
 						"geneva_party_type" : Constants.COUNTER_PARTY_SECURITY_TYPE_FX_FORWARD
 					}
 					otc_counter_party = self.otc_counter_party_services.create(otc_counter_party_info, session)
+					counter_party_added = True
 				except OtcCounterPartyAlreadyExistError:
 					#-- Skip the error in case the OTC Counter Party already exist
 					#-- Other error trigger throwing exception and no commit
 					self.logger.warn("Record (" + security_info['geneva_counter_party'] + "," + \
 						Constants.COUNTER_PARTY_SECURITY_TYPE_FX_FORWARD + ") already exists. Skip adding.")
-				session.commit()
+				self.session_manager.commit(session)
+				#-- outdate the cached list of counter parties after the commit
+				if counter_party_added:
+					self.otc_counter_party_services.bump_version()
 				self.logger.info("Record " + security_info['factset_id'] + " added successfully")
 		except FxForwardAlreadyExistError:
 			#-- avoid FxForwardAlreadyExistError being captured by Exception
@@ -60,26 +98,117 @@ class FxForwardServices:
 			self.logger.error(e)
 			raise
 		finally:
-			session.close()
+			self.session_manager.close(session)
+
+	#-- add a list of validated records, skipping the factset ids already exist
+	#-- or repeated in the list. the distinct counter parties of the list not
+	#-- exist yet are added first with one statement, then the records are
+	#-- inserted with one statement per chunk, one transaction per chunk
+	def create_many(self, security_infos, chunk_size):
+		report = {
+			"inserted" : [],
+			"duplicate" : [],
+			"counter_parties_added" : 0
+		}
+		try:
+			session = self.session_manager.get_session()
+			report["counter_parties_added"] = self.otc_counter_party_services.add_missing(session, \
+					[s['geneva_counter_party'] for s in security_infos], \
+					Constants.COUNTER_PARTY_SECURITY_TYPE_FX_FORWARD)
+			if report["counter_parties_added"] > 0:
+				self.session_manager.commit(session)
+				self.otc_counter_party_services.bump_version()
+			seen = set()
+			for chunk in chunked(security_infos, chunk_size):
+				records = []
+				for security_info in chunk:
+					if security_info['factset_id'] in seen:
+						report["duplicate"].append(security_info['factset_id'])
+					else:
+						seen.add(security_info['factset_id'])
+						records.append(security_info)
+				#-- retry once in case the factset_id is added by others in between
+				for attempt in range(2):
+					existing = self._query_existing_keys(session, [r['factset_id'] for r in records])
+					new_records = [r for r in records if r['factset_id'] not in existing]
+					try:
+						if len(new_records) > 0:
+							session.execute(FxForward.__table__.insert(), [dict(r, content_hash=self.content_hasher.get_hash(r)) \
+									for r in new_records])
+						self.session_manager.commit(session)
+						break
+					except IntegrityError:
+						#-- a rollback inside transaction() would discard the
+						#-- other writes of the transaction, so no retry
+						if attempt == 1 or self.session_manager.in_transaction():
+							raise
+						session.rollback()
+				report["duplicate"].extend(r['factset_id'] for r in records if r['factset_id'] in existing)
+				report["inserted"].extend(r['factset_id'] for r in new_records)
+			self.logger.info(str(len(report["inserted"])) + " records added successfully, " + \
+								str(len(report["duplicate"])) + " duplicated records skipped")
+			return report
+		except Exception as e:
+			self.logger.error("Failed to add list of FxForward")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	def _query_existing_keys(self, session, factset_ids):
+		if len(factset_ids) == 0:
+			return set()
+		rows = session.query(FxForward.factset_id) \
+					.filter(FxForward.factset_id.in_(factset_ids))
+		return set(row.factset_id for row in rows)
+
+	#-- insert or update a list of validated records with one statement per
+	#-- chunk, one transaction per chunk. the counter parties not exist yet
+	#-- are added in the same transaction. records identical to the stored
+	#-- rows are skipped, return the number of records written
+	def upsert_many(self, security_infos, chunk_size):
+		try:
+			session = self.session_manager.get_session()
+			written = 0
+			for chunk in chunked(security_infos, chunk_size):
+				records = self.content_hasher.find_changed(session, chunk)[0]
+				counter_party_added = 0
+				if len(records) > 0:
+					otc_counter_party_infos = [{
+							"geneva_counter_party" : geneva_counter_party,
+							"geneva_party_type" : Constants.COUNTER_PARTY_SECURITY_TYPE_FX_FORWARD
+						} for geneva_counter_party in dict.fromkeys(s['geneva_counter_party'] for s in records)]
+					counter_party_added = insert_ignore(session, OtcCounterParty.__table__, \
+							otc_counter_party_infos, ["geneva_counter_party", "geneva_party_type"])
+					upsert(session, FxForward.__table__, records, ["factset_id"])
+				self.session_manager.commit(session)
+				self.content_hasher.add_written(len(records))
+				written += len(records)
+				if counter_party_added > 0:
+					self.otc_counter_party_services.bump_version()
+			self.logger.info(str(written) + " records upserted successfully, " + \
+								str(len(security_infos) - written) + " unchanged records skipped")
+			return written
+		except Exception as e:
+			self.logger.error("Failed to upsert FxForward")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
 
 	def update(self, security_info):
 		try:
-			session = sessionmaker(bind=self.db)()
-			fx_forward_to_update = session.query(FxForward) \
-								.filter_by(factset_id=security_info['factset_id']) \
-								.first()
-			#-- throw error if security_base not exists
-			if not bool(fx_forward_to_update):
+			session = self.session_manager.get_session()
+			#-- skipped if identical to the stored row
+			#-- throw error if the record not exists
+			if not self.content_hasher.update(session, security_info):
 				message = "Record with factset_id: " + \
 							security_info['factset_id'] + \
 							" not found"
 				self.logger.warn(message)
 				raise FxForwardNotExistError(message)
-			#-- update FxForward
-			for key, value in security_info.items():
-				setattr(fx_forward_to_update, key, value)
-			session.commit()
-			self.logger.info("Record " +  fx_forward_to_update.factset_id + " updated successfully")
+			self.session_manager.commit(session)
+			self.logger.info("Record " +  security_info['factset_id'] + " updated successfully")
 		except FxForwardNotExistError:
 			#-- avoid FxForwardNotExistError being captured by Exception
 			raise
@@ -88,47 +217,67 @@ class FxForwardServices:
 			self.logger.error(e)
 			raise
 		finally:
-			session.close()
+			self.session_manager.close(session)
 
 	def query(self, params):
 		try:
-			session = sessionmaker(bind=self.db)()
-			fx_forward = session.query(
-					FxForward.factset_id.label("factset_id"), \
-					FxForward.geneva_fx_forward_name.label("geneva_fx_forward_name"), \
-					FxForward.geneva_counter_party.label("geneva_counter_party"), \
-					FxForward.starting_date.label("starting_date"), \
-					FxForward.maturity_date.label("maturity_date"), \
-					FxForward.base_currency.label("base_currency"), \
-					FxForward.base_currency_quantity.label("base_currency_quantity"), \
-					FxForward.term_currency.label("term_currency"), \
-					FxForward.term_currency_quantity.label("term_currency_quantity"), \
-					FxForward.forward_rate.label("forward_rate")) \
-				.filter(FxForward.factset_id == params['factset_id']) \
-				.order_by(FxForward.created_at)
-			#self.logger.debug("Print the generated SQL:")
-			#self.logger.debug(transaction_histories)
-			#-- return as list of dictionary
-			def model2dict(row):
-				d = {}
-				for column in row.keys():
-					if column == "starting_date" or \
-							column == "maturity_date":
-						d[column] = str(getattr(row, column))[0:10]
-					elif column == "base_currency_quantity" or \
-							column == "term_currency_quantity" or \
-							column == "forward_rate":
-						d[column] = float(getattr(row, column))
-					else:
-						d[column] = str(getattr(row, column))
-				return d
-			fx_forward_d = [model2dict(t) for t in fx_forward]
-			#self.logger.error("Print the list of dictionary output:")
-			#self.logger.debug(transaction_histories_d)
+			session = self.session_manager.get_session()
+			fx_forward_d = self.row_reader.read(session, self.query_statement, params)
 			return fx_forward_d
 		except Exception as e:
 			self.logger.error("Error message:")
 			self.logger.error(e)
 			raise
 		finally:
-			session.close()
\ No newline at end of file
+			self.session_manager.close(session)
+
+	#-- return the factset_id of all records, used to build the lookup structures
+	def query_keys(self):
+		try:
+			session = self.session_manager.get_session()
+			keys = [row[0] for row in iter_rows_by_id(session, FxForward.__table__, [FxForward.factset_id])]
+			return keys
+		except Exception as e:
+			self.logger.error("Failed to query keys of FxForward")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	#-- stream all records in the order of id, used to build the snapshots
+	def iter_all(self):
+		try:
+			session = self.session_manager.get_session()
+			for fx_forward in self.row_reader.iter_read(session):
+				yield fx_forward
+		except Exception as e:
+			self.logger.error("Failed to query all records of FxForward")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	#-- one page of the records changed after watermark in the order of
+	#-- (updated_at, id)
+	def read_changes(self, watermark, limit, lag):
+		try:
+			session = self.session_manager.get_session()
+			changes = self.change_reader.read_page(session, watermark, limit, lag)
+			return changes
+		except Exception as e:
+			self.logger.error("Failed to query changes of FxForward")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	def read_high_water_mark(self, lag):
+		try:
+			session = self.session_manager.get_session()
+			return self.change_reader.read_high_water_mark(session, lag)
+		except Exception as e:
+			self.logger.error("Failed to query high water mark of FxForward")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
\ No newline at end of file
@@ -1,28 +1,64 @@
 # coding=utf-8
 # 
 import logging
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import and_, bindparam
+from security_data.utils.batch import chunked
+from security_data.utils.change_reader import ChangeReader
+from security_data.utils.content_hash import ContentHasher
+from security_data.utils.row_reader import RowReader
+from security_data.utils.upsert import upsert, insert_ignore
+from security_data.utils.cache import VersionedSnapshot
 from security_data.utils.error_handling import (OtcCounterPartyAlreadyExistError,
 											OtcCounterPartyNotExistError)
 from security_data.models.otc_counter_party import OtcCounterParty
 
 class OtcCounterPartyServices:
 
-	def __init__(self, db):
+	#-- columns returned by query
+	row_reader = RowReader(OtcCounterParty.__table__, [
+		"geneva_counter_party",
+		"geneva_party_type",
+		"geneva_party_name",
+		"bloomberg_ticker"
+	])
+	query_statement = row_reader.select(order_by=OtcCounterParty.created_at)
+	#-- rows changed after a watermark, with id and updated_at
+	change_reader = ChangeReader(row_reader)
+	#-- pages of the records after an id in the order of id, with the id to
+	#-- continue from. served by the primary key and the index on
+	#-- (geneva_party_type, id)
+	page_reader = RowReader(OtcCounterParty.__table__, row_reader.column_names + ["id"], {"id" : int})
+	page_statement = page_reader.select(OtcCounterParty.id > bindparam("after"), \
+			order_by=OtcCounterParty.id).limit(bindparam("limit"))
+	page_by_type_statement = page_reader.select(and_( \
+			OtcCounterParty.geneva_party_type == bindparam("geneva_party_type"), \
+			OtcCounterParty.id > bindparam("after")), \
+			order_by=OtcCounterParty.id).limit(bindparam("limit"))
+
+	def __init__(self, session_manager):
 		self.logger = logging.getLogger(__name__)
-		self.db = db
+		self.session_manager = session_manager
+		self.db = session_manager.db
+		#-- writes of records identical to the stored rows are skipped
+		self.content_hasher = ContentHasher(self.row_reader, ["geneva_counter_party", "geneva_party_type"])
+		#-- snapshot of the query result, outdated by every write of this process
+		self.snapshot = VersionedSnapshot()
+
+	def bump_version(self):
+		self.snapshot.bump()
 
 	def delete_all(self):
 		try:
-			session = sessionmaker(bind=self.db)()
+			session = self.session_manager.get_session()
 			session.query(OtcCounterParty).delete()
-			session.commit()
+			self.session_manager.commit(session)
+			self.bump_version()
 		except Exception as e:
 			self.logger.error("Failed to delete all records in OtcCounterParty")
 			self.logger.error(e)
 			raise
 		finally:
-			session.close()
+			self.session_manager.close(session)
 
 	#-- the session argument is used if the service is called by
 	#-- other service and want to work under same DB session for commit and rollback
@@ -30,7 +66,7 @@ class OtcCounterPartyServices:
 		try:
 			close_session = False
 			if session is None:
-				session = sessionmaker(bind=self.db)()
+				session = self.session_manager.get_session()
 				close_session = True
 			has_record = bool(session.query(OtcCounterParty).filter_by( \
 					geneva_counter_party=counter_party_info['geneva_counter_party'], \
@@ -43,8 +79,10 @@ class OtcCounterPartyServices:
 				raise OtcCounterPartyAlreadyExistError(message)
 			else:
 				otc_counter_party = OtcCounterParty(**counter_party_info)
+				otc_counter_party.content_hash = self.content_hasher.get_hash(counter_party_info)
 				session.add(otc_counter_party)
-				session.commit()
+				self.session_manager.commit(session)
+				self.bump_version()
 				self.logger.info("Record (" + counter_party_info['geneva_counter_party'] + "," + \
 						counter_party_info['geneva_party_type'] + ") added successfully")
 		except OtcCounterPartyAlreadyExistError:
@@ -57,24 +95,68 @@ class OtcCounterPartyServices:
 		finally:
 			#-- only close session if the session_in 
 			if close_session:
-				session.close()
+				self.session_manager.close(session)
+
+	#-- add the counter parties of geneva_party_type not exist yet in the session
+	#-- of the caller, with one query and one insert statement. the caller
+	#-- commits and calls bump_version. return the number of counter parties
+	#-- added
+	def add_missing(self, session, geneva_counter_parties, geneva_party_type):
+		geneva_counter_parties = list(dict.fromkeys(geneva_counter_parties))
+		if len(geneva_counter_parties) == 0:
+			return 0
+		rows = session.query(OtcCounterParty.geneva_counter_party) \
+					.filter(OtcCounterParty.geneva_party_type == geneva_party_type) \
+					.filter(OtcCounterParty.geneva_counter_party.in_(geneva_counter_parties))
+		existing = set(row.geneva_counter_party for row in rows)
+		otc_counter_party_infos = [{
+				"geneva_counter_party" : geneva_counter_party,
+				"geneva_party_type" : geneva_party_type
+			} for geneva_counter_party in geneva_counter_parties if geneva_counter_party not in existing]
+		if len(otc_counter_party_infos) == 0:
+			return 0
+		#-- insert ignore in case the counter party is added by others in between
+		return insert_ignore(session, OtcCounterParty.__table__, \
+				otc_counter_party_infos, ["geneva_counter_party", "geneva_party_type"])
+
+	#-- insert or update a list of validated records with one statement per
+	#-- chunk, one transaction per chunk. records identical to the stored
+	#-- rows are skipped, return the number of records written
+	def upsert_many(self, counter_party_infos, chunk_size):
+		try:
+			session = self.session_manager.get_session()
+			written = 0
+			for chunk in chunked(counter_party_infos, chunk_size):
+				records = self.content_hasher.find_changed(session, chunk)[0]
+				if len(records) > 0:
+					upsert(session, OtcCounterParty.__table__, records, ["geneva_counter_party", "geneva_party_type"])
+				self.session_manager.commit(session)
+				self.content_hasher.add_written(len(records))
+				written += len(records)
+				if len(records) > 0:
+					self.bump_version()
+			self.logger.info(str(written) + " records upserted successfully, " + \
+								str(len(counter_party_infos) - written) + " unchanged records skipped")
+			return written
+		except Exception as e:
+			self.logger.error("Failed to upsert OtcCounterParty")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
 
 	def update(self, counter_party_info):
 		try:
-			session = sessionmaker(bind=self.db)()
-			otc_counter_party_to_update = session.query(OtcCounterParty).filter_by( \
-					geneva_counter_party=counter_party_info['geneva_counter_party'], \
-					geneva_party_type=counter_party_info['geneva_party_type']).first()
-			#-- throw error if security_base not exists
-			if not bool(otc_counter_party_to_update):
+			session = self.session_manager.get_session()
+			#-- skipped if identical to the stored row
+			#-- throw error if the record not exists
+			if not self.content_hasher.update(session, counter_party_info):
 				message = "Record (" + counter_party_info['geneva_counter_party'] + "," + \
 						counter_party_info['geneva_party_type'] + ") not found"
 				self.logger.warn(message)
 				raise OtcCounterPartyNotExistError(message)
-			#-- update OtcCounterParty
-			for key, value in counter_party_info.items():
-				setattr(otc_counter_party_to_update, key, value)
-			session.commit()
+			self.session_manager.commit(session)
+			self.bump_version()
 			self.logger.info("Record (" + counter_party_info['geneva_counter_party'] + "," + \
 						counter_party_info['geneva_party_type'] + ") updated successfully")
 		except OtcCounterPartyNotExistError:
@@ -85,34 +167,84 @@ class OtcCounterPartyServices:
 			self.logger.error(e)
 			raise
 		finally:
-			session.close()
+			self.session_manager.close(session)
 
 	def query(self):
+		#-- serve the snapshot until the data is changed, return copies so
+		#-- that the caller cannot modify the snapshot
+		otc_counter_party_d = self.snapshot.get()
+		if otc_counter_party_d is not None:
+			return [dict(d) for d in otc_counter_party_d]
+		version = self.snapshot.version
 		try:
-			session = sessionmaker(bind=self.db)()
-			otc_counter_party = session.query(
-					OtcCounterParty.geneva_counter_party.label("geneva_counter_party"), \
-					OtcCounterParty.geneva_party_type.label("geneva_party_type"), \
-					OtcCounterParty.geneva_party_name.label("geneva_party_name"), \
-					OtcCounterParty.bloomberg_ticker.label("bloomberg_ticker")) \
-				.order_by(OtcCounterParty.created_at)
-			#self.logger.debug("Print the generated SQL:")
-			#self.logger.debug(transaction_histories)
-			#-- return as list of dictionary
-			def model2dict(row):
-				d = {}
-				for column in row.keys():
-					#if column == "timestamp":
-					#	d[column] = str(getattr(row, column))[0:10]
-					d[column] = str(getattr(row, column))
-				return d
-			otc_counter_party_d = [model2dict(t) for t in otc_counter_party]
-			#self.logger.error("Print the list of dictionary output:")
-			#self.logger.debug(transaction_histories_d)
-			return otc_counter_party_d
+			session = self.session_manager.get_session()
+			otc_counter_party_d = self.row_reader.read(session, self.query_statement)
+			self.snapshot.put(version, otc_counter_party_d)
+			return [dict(d) for d in otc_counter_party_d]
 		except Exception as e:
 			self.logger.error("Error message:")
 			self.logger.error(e)
 			raise
 		finally:
-			session.close()
\ No newline at end of file
+			self.session_manager.close(session)
+
+	#-- at most limit records with id greater than after, of geneva_party_type
+	#-- if it is not None
+	def query_page(self, geneva_party_type, after, limit):
+		try:
+			session = self.session_manager.get_session()
+			params = {
+				"after" : 0 if after is None else after,
+				"limit" : limit
+			}
+			if geneva_party_type is None:
+				statement = self.page_statement
+			else:
+				statement = self.page_by_type_statement
+				params["geneva_party_type"] = geneva_party_type
+			otc_counter_party_d = self.page_reader.read(session, statement, params)
+			return otc_counter_party_d
+		except Exception as e:
+			self.logger.error("Failed to query a page of OtcCounterParty")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	#-- stream all records in the order of id, used by the export
+	def iter_all(self):
+		try:
+			session = self.session_manager.get_session()
+			for otc_counter_party in self.row_reader.iter_read(session):
+				yield otc_counter_party
+		except Exception as e:
+			self.logger.error("Failed to query all records of OtcCounterParty")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	#-- one page of the records changed after watermark in the order of
+	#-- (updated_at, id)
+	def read_changes(self, watermark, limit, lag):
+		try:
+			session = self.session_manager.get_session()
+			changes = self.change_reader.read_page(session, watermark, limit, lag)
+			return changes
+		except Exception as e:
+			self.logger.error("Failed to query changes of OtcCounterParty")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	def read_high_water_mark(self, lag):
+		try:
+			session = self.session_manager.get_session()
+			return self.change_reader.read_high_water_mark(session, lag)
+		except Exception as e:
+			self.logger.error("Failed to query high water mark of OtcCounterParty")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
\ No newline at end of file
@@ -2,31 +2,102 @@
 # 
 import logging
 from security_data.models.security_attribute import SecurityAttribute
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import and_, bindparam, Numeric
+from security_data.utils.batch import chunked
+from security_data.utils.cache import LruCache
+from security_data.utils.change_reader import ChangeReader
+from security_data.utils.content_hash import ContentHasher
+from security_data.utils.row_reader import RowReader, iter_rows_by_id
+from security_data.utils.upsert import upsert
 from security_data.utils.error_handling import (SecurityAttributeAlreadyExistError,
 											SecurityAttributeNotExistError)
 
 class SecurityAttributeServices:
 
-	def __init__(self, db):
+	#-- max number of keys in one IN (...) clause
+	QUERY_CHUNK_SIZE = 1000
+	#-- max number of projections kept, the least recently used is dropped
+	PROJECTION_CACHE_SIZE = 64
+
+	#-- numeric columns, an empty value in a file is loaded as NULL
+	numeric_columns = [column.name for column in SecurityAttribute.__table__.columns \
+						if isinstance(column.type, Numeric)]
+
+	#-- columns returned by query, numeric columns are returned as float
+	row_reader = RowReader(SecurityAttribute.__table__, [
+		"security_id_type",
+		"security_id",
+		"gics_sector",
+		"gics_industry_group",
+		"industry_sector",
+		"industry_group",
+		"bics_sector_level_1",
+		"bics_industry_group_level_2",
+		"bics_industry_name_level_3",
+		"bics_sub_industry_name_level_4",
+		"parent_symbol",
+		"parent_symbol_chinese_name",
+		"parent_symbol_industry_group",
+		"cast_parent_company_name",
+		"country_of_risk",
+		"country_of_issuance",
+		"sfc_region",
+		"s_p_issuer_rating",
+		"moody_s_issuer_rating",
+		"fitch_s_issuer_rating",
+		"bond_or_equity_ticker",
+		"s_p_rating",
+		"moody_s_rating",
+		"fitch_rating",
+		"payment_rank",
+		"payment_rank_mbs",
+		"bond_classification",
+		"local_government_lgfv",
+		"first_year_default_probability",
+		"contingent_capital",
+		"co_co_bond_trigger",
+		"capit_type_conti_conv_tri_lvl",
+		"tier_1_common_equity_ratio",
+		"bail_in_capital_indicator",
+		"tlac_mrel_designation",
+		"classif_on_chi_state_owned_enterp",
+		"private_placement_indicator",
+		"trading_volume_90_days"
+	])
+	query_whereclause = and_(SecurityAttribute.security_id_type == bindparam("security_id_type"), \
+			SecurityAttribute.security_id == bindparam("security_id"))
+	query_statement = row_reader.select(query_whereclause, order_by=SecurityAttribute.created_at)
+	query_many_statement = row_reader.select( \
+			and_(SecurityAttribute.security_id_type == bindparam("security_id_type"), \
+				SecurityAttribute.security_id.in_(bindparam("security_ids", expanding=True))))
+	#-- rows changed after a watermark, with id and updated_at
+	change_reader = ChangeReader(row_reader)
+	#-- sorted tuple of column names => (row_reader, query_statement) of the
+	#-- projection, so that the same columns in any order share one statement
+	projections = LruCache(PROJECTION_CACHE_SIZE)
+
+	def __init__(self, session_manager):
 		self.logger = logging.getLogger(__name__)
-		self.db = db
+		self.session_manager = session_manager
+		self.db = session_manager.db
+		#-- writes of records identical to the stored rows are skipped
+		self.content_hasher = ContentHasher(self.row_reader, ["security_id_type", "security_id"])
 
 	def delete_all(self):
 		try:
-			session = sessionmaker(bind=self.db)()
+			session = self.session_manager.get_session()
 			session.query(SecurityAttribute).delete()
-			session.commit()
+			self.session_manager.commit(session)
 		except Exception as e:
 			self.logger.error("Failed to delete all records in SecurityAttribute")
 			self.logger.error(e)
 			raise
 		finally:
-			session.close()
+			self.session_manager.close(session)
 
 	def create(self, security_attribute_info):
 		try:
-			session = sessionmaker(bind=self.db)()
+			session = self.session_manager.get_session()
 			has_record = bool(session.query(SecurityAttribute).filter_by(\
 					security_id_type=security_attribute_info['security_id_type'], \
 					security_id=security_attribute_info['security_id']).first()
@@ -38,8 +109,9 @@ class SecurityAttributeServices:
 				raise SecurityAttributeAlreadyExistError(message)
 			else:
 				security_attribute = SecurityAttribute(**security_attribute_info)
+				security_attribute.content_hash = self.content_hasher.get_hash(security_attribute_info)
 				session.add(security_attribute)
-				session.commit()
+				self.session_manager.commit(session)
 				self.logger.info("Record (" + security_attribute_info['security_id_type'] + "," + \
 						security_attribute_info['security_id'] + ") added successfully")
 		except SecurityAttributeAlreadyExistError:
@@ -50,24 +122,43 @@ class SecurityAttributeServices:
 			self.logger.error(e)
 			raise
 		finally:
-			session.close()
+			self.session_manager.close(session)
+
+	#-- insert or update a list of validated records with one statement per
+	#-- chunk, one transaction per chunk. records identical to the stored
+	#-- rows are skipped, return the number of records written
+	def upsert_many(self, security_attribute_infos, chunk_size):
+		try:
+			session = self.session_manager.get_session()
+			written = 0
+			for chunk in chunked(security_attribute_infos, chunk_size):
+				records = self.content_hasher.find_changed(session, chunk)[0]
+				if len(records) > 0:
+					upsert(session, SecurityAttribute.__table__, records, ["security_id_type", "security_id"])
+				self.session_manager.commit(session)
+				self.content_hasher.add_written(len(records))
+				written += len(records)
+			self.logger.info(str(written) + " records upserted successfully, " + \
+								str(len(security_attribute_infos) - written) + " unchanged records skipped")
+			return written
+		except Exception as e:
+			self.logger.error("Failed to upsert SecurityAttribute")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
 
 	def update(self, security_attribute_info):
 		try:
-			session = sessionmaker(bind=self.db)()
-			security_attribute_to_update = session.query(SecurityAttribute).filter_by( \
-					security_id_type=security_attribute_info['security_id_type'], \
-					security_id=security_attribute_info['security_id']).first()
-			#-- throw error if security_base not exists
-			if not bool(security_attribute_to_update):
+			session = self.session_manager.get_session()
+			#-- skipped if identical to the stored row
+			#-- throw error if the record not exists
+			if not self.content_hasher.update(session, security_attribute_info):
 				message = "Record (" + security_attribute_info['security_id_type'] + "," + \
 						security_attribute_info['security_id'] + ") not found"
 				self.logger.warn(message)
 				raise SecurityAttributeNotExistError(message)
-			#-- update transaction by updating the status to cancel
-			for key, value in security_attribute_info.items():
-				setattr(security_attribute_to_update, key, value)
-			session.commit()
+			self.session_manager.commit(session)
 			self.logger.info("Record (" + security_attribute_info['security_id_type'] + "," + \
 						security_attribute_info['security_id'] + ") updated successfully")
 		except SecurityAttributeNotExistError:
@@ -78,71 +169,115 @@ class SecurityAttributeServices:
 			self.logger.error(e)
 			raise
 		finally:
-			session.close()
+			self.session_manager.close(session)
 
-	def query(self, params):
+	#-- reader and statement selecting only the given columns, built once
+	#-- per set of columns. the columns are returned in the sorted order
+	def _get_projection(self, fields):
+		key = tuple(sorted(set(fields)))
+		generation = self.projections.generation
+		projection = self.projections.get(key)
+		if projection is None:
+			row_reader = self.row_reader.project(key)
+			projection = (row_reader, \
+				row_reader.select(self.query_whereclause, order_by=SecurityAttribute.created_at))
+			self.projections.put(key, projection, generation)
+		return projection
+
+	#-- query a list of (security_id_type, security_id) in one session. the
+	#-- security_id are grouped by security_id_type and queried with chunked
+	#-- IN (...) queries on the unique key
+	def query_many(self, pairs):
 		try:
-			session = sessionmaker(bind=self.db)()
-			security_attributes = session.query(
-					SecurityAttribute.security_id_type.label("security_id_type"), \
-					SecurityAttribute.security_id.label("security_id"), \
-					SecurityAttribute.gics_sector.label("gics_sector"), \
-					SecurityAttribute.gics_industry_group.label("gics_industry_group"), \
-					SecurityAttribute.industry_sector.label("industry_sector"), \
-					SecurityAttribute.industry_group.label("industry_group"), \
-					SecurityAttribute.bics_sector_level_1.label("bics_sector_level_1"), \
-					SecurityAttribute.bics_industry_group_level_2.label("bics_industry_group_level_2"), \
-					SecurityAttribute.bics_industry_name_level_3.label("bics_industry_name_level_3"), \
-					SecurityAttribute.bics_sub_industry_name_level_4.label("bics_sub_industry_name_level_4"), \
-					SecurityAttribute.parent_symbol.label("parent_symbol"), \
-					SecurityAttribute.parent_symbol_chinese_name.label("parent_symbol_chinese_name"), \
-					SecurityAttribute.parent_symbol_industry_group.label("parent_symbol_industry_group"), \
-					SecurityAttribute.cast_parent_company_name.label("cast_parent_company_name"), \
-					SecurityAttribute.country_of_risk.label("country_of_risk"), \
-					SecurityAttribute.country_of_issuance.label("country_of_issuance"), \
-					SecurityAttribute.sfc_region.label("sfc_region"), \
-					SecurityAttribute.s_p_issuer_rating.label("s_p_issuer_rating"), \
-					SecurityAttribute.moody_s_issuer_rating.label("moody_s_issuer_rating"), \
-					SecurityAttribute.fitch_s_issuer_rating.label("fitch_s_issuer_rating"), \
-					SecurityAttribute.bond_or_equity_ticker.label("bond_or_equity_ticker"), \
-					SecurityAttribute.s_p_rating.label("s_p_rating"), \
-					SecurityAttribute.moody_s_rating.label("moody_s_rating"), \
-					SecurityAttribute.fitch_rating.label("fitch_rating"), \
-					SecurityAttribute.payment_rank.label("payment_rank"), \
-					SecurityAttribute.payment_rank_mbs.label("payment_rank_mbs"), \
-					SecurityAttribute.bond_classification.label("bond_classification"), \
-					SecurityAttribute.local_government_lgfv.label("local_government_lgfv"), \
-					SecurityAttribute.first_year_default_probability.label("first_year_default_probability"), \
-					SecurityAttribute.contingent_capital.label("contingent_capital"), \
-					SecurityAttribute.co_co_bond_trigger.label("co_co_bond_trigger"), \
-					SecurityAttribute.capit_type_conti_conv_tri_lvl.label("capit_type_conti_conv_tri_lvl"), \
-					SecurityAttribute.tier_1_common_equity_ratio.label("tier_1_common_equity_ratio"), \
-					SecurityAttribute.bail_in_capital_indicator.label("bail_in_capital_indicator"), \
-					SecurityAttribute.tlac_mrel_designation.label("tlac_mrel_designation"), \
-					SecurityAttribute.classif_on_chi_state_owned_enterp.label("classif_on_chi_state_owned_enterp"), \
-					SecurityAttribute.private_placement_indicator.label("private_placement_indicator"), \
-					SecurityAttribute.trading_volume_90_days.label("trading_volume_90_days")) \
-				.filter(SecurityAttribute.security_id_type == params['security_id_type'],
-					SecurityAttribute.security_id == params['security_id']) \
-				.order_by(SecurityAttribute.created_at)
-			#-- return as list of dictionary
-			def model2dict(row):
-				d = {}
-				for column in row.keys():
-					if column == "first_year_default_probability" or \
-							column == "tier_1_common_equity_ratio" or \
-							column == "trading_volume_90_days":
-						d[column] = float(getattr(row, column))
-					else:
-						d[column] = str(getattr(row, column))
-				return d
-			security_attribute_d = [model2dict(t) for t in security_attributes]
-			#self.logger.error("Print the list of dictionary output:")
-			#self.logger.debug(security_attribute_d)
+			session = self.session_manager.get_session()
+			security_ids_by_type = {}
+			for security_id_type, security_id in pairs:
+				security_ids_by_type.setdefault(security_id_type, []).append(security_id)
+			security_attribute_d = []
+			for security_id_type, security_ids in security_ids_by_type.items():
+				for chunk in chunked(security_ids, self.QUERY_CHUNK_SIZE):
+					security_attribute_d.extend(self.row_reader.read(session, self.query_many_statement, {
+						"security_id_type" : security_id_type,
+						"security_ids" : chunk
+					}))
+			return security_attribute_d
+		except Exception as e:
+			self.logger.error("Failed to query list of SecurityAttribute")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	#-- fields is the list of columns to return, all columns if None
+	def query(self, params, fields=None):
+		try:
+			session = self.session_manager.get_session()
+			if fields is None:
+				row_reader, query_statement = self.row_reader, self.query_statement
+			else:
+				row_reader, query_statement = self._get_projection(fields)
+			security_attribute_d = row_reader.read(session, query_statement, params)
+			if fields is not None:
+				#-- columns in the order given
+				security_attribute_d = [{field : row[field] for field in fields} \
+						for row in security_attribute_d]
 			return security_attribute_d
 		except Exception as e:
 			self.logger.error("Error message:")
 			self.logger.error(e)
 			raise
 		finally:
-			session.close()
\ No newline at end of file
+			self.session_manager.close(session)
+
+	#-- stream the (security_id_type, security_id) of all records, used to
+	#-- build the identifier resolver
+	def iter_keys(self):
+		try:
+			session = self.session_manager.get_session()
+			for row in iter_rows_by_id(session, SecurityAttribute.__table__, \
+					[SecurityAttribute.security_id_type, SecurityAttribute.security_id]):
+				yield (row[0], row[1])
+		except Exception as e:
+			self.logger.error("Failed to query keys of SecurityAttribute")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	#-- stream all records in the order of id, used to build the snapshots
+	def iter_all(self):
+		try:
+			session = self.session_manager.get_session()
+			for security_attribute in self.row_reader.iter_read(session):
+				yield security_attribute
+		except Exception as e:
+			self.logger.error("Failed to query all records of SecurityAttribute")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	#-- one page of the records changed after watermark in the order of
+	#-- (updated_at, id)
+	def read_changes(self, watermark, limit, lag):
+		try:
+			session = self.session_manager.get_session()
+			changes = self.change_reader.read_page(session, watermark, limit, lag)
+			return changes
+		except Exception as e:
+			self.logger.error("Failed to query changes of SecurityAttribute")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	def read_high_water_mark(self, lag):
+		try:
+			session = self.session_manager.get_session()
+			return self.change_reader.read_high_water_mark(session, lag)
+		except Exception as e:
+			self.logger.error("Failed to query high water mark of SecurityAttribute")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
\ No newline at end of file
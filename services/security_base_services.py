@@ -2,31 +2,77 @@
 # 
 import logging
 from security_data.models.security_base import SecurityBase
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import bindparam
+from security_data.utils.batch import chunked
+from security_data.utils.change_reader import ChangeReader
+from security_data.utils.content_hash import ContentHasher
+from security_data.utils.row_reader import RowReader, iter_rows_by_id
+from security_data.utils.upsert import upsert
 from security_data.utils.error_handling import (SecurityBaseAlreadyExistError,
 											SecurityBaseNotExistError)
 
 class SecurityBaseServices:
 
-	def __init__(self, db):
+	#-- max number of keys in one IN (...) clause
+	QUERY_CHUNK_SIZE = 1000
+
+	#-- columns returned by query, all columns are returned as string
+	row_reader = RowReader(SecurityBase.__table__, [
+		"geneva_id",
+		"geneva_asset_type",
+		"geneva_investment_type",
+		"ticker",
+		"isin",
+		"bloomberg_id",
+		"sedol",
+		"currency",
+		"is_private",
+		"description",
+		"exchange_name",
+		"timestamp"
+	])
+	query_statement = row_reader.select(SecurityBase.geneva_id == bindparam("geneva_id"), \
+			order_by=SecurityBase.created_at)
+	query_many_statement = row_reader.select( \
+			SecurityBase.geneva_id.in_(bindparam("geneva_ids", expanding=True)))
+	#-- rows changed after a watermark, with id and updated_at
+	change_reader = ChangeReader(row_reader)
+	#-- identifier columns, each is indexed in sql/create.sql
+	ID_TYPES = ["geneva_id", "ticker", "isin", "bloomberg_id", "sedol"]
+	#-- id_type => select by one value and select by a list of values
+	query_by_statements = {}
+	query_by_many_statements = {}
+	for id_type in ID_TYPES:
+		query_by_statements[id_type] = row_reader.select( \
+				SecurityBase.__table__.c[id_type] == bindparam("value"), \
+				order_by=SecurityBase.created_at)
+		query_by_many_statements[id_type] = row_reader.select( \
+				SecurityBase.__table__.c[id_type].in_(bindparam("values", expanding=True)))
+	del id_type
+
+	def __init__(self, session_manager):
 		self.logger = logging.getLogger(__name__)
-		self.db = db
+		self.session_manager = session_manager
+		self.db = session_manager.db
+		#-- writes of records identical to the stored rows are skipped
+		self.content_hasher = ContentHasher(self.row_reader, ["geneva_id"])
 
 	def delete_all(self):
 		try:
-			session = sessionmaker(bind=self.db)()
+			session = self.session_manager.get_session()
 			session.query(SecurityBase).delete()
-			session.commit()
+			self.session_manager.commit(session)
 		except Exception as e:
 			self.logger.error("Failed to delete all records in SecurityBase")
 			self.logger.error(e)
 			raise
 		finally:
-			session.close()
+			self.session_manager.close(session)
 
 	def create(self, security_info):
 		try:
-			session = sessionmaker(bind=self.db)()
+			session = self.session_manager.get_session()
 			has_record = bool(session.query(SecurityBase).filter_by(geneva_id=security_info['geneva_id']).first())
 			if has_record:
 				message = "Record " + security_info['geneva_id'] + " already exists"
@@ -34,8 +80,9 @@ class SecurityBaseServices:
 				raise SecurityBaseAlreadyExistError(message)
 			else:
 				security_base = SecurityBase(**security_info)
+				security_base.content_hash = self.content_hasher.get_hash(security_info)
 				session.add(security_base)
-				session.commit()
+				self.session_manager.commit(session)
 				self.logger.info("Record " + security_info['geneva_id'] + " added successfully")
 		except SecurityBaseAlreadyExistError:
 			#-- avoid SecurityBaseAlreadyExistError being captured by Exception
@@ -45,26 +92,98 @@ class SecurityBaseServices:
 			self.logger.error(e)
 			raise
 		finally:
-			session.close()
+			self.session_manager.close(session)
+
+	#-- insert a list of validated security_info, one transaction per chunk.
+	#-- geneva_id already exists or repeated in the list are reported as duplicate
+	def create_many(self, security_infos, chunk_size):
+		report = {
+			"inserted" : [],
+			"duplicate" : []
+		}
+		try:
+			session = self.session_manager.get_session()
+			seen = set()
+			for chunk in chunked(security_infos, chunk_size):
+				records = []
+				for security_info in chunk:
+					if security_info['geneva_id'] in seen:
+						report["duplicate"].append(security_info['geneva_id'])
+					else:
+						seen.add(security_info['geneva_id'])
+						records.append(security_info)
+				#-- retry once in case the geneva_id is added by others in between
+				for attempt in range(2):
+					existing = self._query_existing_keys(session, [r['geneva_id'] for r in records])
+					new_records = [r for r in records if r['geneva_id'] not in existing]
+					try:
+						if len(new_records) > 0:
+							session.execute(SecurityBase.__table__.insert(), [dict(r, content_hash=self.content_hasher.get_hash(r)) \
+									for r in new_records])
+						self.session_manager.commit(session)
+						break
+					except IntegrityError:
+						#-- a rollback inside transaction() would discard the
+						#-- other writes of the transaction, so no retry
+						if attempt == 1 or self.session_manager.in_transaction():
+							raise
+						session.rollback()
+				report["duplicate"].extend(r['geneva_id'] for r in records if r['geneva_id'] in existing)
+				report["inserted"].extend(r['geneva_id'] for r in new_records)
+			self.logger.info(str(len(report["inserted"])) + " records added successfully, " + \
+								str(len(report["duplicate"])) + " duplicated records skipped")
+			return report
+		except Exception as e:
+			self.logger.error("Failed to add list of SecurityBase")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	def _query_existing_keys(self, session, geneva_ids):
+		if len(geneva_ids) == 0:
+			return set()
+		rows = session.query(SecurityBase.geneva_id) \
+					.filter(SecurityBase.geneva_id.in_(geneva_ids))
+		return set(row.geneva_id for row in rows)
+
+	#-- insert or update a list of validated records with one statement per
+	#-- chunk, one transaction per chunk. records identical to the stored
+	#-- rows are skipped, return the number of records written
+	def upsert_many(self, security_infos, chunk_size):
+		try:
+			session = self.session_manager.get_session()
+			written = 0
+			for chunk in chunked(security_infos, chunk_size):
+				records = self.content_hasher.find_changed(session, chunk)[0]
+				if len(records) > 0:
+					upsert(session, SecurityBase.__table__, records, ["geneva_id"])
+				self.session_manager.commit(session)
+				self.content_hasher.add_written(len(records))
+				written += len(records)
+			self.logger.info(str(written) + " records upserted successfully, " + \
+								str(len(security_infos) - written) + " unchanged records skipped")
+			return written
+		except Exception as e:
+			self.logger.error("Failed to upsert SecurityBase")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
 
 	def update(self, security_info):
 		try:
-			session = sessionmaker(bind=self.db)()
-			security_base_to_update = session.query(SecurityBase) \
-								.filter_by(geneva_id=security_info['geneva_id']) \
-								.first()
-			#-- throw error if security_base not exists
-			if not bool(security_base_to_update):
+			session = self.session_manager.get_session()
+			#-- skipped if identical to the stored row
+			#-- throw error if the record not exists
+			if not self.content_hasher.update(session, security_info):
 				message = "Record with geneva_id: " + \
 							security_info['geneva_id'] + \
 							" not found"
 				self.logger.warn(message)
 				raise SecurityBaseNotExistError(message)
-			#-- update transaction by updating the status to cancel
-			for key, value in security_info.items():
-				setattr(security_base_to_update, key, value)
-			session.commit()
-			self.logger.info("Record " +  security_base_to_update.geneva_id + " updated successfully")
+			self.session_manager.commit(session)
+			self.logger.info("Record " +  security_info['geneva_id'] + " updated successfully")
 		except SecurityBaseNotExistError:
 			#-- avoid SecurityBaseNotExistError being captured by Exception
 			raise
@@ -73,44 +192,132 @@ class SecurityBaseServices:
 			self.logger.error(e)
 			raise
 		finally:
-			session.close()
+			self.session_manager.close(session)
 
 	def query(self, params):
 		try:
-			session = sessionmaker(bind=self.db)()
-			security_bases = session.query(
-					SecurityBase.geneva_id.label("geneva_id"), \
-					SecurityBase.geneva_asset_type.label("geneva_asset_type"), \
-					SecurityBase.geneva_investment_type.label("geneva_investment_type"), \
-					SecurityBase.ticker.label("ticker"), \
-					SecurityBase.isin.label("isin"), \
-					SecurityBase.bloomberg_id.label("bloomberg_id"), \
-					SecurityBase.sedol.label("sedol"), \
-					SecurityBase.currency.label("currency"), \
-					SecurityBase.is_private.label("is_private"), \
-					SecurityBase.description.label("description"), \
-					SecurityBase.exchange_name.label("exchange_name"), \
-					SecurityBase.timestamp.label("timestamp")) \
-				.filter(SecurityBase.geneva_id == params['geneva_id']) \
-				.order_by(SecurityBase.created_at)
-			#self.logger.debug("Print the generated SQL:")
-			#self.logger.debug(transaction_histories)
-			#-- return as list of dictionary
-			def model2dict(row):
-				d = {}
-				for column in row.keys():
-					#if column == "timestamp":
-					#	d[column] = str(getattr(row, column))[0:10]
-					#else:
-					d[column] = str(getattr(row, column))
-				return d
-			security_bases_d = [model2dict(t) for t in security_bases]
-			#self.logger.error("Print the list of dictionary output:")
-			#self.logger.debug(transaction_histories_d)
+			session = self.session_manager.get_session()
+			security_bases_d = self.row_reader.read(session, self.query_statement, params)
 			return security_bases_d
 		except Exception as e:
 			self.logger.error("Error message:")
 			self.logger.error(e)
 			raise
 		finally:
-			session.close()
\ No newline at end of file
+			self.session_manager.close(session)
+
+	#-- query a list of geneva_id with chunked IN (...) queries in one session
+	def query_many(self, geneva_ids):
+		try:
+			session = self.session_manager.get_session()
+			security_bases_d = []
+			for chunk in chunked(geneva_ids, self.QUERY_CHUNK_SIZE):
+				security_bases_d.extend(self.row_reader.read(session, \
+						self.query_many_statement, {"geneva_ids" : chunk}))
+			return security_bases_d
+		except Exception as e:
+			self.logger.error("Failed to query list of SecurityBase")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	#-- query by one of the identifier columns in ID_TYPES, more than one
+	#-- record can have the same identifier other than geneva_id
+	def query_by(self, id_type, value):
+		try:
+			session = self.session_manager.get_session()
+			security_bases_d = self.row_reader.read(session, \
+					self.query_by_statements[id_type], {"value" : value})
+			return security_bases_d
+		except Exception as e:
+			self.logger.error("Failed to query SecurityBase by " + id_type)
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	#-- query a list of values of one identifier column with chunked IN (...)
+	#-- queries in one session
+	def query_by_many(self, id_type, values):
+		try:
+			session = self.session_manager.get_session()
+			security_bases_d = []
+			for chunk in chunked(values, self.QUERY_CHUNK_SIZE):
+				security_bases_d.extend(self.row_reader.read(session, \
+						self.query_by_many_statements[id_type], {"values" : chunk}))
+			return security_bases_d
+		except Exception as e:
+			self.logger.error("Failed to query list of SecurityBase by " + id_type)
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	#-- return the geneva_id of all records, used to build the lookup structures
+	def query_keys(self):
+		try:
+			session = self.session_manager.get_session()
+			keys = [row[0] for row in iter_rows_by_id(session, SecurityBase.__table__, [SecurityBase.geneva_id])]
+			return keys
+		except Exception as e:
+			self.logger.error("Failed to query keys of SecurityBase")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	#-- stream the identifier columns of all records, used to build the
+	#-- identifier resolver
+	def iter_identifiers(self):
+		try:
+			session = self.session_manager.get_session()
+			columns = [SecurityBase.geneva_id, SecurityBase.ticker, \
+					SecurityBase.isin, SecurityBase.bloomberg_id, SecurityBase.sedol]
+			column_names = [column.key for column in columns]
+			for row in iter_rows_by_id(session, SecurityBase.__table__, columns):
+				yield dict(zip(column_names, row))
+		except Exception as e:
+			self.logger.error("Failed to query identifiers of SecurityBase")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	#-- stream all records in the order of id, used to build the snapshots
+	def iter_all(self):
+		try:
+			session = self.session_manager.get_session()
+			for security_base in self.row_reader.iter_read(session):
+				yield security_base
+		except Exception as e:
+			self.logger.error("Failed to query all records of SecurityBase")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	#-- one page of the records changed after watermark in the order of
+	#-- (updated_at, id)
+	def read_changes(self, watermark, limit, lag):
+		try:
+			session = self.session_manager.get_session()
+			changes = self.change_reader.read_page(session, watermark, limit, lag)
+			return changes
+		except Exception as e:
+			self.logger.error("Failed to query changes of SecurityBase")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
+
+	def read_high_water_mark(self, lag):
+		try:
+			session = self.session_manager.get_session()
+			return self.change_reader.read_high_water_mark(session, lag)
+		except Exception as e:
+			self.logger.error("Failed to query high water mark of SecurityBase")
+			self.logger.error(e)
+			raise
+		finally:
+			self.session_manager.close(session)
\ No newline at end of file
@@ -19,12 +19,18 @@ CREATE TABLE `security_base` (
   `description` varchar(200) NOT NULL,
   `exchange_name` varchar(100) NOT NULL,
   `timestamp` datetime NOT NULL,
+  `content_hash` char(32) DEFAULT NULL,
   `created_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
   `updated_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
   `created_by` int(11) unsigned DEFAULT NULL,
   `updated_by` int(11) unsigned DEFAULT NULL,
   PRIMARY KEY (`id`),
-  UNIQUE KEY `udx_security_base__geneva_id` (`geneva_id`)
+  UNIQUE KEY `udx_security_base__geneva_id` (`geneva_id`),
+  KEY `idx_security_base__ticker` (`ticker`),
+  KEY `idx_security_base__isin` (`isin`),
+  KEY `idx_security_base__bloomberg_id` (`bloomberg_id`),
+  KEY `idx_security_base__sedol` (`sedol`),
+  KEY `idx_security_base__updated_at_id` (`updated_at`, `id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 
@@ -35,12 +41,14 @@ CREATE TABLE `futures` (
 	`contract_size` decimal(18,6) NOT NULL,
 	`value_of_1pt` decimal(18,6) NOT NULL,
 	`timestamp` datetime NOT NULL,
+	`content_hash` char(32) DEFAULT NULL,
 	`created_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
 	`updated_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
 	`created_by` int(11) unsigned DEFAULT NULL,
 	`updated_by` int(11) unsigned DEFAULT NULL,
 	PRIMARY KEY (`id`),
-	UNIQUE KEY `udx_futures__ticker` (`ticker`)
+	UNIQUE KEY `udx_futures__ticker` (`ticker`),
+	KEY `idx_futures__updated_at_id` (`updated_at`, `id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 CREATE TABLE `fixed_deposits` (
@@ -51,12 +59,14 @@ CREATE TABLE `fixed_deposits` (
 	`starting_date` datetime NOT NULL,
 	`maturity_date` datetime NOT NULL,
 	`interest_rate` decimal(18,6) NOT NULL,
+	`content_hash` char(32) DEFAULT NULL,
 	`created_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
 	`updated_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
 	`created_by` int(11) unsigned DEFAULT NULL,
 	`updated_by` int(11) unsigned DEFAULT NULL,
 	PRIMARY KEY (`id`),
-	UNIQUE KEY `udx_fixed_deposits__geneva_id` (`geneva_id`)
+	UNIQUE KEY `udx_fixed_deposits__geneva_id` (`geneva_id`),
+	KEY `idx_fixed_deposits__updated_at_id` (`updated_at`, `id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 CREATE TABLE `fx_forwards` (
@@ -71,12 +81,14 @@ CREATE TABLE `fx_forwards` (
 	`term_currency`varchar(5) NOT NULL,
 	`term_currency_quantity` decimal(18,6) NOT NULL,
 	`forward_rate` decimal(18,6) NOT NULL,
+	`content_hash` char(32) DEFAULT NULL,
 	`created_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
 	`updated_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
 	`created_by` int(11) unsigned DEFAULT NULL,
 	`updated_by` int(11) unsigned DEFAULT NULL,
 	PRIMARY KEY (`id`),
-	UNIQUE KEY `udx_fx_forwards__factset_id` (`factset_id`)
+	UNIQUE KEY `udx_fx_forwards__factset_id` (`factset_id`),
+	KEY `idx_fx_forwards__updated_at_id` (`updated_at`, `id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 CREATE TABLE `otc_counter_parties` (
@@ -85,12 +97,15 @@ CREATE TABLE `otc_counter_parties` (
 	`geneva_party_type` varchar(100) NOT NULL,
 	`geneva_party_name` varchar(100) default NULL,
 	`bloomberg_ticker` varchar(50) default NULL,
+	`content_hash` char(32) DEFAULT NULL,
 	`created_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
 	`updated_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
 	`created_by` int(11) unsigned DEFAULT NULL,
 	`updated_by` int(11) unsigned DEFAULT NULL,
 	PRIMARY KEY (`id`),
-	UNIQUE KEY `udx_otc_counter_parties__geneva_counter_party_geneva_party_type` (`geneva_counter_party`, `geneva_party_type`)
+	UNIQUE KEY `udx_otc_counter_parties__geneva_counter_party_geneva_party_type` (`geneva_counter_party`, `geneva_party_type`),
+	KEY `idx_otc_counter_parties__updated_at_id` (`updated_at`, `id`),
+	KEY `idx_otc_counter_parties__geneva_party_type_id` (`geneva_party_type`, `id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 CREATE TABLE `security_attributes` (
@@ -133,10 +148,12 @@ CREATE TABLE `security_attributes` (
 	`classif_on_chi_state_owned_enterp` varchar(100) DEFAULT NULL,
 	`private_placement_indicator` varchar(100) DEFAULT NULL,
 	`trading_volume_90_days` decimal(18,6) DEFAULT NULL,
+	`content_hash` char(32) DEFAULT NULL,
 	`created_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
 	`updated_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
 	`created_by` int(11) unsigned DEFAULT NULL,
 	`updated_by` int(11) unsigned DEFAULT NULL,
 	PRIMARY KEY (`id`),
-	UNIQUE KEY `udx_security_attributes__security_id_type_security_id` (`security_id_type`, `security_id`)
+	UNIQUE KEY `udx_security_attributes__security_id_type_security_id` (`security_id_type`, `security_id`),
+	KEY `idx_security_attributes__updated_at_id` (`updated_at`, `id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
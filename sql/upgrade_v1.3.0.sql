@@ -0,0 +1,38 @@
+-- upgrade the tables created by create.sql of v1.2.x
+ALTER TABLE `security_base`
+  ADD KEY `idx_security_base__ticker` (`ticker`),
+  ADD KEY `idx_security_base__isin` (`isin`),
+  ADD KEY `idx_security_base__bloomberg_id` (`bloomberg_id`),
+  ADD KEY `idx_security_base__sedol` (`sedol`);
+
+-- index of the change export, rows changed after a watermark of (updated_at, id)
+ALTER TABLE `security_base`
+  ADD KEY `idx_security_base__updated_at_id` (`updated_at`, `id`);
+ALTER TABLE `futures`
+  ADD KEY `idx_futures__updated_at_id` (`updated_at`, `id`);
+ALTER TABLE `fixed_deposits`
+  ADD KEY `idx_fixed_deposits__updated_at_id` (`updated_at`, `id`);
+ALTER TABLE `fx_forwards`
+  ADD KEY `idx_fx_forwards__updated_at_id` (`updated_at`, `id`);
+ALTER TABLE `otc_counter_parties`
+  ADD KEY `idx_otc_counter_parties__updated_at_id` (`updated_at`, `id`);
+ALTER TABLE `security_attributes`
+  ADD KEY `idx_security_attributes__updated_at_id` (`updated_at`, `id`);
+
+-- index of the counterparty pages filtered by party type
+ALTER TABLE `otc_counter_parties`
+  ADD KEY `idx_otc_counter_parties__geneva_party_type_id` (`geneva_party_type`, `id`);
+
+-- hash of the business columns, writes of unchanged records are skipped
+ALTER TABLE `security_base`
+  ADD COLUMN `content_hash` char(32) DEFAULT NULL AFTER `timestamp`;
+ALTER TABLE `futures`
+  ADD COLUMN `content_hash` char(32) DEFAULT NULL AFTER `timestamp`;
+ALTER TABLE `fixed_deposits`
+  ADD COLUMN `content_hash` char(32) DEFAULT NULL AFTER `interest_rate`;
+ALTER TABLE `fx_forwards`
+  ADD COLUMN `content_hash` char(32) DEFAULT NULL AFTER `forward_rate`;
+ALTER TABLE `otc_counter_parties`
+  ADD COLUMN `content_hash` char(32) DEFAULT NULL AFTER `bloomberg_ticker`;
+ALTER TABLE `security_attributes`
+  ADD COLUMN `content_hash` char(32) DEFAULT NULL AFTER `trading_volume_90_days`;
@@ -3,30 +3,89 @@
 
 import logging
 import logging.config
+import os
+import tempfile
+import threading
+import time
 from datetime import datetime
 from os.path import abspath, dirname, join
 import unittest2
+try:
+	import numpy
+except ImportError:
+	numpy = None
+try:
+	import pyarrow
+	import pyarrow.parquet
+except ImportError:
+	pyarrow = None
 from security_data.constants import Constants
-from security_data.data import (initialize_datastore,
+from security_data.data import (controller,
+							initialize_datastore,
+							dispose_datastore,
+							transaction,
 							clear_security_data,
 							get_security_basic_info, 
+							get_security_basic_info_many,
+							get_security_basic_info_by,
+							get_security_basic_info_by_many,
+							load_security_snapshot,
+							write_security_snapshot_file,
+							open_security_snapshot_file,
+							export_security_data,
+							export_changes_since,
+							get_write_stats,
+							get_change_high_water_mark,
 							add_security_basic_info,
+							add_security_basic_info_many,
 							update_security_basic_info,
+							upsert_security_basic_info,
+							upsert_security_basic_info_many,
+							enable_security_basic_info_cache,
+							disable_security_basic_info_cache,
+							get_security_basic_info_cache_stats,
+							enable_negative_lookup_filter,
+							disable_negative_lookup_filter,
+							get_negative_lookup_filter_stats,
+							enable_identifier_resolver,
+							disable_identifier_resolver,
+							get_identifier_resolver_stats,
+							resolve_geneva_id,
+							resolve_geneva_id_many,
+							resolve_security_attribute_key,
 							get_futures_info, 
 							add_futures_info,
 							update_futures_info,
+							upsert_futures_info,
+							upsert_futures_info_many,
 							get_fixed_deposit_info, 
 							add_fixed_deposit_info,
+							add_fixed_deposit_info_many,
 							update_fixed_deposit_info,
+							update_fixed_deposit_info_many,
+							upsert_fixed_deposit_info,
+							upsert_fixed_deposit_info_many,
 							get_fx_forward_info, 
 							add_fx_forward_info,
+							add_fx_forward_info_many,
 							update_fx_forward_info,
+							upsert_fx_forward_info,
+							upsert_fx_forward_info_many,
 							get_all_counter_party_info, 
+							get_counter_parties,
+							iter_counter_parties,
 							add_counter_party_info,
 							update_counter_party_info,
+							upsert_counter_party_info,
+							upsert_counter_party_info_many,
 							get_security_attribute, 
+							get_security_attributes_many,
 							add_security_attribute,
-							update_security_attribute)
+							update_security_attribute,
+							upsert_security_attribute,
+							upsert_security_attribute_many,
+							load_security_attribute_file,
+							reconcile_security_data_file)
 from security_data.models.security_base import SecurityBase
 from security_data.models.futures import Futures
 from security_data.models.fixed_deposit import FixedDeposit
@@ -34,7 +93,10 @@ from security_data.models.fx_forward import FxForward
 from security_data.models.otc_counter_party import OtcCounterParty
 from security_data.models.security_attribute import SecurityAttribute
 from security_data.utils.database import DBConn
+from security_data.utils.validator import validator_registry
 from security_data.utils.error_handling import (NoDataClearingInProuctionModeError,
+                                            DataStoreNotYetInitializeError,
+                                            IdentifierResolverNotEnabledError,
                                             SecurityBaseAlreadyExistError,
                                             SecurityBaseNotExistError,
                                             FuturesAlreadyExistError,
@@ -47,7 +109,7 @@ from security_data.utils.error_handling import (NoDataClearingInProuctionModeErr
                                             OtcCounterPartyNotExistError,
                                             SecurityAttributeAlreadyExistError,
                                             SecurityAttributeNotExistError)
-from sqlalchemy import func
+from sqlalchemy import event, func
 from sqlalchemy.orm import sessionmaker
 
 getCurrentDirectory = lambda : \
@@ -76,6 +138,38 @@ class TestFactSetData(unittest2.TestCase):
 		self.assertEqual(0, initialize_datastore("production"))
 		#self.assertEqual(0, initialize_datastore("test"))
 		self.assertEqual(0, initialize_datastore("uat"))
+		#-- the engine and its connection pool are reused
+		self.assertIs(DBConn.get_db(self.unittest_dbmode), DBConn.get_db(self.unittest_dbmode))
+
+	def test_dispose_datastore(self):
+		self.assertEqual(0, dispose_datastore())
+		with self.assertRaises(DataStoreNotYetInitializeError):
+			get_security_basic_info("700 HK")
+		self.assertEqual(0, initialize_datastore("uat"))
+		self.assertEqual(get_security_basic_info("700 HK"), {})
+
+	def test_transaction(self):
+		#-- 1. all the changes are committed at the end of the block
+		with transaction():
+			add_security_basic_info(self._get_test_security_base())
+			add_futures_info(self._get_test_futures())
+			#-- changes are visible inside the transaction
+			self.assertEqual(get_security_basic_info("700 HK")["geneva_id"], "700 HK")
+		self.assertEqual(get_security_basic_info("700 HK")["geneva_id"], "700 HK")
+		self.assertEqual(get_futures_info("TYM1 Comdty")["ticker"], "TYM1 Comdty")
+		#-- 2. all the changes are rolled back if an exception is raised
+		with self.assertRaises(FuturesAlreadyExistError):
+			with transaction():
+				add_security_basic_info(self._get_test_security_base2())
+				add_futures_info(self._get_test_futures())
+		self.assertEqual(get_security_basic_info("701 HK"), {})
+		#-- 3. nested transaction joins the outer one
+		with self.assertRaises(ValueError):
+			with transaction():
+				with transaction():
+					add_security_basic_info(self._get_test_security_base2())
+				raise ValueError("rollback")
+		self.assertEqual(get_security_basic_info("701 HK"), {})
 
 	def test_clear_security_data(self):
 		#-- test if NoDataClearingInProuctionModeError raise under production mode
@@ -92,6 +186,27 @@ class TestFactSetData(unittest2.TestCase):
 		self.assertEqual(0, session.query(func.count(OtcCounterParty.id)).scalar())
 		self.assertEqual(0, session.query(func.count(SecurityAttribute.id)).scalar())
 
+	def test_validator_registry(self):
+		#-- 1. the same validator is reused within a thread
+		v1 = validator_registry.get_validator("get_security_basic_info")
+		v2 = validator_registry.get_validator("get_security_basic_info")
+		self.assertIs(v1, v2)
+		#-- 2. the reused validator does not keep the errors of the last call
+		self.assertFalse(v1.validate({"geneva_id" : ""}))
+		self.assertTrue(v1.validate({"geneva_id" : "700 HK"}))
+		self.assertEqual(v1.errors, {})
+		#-- 3. other threads get their own validator sharing the compiled schema
+		validators = []
+		t = threading.Thread(target=lambda: validators.append( \
+				validator_registry.get_validator("get_security_basic_info")))
+		t.start()
+		t.join()
+		self.assertIsNot(validators[0], v1)
+		self.assertIs(validators[0].schema, v1.schema)
+		#-- 4. unknown method name
+		with self.assertRaises(Exception):
+			validator_registry.get_validator("unknown_method")
+
 	def test_add_security_basic_info(self):
 		#-- 1. normal creation
 		security_info = self._get_test_security_base()
@@ -123,6 +238,33 @@ class TestFactSetData(unittest2.TestCase):
 		with self.assertRaises(ValueError):
 			add_security_basic_info(security_info)
 
+	def test_add_security_basic_info_many(self):
+		#-- preparation by adding 1 security
+		security_info = self._get_test_security_base()
+		add_security_basic_info(security_info)
+		#-- 1. new, existing, repeated and invalid records in one batch
+		security_info_invalid = self._get_test_security_base()
+		security_info_invalid["geneva_id"] = ""
+		security_infos = [
+			self._get_test_security_base2(),
+			self._get_test_security_base(),
+			security_info_invalid,
+			self._get_test_security_base2()
+		]
+		report = add_security_basic_info_many(security_infos, chunk_size=1)
+		self.assertEqual(report["inserted"], ["701 HK"])
+		self.assertEqual(sorted(report["duplicate"]), ["700 HK", "701 HK"])
+		self.assertEqual(len(report["invalid"]), 1)
+		self.assertEqual(report["invalid"][0]["index"], 2)
+		self.assertIn("geneva_id", report["invalid"][0]["errors"])
+		#-- 2. verify the added record
+		d = get_security_basic_info("701 HK")
+		self.assertEqual(d["isin"], "BMG2237T1009")
+		self.assertEqual(d["description"], "CNT Group Limited 中文")
+		#-- 3. input must be a list
+		with self.assertRaises(ValueError):
+			add_security_basic_info_many(self._get_test_security_base())
+
 	def test_get_security_basic_info(self):
 		#-- preparation by adding 2 securities
 		security_info = self._get_test_security_base()
@@ -148,6 +290,227 @@ class TestFactSetData(unittest2.TestCase):
 		with self.assertRaises(ValueError):
 			get_security_basic_info("")
 
+	def test_get_security_basic_info_many(self):
+		#-- preparation by adding 2 securities
+		security_info = self._get_test_security_base()
+		add_security_basic_info(security_info)
+		security_info = self._get_test_security_base2()
+		add_security_basic_info(security_info)
+		#-- 1. found and missing geneva_id are reported separately
+		d = get_security_basic_info_many(["700 HK", "702 HK", "701 HK", "700 HK"])
+		self.assertEqual(sorted(d["found"].keys()), ["700 HK", "701 HK"])
+		self.assertEqual(d["found"]["701 HK"]["isin"], "BMG2237T1009")
+		self.assertEqual(d["found"]["700 HK"], get_security_basic_info("700 HK"))
+		self.assertEqual(d["missing"], ["702 HK"])
+		#-- 2. empty list
+		self.assertEqual(get_security_basic_info_many([]), {"found" : {}, "missing" : []})
+		#-- 3. invalid input
+		with self.assertRaises(ValueError):
+			get_security_basic_info_many(["700 HK", ""])
+		with self.assertRaises(ValueError):
+			get_security_basic_info_many("700 HK")
+
+	def test_get_security_basic_info_by(self):
+		#-- preparation by adding 3 securities, 2 with the same isin
+		security_info = self._get_test_security_base()
+		add_security_basic_info(security_info)
+		security_info = self._get_test_security_base2()
+		add_security_basic_info(security_info)
+		security_info = self._get_test_security_base2()
+		security_info["geneva_id"] = "701 SP"
+		add_security_basic_info(security_info)
+		#-- 1. get by each identifier
+		self.assertEqual(get_security_basic_info_by("geneva_id", "700 HK"), \
+						[get_security_basic_info("700 HK")])
+		self.assertEqual(get_security_basic_info_by("ticker", "700 HK Equity")[0]["geneva_id"], "700 HK")
+		self.assertEqual(get_security_basic_info_by("bloomberg_id", "BBG000BJ35N5")[0]["geneva_id"], "700 HK")
+		self.assertEqual(get_security_basic_info_by("sedol", "BMMV2K8")[0]["geneva_id"], "700 HK")
+		d = get_security_basic_info_by("isin", "BMG2237T1009")
+		self.assertEqual(sorted(s["geneva_id"] for s in d), ["701 HK", "701 SP"])
+		#-- 2. no result return
+		self.assertEqual(get_security_basic_info_by("isin", "wrong value"), [])
+		self.assertEqual(get_security_basic_info_by("geneva_id", "702 HK"), [])
+		#-- 3. batch get
+		d = get_security_basic_info_by_many("isin", ["BMG2237T1009", "wrong value", "KYG875721634"])
+		self.assertEqual(sorted(d["found"].keys()), ["BMG2237T1009", "KYG875721634"])
+		self.assertEqual(len(d["found"]["BMG2237T1009"]), 2)
+		self.assertEqual(d["found"]["KYG875721634"][0]["geneva_id"], "700 HK")
+		self.assertEqual(d["missing"], ["wrong value"])
+		#-- 4. invalid input
+		with self.assertRaises(ValueError):
+			get_security_basic_info_by("cusip", "BMG2237T1009")
+		with self.assertRaises(ValueError):
+			get_security_basic_info_by("isin", "")
+		with self.assertRaises(ValueError):
+			get_security_basic_info_by_many("isin", "BMG2237T1009")
+
+	@unittest2.skipIf(numpy is None, "numpy is not installed")
+	def test_load_security_snapshot(self):
+		#-- preparation by adding 2 securities and 2 attributes
+		add_security_basic_info(self._get_test_security_base())
+		add_security_basic_info(self._get_test_security_base2())
+		add_security_attribute(self._get_test_security_attribute())
+		security_attribute_info = self._get_test_security_attribute2()
+		add_security_attribute(security_attribute_info)
+		snapshot = load_security_snapshot()
+		#-- 1. rows are the same as the dictionary returning functions
+		self.assertEqual(snapshot.get_security_basic_info("701 HK"), get_security_basic_info("701 HK"))
+		self.assertEqual(snapshot.get_security_attribute("ISIN", "XS1936784161"), \
+						get_security_attribute("ISIN", "XS1936784161"))
+		self.assertIsNone(snapshot.get_security_basic_info("702 HK"))
+		#-- 2. numeric and dictionary encoded columns
+		column = snapshot.security_attributes.column("trading_volume_90_days")
+		self.assertEqual(column.dtype, numpy.float64)
+		self.assertEqual(list(column), [24634300, security_attribute_info["trading_volume_90_days"]])
+		column = snapshot.security_base.column("exchange_name")
+		self.assertEqual(list(column.categories), ["HKEX"])
+		self.assertEqual(list(column.to_numpy()), ["HKEX", "HKEX"])
+		#-- 3. memory usage report
+		usage = snapshot.memory_usage()
+		self.assertEqual(usage["security_base"]["rows"], 2)
+		self.assertEqual(usage["security_attributes"]["rows"], 2)
+		self.assertGreater(usage["security_attributes"]["list_of_dicts_bytes"], 0)
+
+	def test_security_snapshot_file(self):
+		#-- preparation by adding 1 record to each table
+		add_security_basic_info(self._get_test_security_base())
+		add_futures_info(self._get_test_futures())
+		add_fixed_deposit_info(self._get_test_fixed_deposit())
+		add_fx_forward_info(self._get_test_fx_forward())
+		add_security_attribute(self._get_test_security_attribute())
+		directory = tempfile.mkdtemp()
+		self.addCleanup(os.rmdir, directory)
+		file_path = join(directory, "security_data.snapshot")
+		self.addCleanup(os.remove, file_path)
+		report = write_security_snapshot_file(file_path)
+		self.assertEqual(report["security_base"], 1)
+		self.assertEqual(report["security_attributes"], 1)
+		#-- 1. rows are the same as the dictionary returning functions
+		with open_security_snapshot_file(file_path) as reader:
+			self.assertEqual(reader.get("security_base", "700 HK"), get_security_basic_info("700 HK"))
+			self.assertEqual(reader.get("futures", "TYM1 Comdty"), get_futures_info("TYM1 Comdty"))
+			fixed_deposit = self._get_test_fixed_deposit()
+			self.assertEqual(reader.get("fixed_deposits", fixed_deposit["geneva_id"]), \
+							get_fixed_deposit_info(fixed_deposit["geneva_id"]))
+			fx_forward = self._get_test_fx_forward()
+			self.assertEqual(reader.get("fx_forwards", fx_forward["factset_id"]), \
+							get_fx_forward_info(fx_forward["factset_id"]))
+			self.assertEqual(reader.get("security_attributes", ("ISIN", "XS1936784161")), \
+							get_security_attribute("ISIN", "XS1936784161"))
+			self.assertIsNone(reader.get("security_base", "701 HK"))
+			self.assertFalse(reader.is_stale())
+			#-- 2. a new snapshot replaces the file, opened readers keep the old one
+			add_security_basic_info(self._get_test_security_base2())
+			write_security_snapshot_file(file_path)
+			self.assertTrue(reader.is_stale())
+			self.assertIsNone(reader.get("security_base", "701 HK"))
+		with open_security_snapshot_file(file_path) as reader:
+			self.assertEqual(reader.get("security_base", "701 HK")["geneva_id"], "701 HK")
+			self.assertEqual(reader.count("security_base"), 2)
+		self.assertEqual(os.listdir(directory), ["security_data.snapshot"])
+
+	@unittest2.skipIf(pyarrow is None, "pyarrow is not installed")
+	def test_export_security_data(self):
+		#-- preparation by adding 2 securities and 1 attribute
+		add_security_basic_info(self._get_test_security_base())
+		add_security_basic_info(self._get_test_security_base2())
+		add_security_attribute(self._get_test_security_attribute())
+		directory = tempfile.mkdtemp()
+		def remove_directory():
+			for file_name in os.listdir(directory):
+				os.remove(join(directory, file_name))
+			os.rmdir(directory)
+		self.addCleanup(remove_directory)
+		#-- 1. parquet, one row per row group
+		report = export_security_data(directory, "parquet", row_group_size=1)
+		self.assertEqual(report["security_base"], 2)
+		self.assertEqual(report["futures"], 0)
+		self.assertEqual(report["security_attributes"], 1)
+		parquet_file = pyarrow.parquet.ParquetFile(join(directory, "security_base.parquet"))
+		self.assertEqual(parquet_file.num_row_groups, 2)
+		table = parquet_file.read()
+		self.assertEqual(table.column("geneva_id").to_pylist(), ["700 HK", "701 HK"])
+		table = pyarrow.parquet.read_table(join(directory, "security_attributes.parquet"))
+		self.assertEqual(table.schema.field("trading_volume_90_days").type, pyarrow.float64())
+		self.assertEqual(table.to_pylist()[0], get_security_attribute("ISIN", "XS1936784161"))
+		self.assertEqual(pyarrow.parquet.read_table(join(directory, "futures.parquet")).num_rows, 0)
+		#-- 2. arrow ipc file
+		report = export_security_data(directory, "arrow")
+		with pyarrow.OSFile(join(directory, "security_base.arrow"), "rb") as f:
+			table = pyarrow.ipc.open_file(f).read_all()
+		self.assertEqual(table.to_pylist()[1], get_security_basic_info("701 HK"))
+		#-- 3. invalid input
+		with self.assertRaises(ValueError):
+			export_security_data(directory, "csv")
+		with self.assertRaises(ValueError):
+			export_security_data(directory, "parquet", row_group_size=0)
+
+	def test_iter_read_in_batches(self):
+		for i in range(5):
+			add_futures_info(dict(self._get_test_futures(), ticker="TYM1 Comdty " + str(i)))
+		statements = []
+		def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+			statements.append(statement)
+		engine = DBConn.get_db(self.unittest_dbmode)
+		event.listen(engine, "before_cursor_execute", before_cursor_execute)
+		try:
+			with controller.session_manager.transaction() as session:
+				rows = list(controller.futures_services.row_reader.iter_read(session, batch_size=2))
+		finally:
+			event.remove(engine, "before_cursor_execute", before_cursor_execute)
+		self.assertEqual([row["ticker"] for row in rows], ["TYM1 Comdty " + str(i) for i in range(5)])
+		#-- 5 rows read with 3 queries of at most 2 rows
+		self.assertEqual(len(statements), 3)
+		for statement in statements:
+			self.assertIn("LIMIT", statement)
+
+	def test_export_changes_since(self):
+		#-- 1. empty table
+		self.assertIsNone(get_change_high_water_mark("security_base"))
+		changes = export_changes_since("security_base")
+		self.assertEqual(changes["rows"], [])
+		self.assertIsNone(changes["watermark"])
+		self.assertFalse(changes["has_more"])
+		#-- 2. rows are held back for the safety lag and the second they are
+		#-- updated in
+		add_security_basic_info(self._get_test_security_base())
+		add_security_basic_info(self._get_test_security_base2())
+		self.assertEqual(export_changes_since("security_base", safety_lag=0)["rows"], [])
+		time.sleep(1.1)
+		self.assertEqual(export_changes_since("security_base")["rows"], [])
+		self.assertIsNone(get_change_high_water_mark("security_base"))
+		#-- 3. pages ordered by (updated_at, id)
+		changes = export_changes_since("security_base", limit=1, safety_lag=0)
+		self.assertEqual([row["geneva_id"] for row in changes["rows"]], ["700 HK"])
+		self.assertTrue(changes["has_more"])
+		self.assertEqual(changes["watermark"]["id"], changes["rows"][0]["id"])
+		changes = export_changes_since("security_base", changes["watermark"], limit=1, safety_lag=0)
+		self.assertEqual([row["geneva_id"] for row in changes["rows"]], ["701 HK"])
+		watermark = changes["watermark"]
+		self.assertEqual(get_change_high_water_mark("security_base", safety_lag=0), watermark)
+		changes = export_changes_since("security_base", watermark, limit=1, safety_lag=0)
+		self.assertEqual(changes["rows"], [])
+		self.assertEqual(changes["watermark"], watermark)
+		self.assertFalse(changes["has_more"])
+		#-- 4. only the updated row is returned after the watermark
+		update_security_basic_info({"geneva_id" : "700 HK", "isin" : "XS1234567890"})
+		time.sleep(1.1)
+		changes = export_changes_since("security_base", watermark, safety_lag=0)
+		self.assertEqual(len(changes["rows"]), 1)
+		self.assertEqual(changes["rows"][0]["isin"], "XS1234567890")
+		#-- 5. timestamp watermark
+		changes = export_changes_since("security_base", watermark["updated_at"], safety_lag=0)
+		self.assertEqual([row["geneva_id"] for row in changes["rows"]], ["700 HK"])
+		#-- 6. invalid input
+		with self.assertRaises(ValueError):
+			export_changes_since("security_basic_info")
+		with self.assertRaises(ValueError):
+			export_changes_since("security_base", "yesterday")
+		with self.assertRaises(ValueError):
+			export_changes_since("security_base", limit=0)
+		with self.assertRaises(ValueError):
+			export_changes_since("security_base", safety_lag=-1)
+
 	def test_update_security_basic_info(self):
 		#-- preparation by adding 2 securities
 		security_info = self._get_test_security_base()
@@ -197,6 +560,168 @@ class TestFactSetData(unittest2.TestCase):
 		with self.assertRaises(ValueError):
 			update_security_basic_info(security_info)
 
+	def test_security_basic_info_cache(self):
+		enable_security_basic_info_cache(max_size=1, ttl=300)
+		self.addCleanup(disable_security_basic_info_cache)
+		security_info = self._get_test_security_base()
+		add_security_basic_info(security_info)
+		security_info = self._get_test_security_base2()
+		add_security_basic_info(security_info)
+		#-- 1. first call is a miss, second call is a hit
+		d = get_security_basic_info("700 HK")
+		self.assertEqual(d["isin"], "KYG875721634")
+		self.assertEqual(get_security_basic_info("700 HK"), d)
+		stats = get_security_basic_info_cache_stats()
+		self.assertEqual(stats["misses"], 1)
+		self.assertEqual(stats["hits"], 1)
+		#-- 2. modifying the returned record does not change the cache
+		d["isin"] = "modified"
+		self.assertEqual(get_security_basic_info("700 HK")["isin"], "KYG875721634")
+		#-- 3. update invalidates the cached record
+		update_security_basic_info({
+			"geneva_id" : "700 HK",
+			"isin" : "XS1234567890"
+		})
+		self.assertEqual(get_security_basic_info("700 HK")["isin"], "XS1234567890")
+		#-- 4. the size bound evicts the least recently used record
+		get_security_basic_info("701 HK")
+		stats = get_security_basic_info_cache_stats()
+		self.assertEqual(stats["size"], 1)
+		self.assertEqual(stats["evictions"], 1)
+		#-- 5. a record read before a write committed meanwhile is not cached
+		services = controller.security_base_services
+		query = services.query
+		def query_then_update(*args):
+			security_bases = query(*args)
+			update_security_basic_info({
+				"geneva_id" : "700 HK",
+				"isin" : "XS0000000000"
+			})
+			return security_bases
+		services.query = query_then_update
+		try:
+			self.assertEqual(get_security_basic_info("700 HK")["isin"], "XS1234567890")
+		finally:
+			del services.query
+		self.assertEqual(get_security_basic_info_cache_stats()["stale_puts"], 1)
+		self.assertEqual(get_security_basic_info("700 HK")["isin"], "XS0000000000")
+		#-- 6. a write through a case variant of the geneva_id invalidates the
+		#-- cached record, the database does not tell them apart
+		self.assertEqual(get_security_basic_info_cache_stats()["size"], 1)
+		controller._on_security_base_written(["700 hk"])
+		self.assertEqual(get_security_basic_info_cache_stats()["size"], 0)
+		#-- 7. no cache stats after disabling the cache
+		disable_security_basic_info_cache()
+		self.assertEqual(get_security_basic_info_cache_stats(), {})
+
+	def test_negative_lookup_filter(self):
+		security_info = self._get_test_security_base()
+		add_security_basic_info(security_info)
+		enable_negative_lookup_filter(false_positive_rate=0.001)
+		self.addCleanup(disable_negative_lookup_filter)
+		stats = get_negative_lookup_filter_stats()
+		self.assertEqual(stats["security_base"]["keys"], 1)
+		self.assertEqual(stats["futures"]["keys"], 0)
+		#-- 1. existing key is still found
+		self.assertEqual(get_security_basic_info("700 HK")["geneva_id"], "700 HK")
+		#-- 2. missing keys are answered by the filter
+		self.assertEqual(get_security_basic_info("702 HK"), {})
+		self.assertEqual(get_futures_info("TYM1 Comdty"), {})
+		stats = get_negative_lookup_filter_stats()
+		self.assertEqual(stats["security_base"]["skipped_lookups"], 1)
+		self.assertEqual(stats["futures"]["skipped_lookups"], 1)
+		#-- 3. keys added afterwards are added to the filter
+		security_info = self._get_test_futures()
+		add_futures_info(security_info)
+		self.assertEqual(get_futures_info("TYM1 Comdty")["ticker"], "TYM1 Comdty")
+		#-- 4. case and accent variants of existing keys are passed to the
+		#-- database, which does not tell them apart
+		self.assertTrue(controller._may_exist("security_base", "700 hk"))
+		self.assertTrue(controller._may_exist("futures", "tym1 comdty "))
+		get_security_basic_info("700 hk")
+		stats = get_negative_lookup_filter_stats()
+		self.assertEqual(stats["security_base"]["skipped_lookups"], 1)
+		#-- 5. invalid false positive rate
+		with self.assertRaises(ValueError):
+			enable_negative_lookup_filter(false_positive_rate=1.5)
+
+	def test_identifier_resolver(self):
+		#-- preparation by adding 1 security and its attribute
+		add_security_basic_info(self._get_test_security_base())
+		security_attribute_info = self._get_test_security_attribute()
+		security_attribute_info["security_id"] = "KYG875721634"
+		add_security_attribute(security_attribute_info)
+		with self.assertRaises(IdentifierResolverNotEnabledError):
+			resolve_geneva_id("700 HK")
+		enable_identifier_resolver()
+		self.addCleanup(disable_identifier_resolver)
+		self.assertEqual(get_identifier_resolver_stats(), {
+			"securities" : 1,
+			"security_attribute_keys" : 1
+		})
+		#-- 1. resolve by each identifier with or without id type
+		self.assertEqual(resolve_geneva_id("700 HK"), "700 HK")
+		self.assertEqual(resolve_geneva_id("700 HK Equity"), "700 HK")
+		self.assertEqual(resolve_geneva_id("KYG875721634", "ISIN"), "700 HK")
+		self.assertEqual(resolve_geneva_id("BBG000BJ35N5", "bloomberg_id"), "700 HK")
+		self.assertEqual(resolve_geneva_id("BMMV2K8", "sedol"), "700 HK")
+		self.assertIsNone(resolve_geneva_id("BMMV2K8", "isin"))
+		self.assertIsNone(resolve_geneva_id("702 HK"))
+		self.assertEqual(resolve_security_attribute_key("BMMV2K8"), ("ISIN", "KYG875721634"))
+		#-- 2. bulk resolve
+		d = resolve_geneva_id_many(["700 HK Equity", "702 HK", "KYG875721634"])
+		self.assertEqual(d["found"], {"700 HK Equity" : "700 HK", "KYG875721634" : "700 HK"})
+		self.assertEqual(d["missing"], ["702 HK"])
+		#-- 3. refreshed on add and update
+		add_security_basic_info(self._get_test_security_base2())
+		self.assertEqual(resolve_geneva_id("BMG2237T1009"), "701 HK")
+		self.assertIsNone(resolve_security_attribute_key("701 HK"))
+		update_security_basic_info({"geneva_id" : "701 HK", "isin" : "BMG2237T1010"})
+		self.assertIsNone(resolve_geneva_id("BMG2237T1009"))
+		self.assertEqual(resolve_geneva_id("BMG2237T1010"), "701 HK")
+		security_attribute_info["security_id"] = "BMG2237T1010"
+		upsert_security_attribute(security_attribute_info)
+		self.assertEqual(resolve_security_attribute_key("701 HK"), ("ISIN", "BMG2237T1010"))
+		#-- 4. writes rolled back are not resolved
+		security_info = self._get_test_security_base2()
+		security_info["geneva_id"] = "702 HK"
+		security_info["ticker"] = "702 HK Equity"
+		with self.assertRaises(ValueError):
+			with transaction():
+				add_security_basic_info(security_info)
+				raise ValueError("rollback")
+		self.assertIsNone(resolve_geneva_id("702 HK Equity"))
+		#-- 5. unknown id type
+		with self.assertRaises(ValueError):
+			resolve_geneva_id("700 HK", "cusip")
+
+	def test_upsert_security_basic_info(self):
+		#-- 1. insert when the geneva_id does not exist
+		security_info = self._get_test_security_base()
+		self.assertEqual(upsert_security_basic_info(security_info), 0)
+		self.assertEqual(get_security_basic_info("700 HK")["isin"], "KYG875721634")
+		#-- 2. update when the geneva_id exists
+		security_info = self._get_test_security_base()
+		security_info["isin"] = "XS1234567890"
+		self.assertEqual(upsert_security_basic_info(security_info), 0)
+		self.assertEqual(get_security_basic_info("700 HK")["isin"], "XS1234567890")
+		#-- 3. batch with new, existing and invalid records
+		security_info = self._get_test_security_base()
+		security_info["description"] = "updated description"
+		security_info_invalid = self._get_test_security_base2()
+		security_info_invalid["is_private"] = "XXX"
+		report = upsert_security_basic_info_many([security_info, \
+						self._get_test_security_base2(), security_info_invalid])
+		self.assertEqual(report["upserted"], 2)
+		self.assertEqual(report["invalid"][0]["index"], 2)
+		self.assertEqual(get_security_basic_info("700 HK")["description"], "updated description")
+		self.assertEqual(get_security_basic_info("701 HK")["is_private"], "N")
+		#-- 4. missing required field
+		security_info = self._get_test_security_base()
+		del security_info["ticker"]
+		with self.assertRaises(ValueError):
+			upsert_security_basic_info(security_info)
+
 	def _get_test_security_base(self):
 		security_info = {
 			"geneva_id" : "700 HK",
@@ -303,6 +828,8 @@ class TestFactSetData(unittest2.TestCase):
 		self.assertEqual(d["underlying_id"], "testing 123")
 		self.assertEqual(d["contract_size"], 400000.1)
 		self.assertEqual(d["value_of_1pt"], 10.15)
+		#-- 1.1 update with the same values succeeded
+		self.assertEqual(update_futures_info({"ticker" : "TYM1 Comdty", "value_of_1pt" : 10.15}), 0)
 		#-- 2. test invalid input 
 		#-- 2.1 string vlaue for contract_size
 		security_info = {
@@ -326,6 +853,105 @@ class TestFactSetData(unittest2.TestCase):
 		with self.assertRaises(ValueError):
 			update_futures_info(security_info)
 
+	def test_skip_unchanged_writes(self):
+		#-- 1. new records are written
+		report = upsert_futures_info_many([self._get_test_futures(), self._get_test_futures2()])
+		self.assertEqual((report["written"], report["skipped"]), (2, 0))
+		#-- 2. identical records are skipped, numbers compared as float
+		security_info = self._get_test_futures()
+		security_info["contract_size"] = 100000.0
+		report = upsert_futures_info_many([security_info, self._get_test_futures2()])
+		self.assertEqual((report["written"], report["skipped"]), (0, 2))
+		#-- 3. only the changed record is written
+		security_info["value_of_1pt"] = 10.15
+		report = upsert_futures_info_many([security_info, self._get_test_futures2()])
+		self.assertEqual((report["written"], report["skipped"]), (1, 1))
+		self.assertEqual(get_futures_info("TYM1 Comdty")["value_of_1pt"], 10.15)
+		#-- 4. update of all the columns is skipped if identical, update of some
+		#--    of the columns is written
+		security_info = self._get_test_futures2()
+		self.assertEqual(update_futures_info(security_info), 0)
+		self.assertEqual(update_futures_info({"ticker" : "TYM1 Comdty", "value_of_1pt" : 10.15}), 0)
+		#--    the stored hash is outdated by the partial update
+		security_info = self._get_test_futures()
+		security_info["value_of_1pt"] = 10.15
+		report = upsert_futures_info_many([security_info])
+		self.assertEqual((report["written"], report["skipped"]), (1, 0))
+		with self.assertRaises(FuturesNotExistError):
+			security_info["ticker"] = "TYM1 Comdty Not Exist"
+			update_futures_info(security_info)
+		#-- 5. counters since the datastore is initialized
+		self.assertEqual(get_write_stats()["futures"], {"written" : 5, "skipped" : 4})
+		self.assertEqual(get_write_stats()["security_base"], {"written" : 0, "skipped" : 0})
+
+	def _write_delimited_file(self, columns, rows):
+		fd, file_path = tempfile.mkstemp(suffix=".csv")
+		with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+			f.write("|".join(columns) + "\n")
+			for row in rows:
+				f.write("|".join(row) + "\n")
+		return file_path
+
+	def test_reconcile_futures_file(self):
+		#-- preparation by adding 3 futures
+		security_info = self._get_test_futures()
+		security_info2 = self._get_test_futures2()
+		security_info3 = dict(security_info2, ticker="TYM1 Comdty 3")
+		for info in [security_info, security_info2, security_info3]:
+			add_futures_info(dict(info))
+		#-- 1. unchanged, changed, new and repeated rows, the third futures
+		#-- is not in the file
+		columns = list(security_info.keys())
+		security_info2["value_of_1pt"] = "2500"
+		security_info4 = dict(security_info, ticker="TYM1 Comdty 4")
+		rows = [[info[column] for column in columns] \
+				for info in [security_info4, security_info, security_info2, security_info]]
+		file_path = self._write_delimited_file(columns, rows)
+		try:
+			#-- 1.1. dry run reports the changes only
+			report = reconcile_security_data_file("futures", file_path, delimiter="|", dry_run=True)
+			self.assertEqual(report["join"], "hash")
+			self.assertEqual([report[k] for k in ["rows", "duplicate", "insert", "update", "delete", "unchanged"]], \
+								[4, 1, 1, 1, 1, 1])
+			self.assertFalse(report["applied"])
+			self.assertEqual(get_futures_info("TYM1 Comdty 3")["ticker"], "TYM1 Comdty 3")
+			#-- 1.2. apply the changes
+			report = reconcile_security_data_file("futures", file_path, delimiter="|", chunk_size=1)
+			self.assertEqual([report[k] for k in ["insert", "update", "delete", "unchanged"]], [1, 1, 1, 1])
+			self.assertTrue(report["applied"])
+			self.assertEqual(get_futures_info("TYM1 Comdty 3"), {})
+			self.assertEqual(get_futures_info("TYM1 Comdty 2")["value_of_1pt"], 2500)
+			self.assertEqual(get_futures_info("TYM1 Comdty 4")["ticker"], "TYM1 Comdty 4")
+			#-- 1.3. the table matches the file
+			report = reconcile_security_data_file("futures", file_path, delimiter="|")
+			self.assertEqual([report[k] for k in ["insert", "update", "delete", "unchanged"]], [0, 0, 0, 3])
+		finally:
+			os.remove(file_path)
+		#-- 2. the changes are not applied if a row is rejected
+		file_path = self._write_delimited_file(columns, rows[0:1] + [["TYM1 Comdty", ""]])
+		try:
+			report = reconcile_security_data_file("futures", file_path, delimiter="|")
+		finally:
+			os.remove(file_path)
+		self.assertEqual(report["rejected"], 1)
+		self.assertEqual(report["delete"], 2)
+		self.assertFalse(report["applied"])
+		self.assertEqual(get_futures_info("TYM1 Comdty")["ticker"], "TYM1 Comdty")
+		#-- 3. keys differ only in case are not applied, with both joins
+		file_path = self._write_delimited_file(columns, rows[0:3] + [["tym1 comdty 4", "US", "1", "1"]])
+		try:
+			for hash_join_max_rows in [None, 1]:
+				report = controller.reconcile_security_data_file("futures", file_path, "|", "utf-8", 1000, \
+									False, hash_join_max_rows)
+				self.assertEqual(report["conflict"], 1)
+				self.assertFalse(report["applied"])
+		finally:
+			os.remove(file_path)
+		self.assertEqual(get_futures_info("TYM1 Comdty 4")["ticker"], "TYM1 Comdty 4")
+		#-- 4. unknown table
+		with self.assertRaises(ValueError):
+			reconcile_security_data_file("otc_counter_parties", file_path)
+
 	def _get_test_futures(self):
 		security_info = {
 			"ticker" : "TYM1 Comdty",
@@ -464,6 +1090,50 @@ class TestFactSetData(unittest2.TestCase):
 		with self.assertRaises(ValueError):
 			update_fixed_deposit_info(security_info)
 
+	def test_add_update_fixed_deposit_info_many(self):
+		#-- preparation by adding 1 fixed deposit
+		add_fixed_deposit_info(self._get_test_fixed_deposit())
+		#-- 1. add new, existing, repeated and invalid records
+		security_info3 = self._get_test_fixed_deposit2()
+		security_info3["geneva_id"] = "HSBC Fixed Deposit 0.8 01/01/2021"
+		security_info3["geneva_counter_party"] = "HSBC"
+		invalid_info = self._get_test_fixed_deposit2()
+		invalid_info["interest_rate"] = "abc"
+		report = add_fixed_deposit_info_many([
+			self._get_test_fixed_deposit(),
+			self._get_test_fixed_deposit2(),
+			invalid_info,
+			security_info3,
+			self._get_test_fixed_deposit2()
+		], chunk_size=2)
+		self.assertEqual(report["inserted"], ["IB Fixed Deposit 0.555 01/01/2021", \
+											"HSBC Fixed Deposit 0.8 01/01/2021"])
+		self.assertEqual(report["duplicate"], ["IB Fixed Deposit 0.651 07/08/2021", \
+											"IB Fixed Deposit 0.555 01/01/2021"])
+		self.assertEqual(report["counter_parties_added"], 1)
+		self.assertEqual([i["index"] for i in report["invalid"]], [2])
+		d = get_all_counter_party_info()
+		self.assertEqual(sorted(c["geneva_counter_party"] for c in d), ["HSBC", "IB"])
+		#-- 2. roll the rate and maturity, different columns in one list
+		report = update_fixed_deposit_info_many([
+			{"geneva_id" : "IB Fixed Deposit 0.651 07/08/2021", "interest_rate" : 0.8, \
+				"maturity_date" : "2021-10-08"},
+			{"geneva_id" : "IB Fixed Deposit 0.555 01/01/2021", "interest_rate" : 0.6},
+			{"geneva_id" : "not exist", "interest_rate" : 0.6},
+			{"geneva_id" : "IB Fixed Deposit 0.555 01/01/2021", "interest_rate" : "abc"}
+		], chunk_size=2)
+		self.assertEqual(report["updated"], ["IB Fixed Deposit 0.651 07/08/2021", \
+											"IB Fixed Deposit 0.555 01/01/2021"])
+		self.assertEqual(report["not_found"], ["not exist"])
+		self.assertEqual([i["index"] for i in report["invalid"]], [3])
+		d = get_fixed_deposit_info("IB Fixed Deposit 0.651 07/08/2021")
+		self.assertEqual(d["interest_rate"], 0.8)
+		self.assertEqual(d["maturity_date"], "2021-10-08")
+		self.assertEqual(d["starting_date"], "2021-01-08")
+		d = get_fixed_deposit_info("IB Fixed Deposit 0.555 01/01/2021")
+		self.assertEqual(d["interest_rate"], 0.6)
+		self.assertEqual(d["maturity_date"], "2021-01-31")
+
 	def _get_test_fixed_deposit(self):
 		security_info = {
 			"geneva_id" : "IB Fixed Deposit 0.651 07/08/2021",
@@ -547,6 +1217,33 @@ class TestFactSetData(unittest2.TestCase):
 			con.close()
 		self.assertEqual(count, 1)
 
+	def test_add_fx_forward_info_many(self):
+		#-- preparation by adding 1 fx forward
+		add_fx_forward_info(self._get_test_fx_forward())
+		self.assertEqual(len(get_all_counter_party_info()), 1)
+		#-- 1. new, existing, repeated and invalid records
+		invalid_info = self._get_test_fx_forward2()
+		invalid_info["factset_id"] = ""
+		report = add_fx_forward_info_many([
+			self._get_test_fx_forward2(),
+			self._get_test_fx_forward(),
+			self._get_test_fx_forward3(),
+			self._get_test_fx_forward2(),
+			invalid_info
+		], chunk_size=2)
+		self.assertEqual(report["inserted"], ["FXForward_000002", "FXForward_000003"])
+		self.assertEqual(report["duplicate"], ["FXForward_1163847", "FXForward_000002"])
+		self.assertEqual(report["counter_parties_added"], 1)
+		self.assertEqual([i["index"] for i in report["invalid"]], [4])
+		self.assertEqual(get_fx_forward_info("FXForward_000003")["forward_rate"], 5.01)
+		#-- 2. the counter parties are added once for the list
+		d = get_all_counter_party_info()
+		self.assertEqual(sorted(c["geneva_counter_party"] for c in d), ["INST-FI", "diff-counter-party"])
+		self.assertTrue(all(c["geneva_party_type"] == "FX Forward" for c in d))
+		#-- 3. invalid input
+		with self.assertRaises(ValueError):
+			add_fx_forward_info_many(self._get_test_fx_forward())
+
 	def test_get_fx_forward_info(self):
 		#-- preparation by adding 2 securities
 		security_info = self._get_test_fx_forward()
@@ -624,6 +1321,24 @@ class TestFactSetData(unittest2.TestCase):
 		with self.assertRaises(ValueError):
 			update_fx_forward_info(security_info)
 
+	def test_upsert_fx_forward_info(self):
+		#-- 1. insert the fx forward and its counter party
+		security_info = self._get_test_fx_forward()
+		self.assertEqual(upsert_fx_forward_info(security_info), 0)
+		d = get_all_counter_party_info()
+		self.assertEqual(len(d), 1)
+		self.assertEqual(d[0]["geneva_counter_party"], "INST-FI")
+		self.assertEqual(d[0]["geneva_party_type"], "FX Forward")
+		#-- 2. update the fx forward and add another one
+		security_info = self._get_test_fx_forward()
+		security_info["forward_rate"] = 6.7
+		report = upsert_fx_forward_info_many([security_info, self._get_test_fx_forward2()])
+		self.assertEqual(report["upserted"], 2)
+		self.assertEqual(report["invalid"], [])
+		self.assertEqual(get_fx_forward_info("FXForward_1163847")["forward_rate"], 6.7)
+		#--    only the counter party of the second fx forward is added
+		self.assertEqual(len(get_all_counter_party_info()), 2)
+
 	def _get_test_fx_forward(self):
 		security_info = {
 			"factset_id" : "FXForward_1163847",
@@ -720,6 +1435,61 @@ class TestFactSetData(unittest2.TestCase):
 		self.assertEqual(d[1]["geneva_party_name"], "test geneva_party_name")
 		self.assertEqual(d[1]["bloomberg_ticker"], "test bloomberg_ticker")
 
+	def test_get_all_counter_party_info_snapshot(self):
+		#-- 1. repeated calls are served from the snapshot
+		self.assertEqual(get_all_counter_party_info(), [])
+		self.assertEqual(get_all_counter_party_info(), [])
+		self.assertIsNotNone(controller.otc_counter_party_services.snapshot.get())
+		#-- 2. counter party added by add_fx_forward_info outdates the snapshot
+		security_info = self._get_test_fx_forward()
+		add_fx_forward_info(security_info)
+		d = get_all_counter_party_info()
+		self.assertEqual(len(d), 1)
+		self.assertEqual(d[0]["geneva_party_type"], "FX Forward")
+		#-- 3. modifying the returned list does not change the snapshot
+		d[0]["geneva_party_name"] = "modified"
+		d.append({})
+		d = get_all_counter_party_info()
+		self.assertEqual(len(d), 1)
+		self.assertNotEqual(d[0]["geneva_party_name"], "modified")
+		#-- 4. update outdates the snapshot
+		update_counter_party_info({
+			"geneva_counter_party" : d[0]["geneva_counter_party"],
+			"geneva_party_type" : "FX Forward",
+			"geneva_party_name" : "updated name"
+		})
+		self.assertEqual(get_all_counter_party_info()[0]["geneva_party_name"], "updated name")
+
+	def test_get_counter_parties(self):
+		#-- preparation by adding 3 counter parties
+		add_counter_party_info(self._get_test_counter_party())
+		add_counter_party_info(self._get_test_counter_party2())
+		counter_party = self._get_test_counter_party2()
+		counter_party["geneva_counter_party"] = "INST-FI2"
+		add_counter_party_info(counter_party)
+		#-- 1. pages in the order of id
+		d = get_counter_parties(limit=2)
+		self.assertEqual([c["geneva_counter_party"] for c in d], ["BNP-REPO", "INST-FI"])
+		self.assertEqual(d[0]["geneva_party_name"], "Industrial Bank of China")
+		d = get_counter_parties(after=d[-1]["id"], limit=2)
+		self.assertEqual([c["geneva_counter_party"] for c in d], ["INST-FI2"])
+		self.assertEqual(get_counter_parties(after=d[-1]["id"]), [])
+		#-- 2. filtered by party type
+		d = get_counter_parties(Constants.COUNTER_PARTY_SECURITY_TYPE_FIXED_DEPOSIT, limit=1)
+		self.assertEqual([c["geneva_counter_party"] for c in d], ["INST-FI"])
+		d = get_counter_parties(Constants.COUNTER_PARTY_SECURITY_TYPE_FIXED_DEPOSIT, d[-1]["id"], 1)
+		self.assertEqual([c["geneva_counter_party"] for c in d], ["INST-FI2"])
+		self.assertEqual(get_counter_parties(Constants.COUNTER_PARTY_SECURITY_TYPE_FX_FORWARD), [])
+		#-- 3. generator reads all pages
+		self.assertEqual([c["geneva_counter_party"] for c in iter_counter_parties(page_size=1)], \
+						["BNP-REPO", "INST-FI", "INST-FI2"])
+		self.assertEqual(len(list(iter_counter_parties("Fixed Deposit", page_size=2))), 2)
+		#-- 4. invalid input
+		with self.assertRaises(ValueError):
+			get_counter_parties("Bond")
+		with self.assertRaises(ValueError):
+			get_counter_parties(limit=0)
+
 	def test_update_counter_party_info(self):
 		#-- preparation by adding 2 securities
 		security_info = self._get_test_counter_party()
@@ -887,6 +1657,52 @@ class TestFactSetData(unittest2.TestCase):
 		#-- 3. missing input
 		with self.assertRaises(ValueError):
 			get_security_attribute("","")
+		#-- 4. only the given fields are returned
+		d = get_security_attribute("ISIN", "XS1936784161", \
+				fields=["country_of_risk", "s_p_rating", "first_year_default_probability"])
+		self.assertEqual(d, {
+			"country_of_risk" : "CN",
+			"s_p_rating" : "BBB+",
+			"first_year_default_probability" : 0.000172683
+		})
+		self.assertEqual(get_security_attribute("ISIN", "wrong value", fields=["s_p_rating"]), {})
+		#-- the same fields in another order share the projection and are
+		#-- returned in the order given
+		projection_count = controller.security_attribute_services.projections.stats()["size"]
+		d = get_security_attribute("ISIN", "XS1936784161", \
+				fields=["first_year_default_probability", "country_of_risk", "s_p_rating"])
+		self.assertEqual(list(d.keys()), ["first_year_default_probability", "country_of_risk", "s_p_rating"])
+		self.assertEqual(controller.security_attribute_services.projections.stats()["size"], projection_count)
+		#-- 5. invalid fields
+		with self.assertRaises(ValueError):
+			get_security_attribute("ISIN", "XS1936784161", fields=["created_by"])
+		with self.assertRaises(ValueError):
+			get_security_attribute("ISIN", "XS1936784161", fields=[])
+		with self.assertRaises(ValueError):
+			get_security_attribute("ISIN", "XS1936784161", fields="s_p_rating")
+
+	def test_get_security_attributes_many(self):
+		#-- preparation by adding 2 securities
+		security_info = self._get_test_security_attribute()
+		add_security_attribute(security_info)
+		security_info = self._get_test_security_attribute2()
+		add_security_attribute(security_info)
+		#-- 1. found pairs are keyed by (security_id_type, security_id)
+		pair = ("ISIN", "XS1936784161")
+		pair2 = (security_info["security_id_type"], security_info["security_id"])
+		d = get_security_attributes_many([pair, ["ISIN", "wrong value"], pair2, pair])
+		self.assertEqual(sorted(d.keys()), sorted([pair, pair2]))
+		self.assertEqual(d[pair], get_security_attribute(*pair))
+		self.assertEqual(d[pair2]["security_id"], security_info["security_id"])
+		#-- 2. empty list
+		self.assertEqual(get_security_attributes_many([]), {})
+		#-- 3. invalid input
+		with self.assertRaises(ValueError):
+			get_security_attributes_many([("ISIN", "")])
+		with self.assertRaises(ValueError):
+			get_security_attributes_many([("ISIN", "XS1936784161", "N")])
+		with self.assertRaises(ValueError):
+			get_security_attributes_many(pair)
 
 	def test_update_security_attribute(self):
 		#-- preparation by adding 2 securities
@@ -1002,6 +1818,103 @@ class TestFactSetData(unittest2.TestCase):
 		with self.assertRaises(SecurityAttributeNotExistError):
 			update_security_attribute(security_info)
 
+	def test_upsert_security_attribute(self):
+		#-- 1. insert with only the required attributes
+		security_info = {
+			"security_id_type" : "ISIN",
+			"security_id" : "XS1936784161"
+		}
+		self.assertEqual(upsert_security_attribute(security_info), 0)
+		#-- 2. update with all the attributes, the other records are inserted
+		report = upsert_security_attribute_many([self._get_test_security_attribute(), \
+						self._get_test_security_attribute2()], chunk_size=1)
+		self.assertEqual(report["upserted"], 2)
+		d = get_security_attribute("ISIN", "XS1936784161")
+		self.assertEqual(d["gics_sector"], "Financials")
+		self.assertEqual(d["trading_volume_90_days"], 24634300)
+		self.assertEqual(get_security_attribute("Ticker", "Ticker Test 1")["gics_industry_group"], \
+						"Banks Test 1")
+		#-- 3. unknown security_id_type
+		security_info = {
+			"security_id_type" : "Unknown Type",
+			"security_id" : "XS1936784161"
+		}
+		with self.assertRaises(ValueError):
+			upsert_security_attribute(security_info)
+
+	def test_load_security_attribute_file(self):
+		#-- preparation by adding 1 security
+		add_security_attribute(self._get_test_security_attribute2())
+		#-- 1. new, existing, invalid and malformed rows in one file
+		security_info = self._get_test_security_attribute()
+		security_info2 = self._get_test_security_attribute2()
+		security_info2["s_p_rating"] = "AA"
+		columns = list(security_info.keys())
+		rows = [
+			[str(security_info[column]) for column in columns],
+			[str(security_info2.get(column, "")) for column in columns],
+			["ISIN", ""] + [""] * (len(columns) - 2),
+			["ISIN", "XS0000000000"]
+		]
+		fd, file_path = tempfile.mkstemp(suffix=".csv")
+		try:
+			with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+				f.write("|".join(columns) + "\n")
+				for row in rows:
+					f.write("|".join(row) + "\n")
+			report = load_security_attribute_file(file_path, delimiter="|", chunk_size=1)
+		finally:
+			os.remove(file_path)
+		self.assertEqual(report["rows"], 4)
+		self.assertEqual(report["upserted"], 2)
+		self.assertEqual(report["rejected"], 2)
+		self.assertEqual([r["line"] for r in report["rejected_rows"]], [4, 5])
+		self.assertIn("security_id", report["rejected_rows"][0]["errors"])
+		self.assertIn("rows_per_second", report)
+		#-- 2. verify the loaded rows
+		d = get_security_attribute("ISIN", "XS1936784161")
+		self.assertEqual(d["parent_symbol_chinese_name"], "中央匯金投資有限責任公司")
+		self.assertEqual(d["trading_volume_90_days"], 24634300)
+		d = get_security_attribute(security_info2["security_id_type"], security_info2["security_id"])
+		self.assertEqual(d["s_p_rating"], "AA")
+		#-- 3. an empty numeric value overwrites the stored value with NULL
+		security_info["trading_volume_90_days"] = ""
+		file_path = self._write_delimited_file(columns, [[str(security_info[column]) for column in columns]])
+		try:
+			report = load_security_attribute_file(file_path, delimiter="|")
+		finally:
+			os.remove(file_path)
+		self.assertEqual(report["written"], 1)
+		d = get_security_attribute("ISIN", "XS1936784161")
+		self.assertIsNone(d["trading_volume_90_days"])
+		self.assertEqual(d["gics_sector"], "Financials")
+
+	def test_reconcile_security_attribute_file(self):
+		#-- preparation by adding 2 securities
+		security_info = self._get_test_security_attribute()
+		security_info2 = self._get_test_security_attribute2()
+		add_security_attribute(dict(security_info))
+		add_security_attribute(dict(security_info2))
+		#-- 1. the first security is not in the file, the second one is changed
+		#-- and the third one is new. sorted in runs of 1 row and merge joined
+		security_info2["s_p_rating"] = "AA"
+		security_info3 = dict(security_info, security_id="XS0000000001")
+		columns = list(security_info.keys())
+		rows = [[str(info.get(column, "")) for column in columns] for info in [security_info3, security_info2]]
+		file_path = self._write_delimited_file(columns, rows)
+		try:
+			report = controller.reconcile_security_data_file("security_attributes", file_path, "|", \
+								"utf-8", 1, False, hash_join_max_rows=1)
+		finally:
+			os.remove(file_path)
+		self.assertEqual(report["join"], "merge")
+		self.assertEqual([report[k] for k in ["insert", "update", "delete", "unchanged"]], [1, 1, 1, 0])
+		#-- 2. verify the table
+		self.assertEqual(get_security_attribute("ISIN", "XS1936784161"), {})
+		self.assertEqual(get_security_attribute("ISIN", "XS0000000001")["trading_volume_90_days"], 24634300)
+		d = get_security_attribute(security_info2["security_id_type"], security_info2["security_id"])
+		self.assertEqual(d["s_p_rating"], "AA")
+
 	def _get_test_security_attribute(self):
 		security_info = {
 			"security_id_type" : "ISIN",
@@ -0,0 +1,58 @@
+# coding=utf-8
+#
+#-- requires pyarrow, which is an optional dependency of this package
+import os
+import tempfile
+import pyarrow as pa
+import pyarrow.parquet as pq
+from security_data.utils.batch import chunked
+
+#-- file extension of each supported format
+FORMATS = {
+	"parquet" : ".parquet",
+	"arrow" : ".arrow"
+}
+
+#-- numeric columns are float64, other columns are string
+def get_arrow_schema(column_names, numeric_column_names):
+	return pa.schema([(column_name, pa.float64() if column_name in numeric_column_names else pa.string()) \
+						for column_name in column_names])
+
+#-- write rows, an iterable of dictionary, to a parquet or arrow ipc file
+#-- with row_group_size rows per row group or record batch, so that at most
+#-- row_group_size rows are in memory. the file is written to a temporary
+#-- file and renamed to file_path. return the number of rows written
+def write_arrow_file(file_path, file_format, column_names, numeric_column_names, rows, row_group_size):
+	schema = get_arrow_schema(column_names, numeric_column_names)
+	directory = os.path.dirname(os.path.abspath(file_path))
+	fd, temp_path = tempfile.mkstemp(prefix=".export-", dir=directory)
+	os.close(fd)
+	count = 0
+	try:
+		if file_format == "parquet":
+			writer = pq.ParquetWriter(temp_path, schema)
+			write = writer.write_table
+			to_arrow = pa.Table.from_pydict
+		else:
+			sink = pa.OSFile(temp_path, "wb")
+			writer = pa.ipc.new_file(sink, schema)
+			write = writer.write_batch
+			to_arrow = pa.RecordBatch.from_pydict
+		try:
+			for chunk in chunked(rows, row_group_size):
+				columns = {column_name : [row[column_name] for row in chunk] for column_name in column_names}
+				write(to_arrow(columns, schema=schema))
+				count += len(chunk)
+			if count == 0:
+				#-- write an empty row group so that the file has the schema
+				write(to_arrow({column_name : [] for column_name in column_names}, schema=schema))
+		finally:
+			writer.close()
+			if file_format != "parquet":
+				sink.close()
+		os.chmod(temp_path, 0o644)
+		os.replace(temp_path, file_path)
+	except BaseException:
+		os.remove(temp_path)
+		raise
+	return count
@@ -0,0 +1,14 @@
+# coding=utf-8
+# 
+from itertools import islice
+
+#-- split an iterable into lists of at most size items
+def chunked(items, size):
+	if size <= 0:
+		raise ValueError("chunk size must be positive: " + str(size))
+	iterator = iter(items)
+	while True:
+		chunk = list(islice(iterator, size))
+		if not chunk:
+			return
+		yield chunk
@@ -0,0 +1,52 @@
+# coding=utf-8
+# 
+import math
+import threading
+from hashlib import blake2b
+
+#-- bloom filter of string keys. "not in" answers are always correct while
+#-- "in" answers are wrong with probability false_positive_rate as long as
+#-- no more than capacity keys are added
+class BloomFilter:
+
+	def __init__(self, capacity, false_positive_rate):
+		if capacity <= 0:
+			raise ValueError("capacity of bloom filter must be positive: " + str(capacity))
+		if not 0 < false_positive_rate < 1:
+			raise ValueError("false_positive_rate must be between 0 and 1: " + \
+								str(false_positive_rate))
+		self.capacity = capacity
+		self.false_positive_rate = false_positive_rate
+		#-- optimal number of bits and hash functions for the given capacity
+		self.num_bits = max(8, int(math.ceil(-capacity * math.log(false_positive_rate) / \
+								(math.log(2) ** 2))))
+		self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+		self.count = 0
+		self._bits = bytearray((self.num_bits + 7) // 8)
+		self._lock = threading.Lock()
+
+	def _positions(self, key):
+		#-- double hashing: h1 + i * h2 gives num_hashes independent positions
+		digest = blake2b(key.encode("utf-8"), digest_size=16).digest()
+		h1 = int.from_bytes(digest[:8], "little")
+		h2 = int.from_bytes(digest[8:], "little") | 1
+		return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+	def add(self, key):
+		positions = self._positions(key)
+		#-- setting a bit is a read-modify-write of a byte, guard it so that
+		#-- concurrent adds cannot lose a bit
+		with self._lock:
+			for position in positions:
+				self._bits[position >> 3] |= 1 << (position & 7)
+			self.count += 1
+
+	def __contains__(self, key):
+		bits = self._bits
+		for position in self._positions(key):
+			if not bits[position >> 3] & (1 << (position & 7)):
+				return False
+		return True
+
+	def is_saturated(self):
+		return self.count > self.capacity
@@ -0,0 +1,114 @@
+# coding=utf-8
+# 
+import threading
+import time
+from collections import OrderedDict
+
+#-- in-process read-through cache with a size bound and an optional TTL.
+#-- the least recently used entry is evicted once max_size is reached.
+#-- all operations are guarded by a lock so the cache can be shared by threads.
+#-- invalidate and clear bump a generation counter, a reader reads the
+#-- generation before loading a value and the value is not cached if a
+#-- write happened while it was being loaded, as it may be outdated
+class LruCache:
+
+	def __init__(self, max_size, ttl=None):
+		if max_size <= 0:
+			raise ValueError("max_size of cache must be positive: " + str(max_size))
+		self.max_size = max_size
+		#-- ttl in seconds, None means entries never expire
+		self.ttl = ttl
+		self._entries = OrderedDict()
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self.expirations = 0
+		self.generation = 0
+		self.stale_puts = 0
+
+	#-- return the cached value or None if not cached or expired
+	def get(self, key):
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is None:
+				self.misses += 1
+				return None
+			value, expire_at = entry
+			if expire_at is not None and expire_at <= time.monotonic():
+				del self._entries[key]
+				self.expirations += 1
+				self.misses += 1
+				return None
+			self._entries.move_to_end(key)
+			self.hits += 1
+			return value
+
+	#-- generation is the one read before loading the value, the value is
+	#-- discarded if an invalidation happened while it was being loaded
+	def put(self, key, value, generation):
+		expire_at = None
+		if self.ttl is not None:
+			expire_at = time.monotonic() + self.ttl
+		with self._lock:
+			if generation != self.generation:
+				self.stale_puts += 1
+				return
+			if key in self._entries:
+				self._entries.move_to_end(key)
+			self._entries[key] = (value, expire_at)
+			while len(self._entries) > self.max_size:
+				self._entries.popitem(last=False)
+				self.evictions += 1
+
+	def invalidate(self, key):
+		with self._lock:
+			self.generation += 1
+			self._entries.pop(key, None)
+
+	def clear(self):
+		with self._lock:
+			self.generation += 1
+			self._entries.clear()
+
+	def stats(self):
+		with self._lock:
+			return {
+				"size" : len(self._entries),
+				"max_size" : self.max_size,
+				"ttl" : self.ttl,
+				"hits" : self.hits,
+				"misses" : self.misses,
+				"evictions" : self.evictions,
+				"expirations" : self.expirations,
+				"stale_puts" : self.stale_puts
+			}
+
+#-- caches one value behind a version counter. writers bump the version and
+#-- the value is only served while no write happened since it was loaded
+class VersionedSnapshot:
+
+	def __init__(self):
+		self.version = 0
+		self._value = None
+		self._value_version = None
+		self._lock = threading.Lock()
+
+	def bump(self):
+		with self._lock:
+			self.version += 1
+
+	#-- return the cached value or None if it is outdated
+	def get(self):
+		with self._lock:
+			if self._value_version == self.version:
+				return self._value
+			return None
+
+	#-- version is the one read before loading the value, the value is
+	#-- discarded if a write happened while it was being loaded
+	def put(self, version, value):
+		with self._lock:
+			if version == self.version:
+				self._value = value
+				self._value_version = version
@@ -0,0 +1,82 @@
+# coding=utf-8
+#
+from sqlalchemy import and_, bindparam, or_, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import DateTime
+from security_data.utils.row_reader import RowReader
+
+#-- current timestamp of the database minus a number of seconds
+class seconds_ago(FunctionElement):
+	type = DateTime()
+	name = "seconds_ago"
+
+@compiles(seconds_ago, "mysql")
+def _compile_seconds_ago_mysql(element, compiler, **kw):
+	return "CURRENT_TIMESTAMP - INTERVAL " + compiler.process(element.clauses, **kw) + " SECOND"
+
+@compiles(seconds_ago, "sqlite")
+def _compile_seconds_ago_sqlite(element, compiler, **kw):
+	return "datetime('now', '-' || " + compiler.process(element.clauses, **kw) + " || ' seconds')"
+
+#-- read the rows changed after a watermark in pages ordered by
+#-- (updated_at, id), served by the index on (updated_at, id). a watermark
+#-- is the (updated_at, id) of the last row read.
+#-- updated_at is set when a row is written, not when the transaction
+#-- commits, so a row can become visible with an updated_at older than rows
+#-- already read. rows updated in the last lag seconds and the current second
+#-- are held back, so no row is skipped as long as lag is longer than the
+#-- longest write transaction. deleted rows are not captured
+class ChangeReader:
+
+	def __init__(self, row_reader):
+		table = row_reader.table
+		converters = dict(zip(row_reader.column_names, row_reader.converters))
+		converters["id"] = int
+		self.row_reader = RowReader(table, row_reader.column_names + ["id", "updated_at"], converters)
+		updated_at = table.c.updated_at
+		order_by = [updated_at, table.c.id]
+		settled = updated_at < seconds_ago(bindparam("lag"))
+		self.first_page_statement = self._select(settled, order_by)
+		self.since_statement = self._select(and_(updated_at > bindparam("updated_at"), settled), order_by)
+		#-- the range on updated_at uses the index, the rest is a filter
+		self.after_statement = self._select(and_(updated_at >= bindparam("updated_at"), \
+				or_(updated_at > bindparam("updated_at"), table.c.id > bindparam("id")), settled), order_by)
+		self.high_water_mark_statement = select([updated_at, table.c.id]).where(settled) \
+				.order_by(updated_at.desc(), table.c.id.desc()).limit(1)
+
+	def _select(self, whereclause, order_by):
+		return self.row_reader.select(whereclause).order_by(*order_by).limit(bindparam("limit"))
+
+	#-- watermark is None to read from the first row, a dictionary with
+	#-- updated_at only to read the rows updated after it, or a dictionary
+	#-- with updated_at and id returned by the previous page
+	def read_page(self, session, watermark, limit, lag):
+		if watermark is None:
+			return self.row_reader.read(session, self.first_page_statement, {
+				"limit" : limit,
+				"lag" : lag
+			})
+		if watermark.get("id") is None:
+			return self.row_reader.read(session, self.since_statement, {
+				"updated_at" : watermark["updated_at"],
+				"limit" : limit,
+				"lag" : lag
+			})
+		return self.row_reader.read(session, self.after_statement, {
+			"updated_at" : watermark["updated_at"],
+			"id" : watermark["id"],
+			"limit" : limit,
+			"lag" : lag
+		})
+
+	#-- watermark of the last changed row held back for lag seconds, None if
+	#-- there is no such row
+	def read_high_water_mark(self, session, lag):
+		row = session.connection().execute(self.high_water_mark_statement, {"lag" : lag}).first()
+		if row is None:
+			return None
+		return {
+			"updated_at" : str(row[0]),
+			"id" : int(row[1])
+		}
@@ -0,0 +1,17 @@
+# coding=utf-8
+#
+import unicodedata
+
+#-- the unique keys of the tables are compared with utf8mb4_unicode_ci, which
+#-- ignores case, accents and trailing spaces. two keys with the same folded
+#-- value are the same record for the database, so the in-process lookup
+#-- structures are keyed by the folded value
+def fold(value):
+	value = unicodedata.normalize("NFKD", value.casefold())
+	return "".join(c for c in value if not unicodedata.combining(c)).rstrip(" ")
+
+#-- fold each value of a composite key
+def fold_key(key):
+	if isinstance(key, tuple):
+		return tuple(fold(value) for value in key)
+	return fold(key)
@@ -0,0 +1,143 @@
+# coding=utf-8
+#
+#-- requires numpy, which is an optional dependency of this package
+import sys
+from array import array
+import numpy as np
+
+#-- string column stored as an int32 code per row and the distinct values
+class DictionaryColumn:
+
+	def __init__(self, codes, categories):
+		self.codes = codes
+		self.categories = categories
+
+	def __len__(self):
+		return len(self.codes)
+
+	def __getitem__(self, row):
+		return self.categories[self.codes[row]]
+
+	#-- decode to a numpy array of string
+	def to_numpy(self):
+		return self.categories[self.codes]
+
+	@property
+	def nbytes(self):
+		return self.codes.nbytes + self.categories.nbytes + \
+				sum(sys.getsizeof(value) for value in self.categories)
+
+#-- read only table of numpy columns with an index of key => row number
+class ColumnarTable:
+
+	def __init__(self, column_names, columns, index, list_of_dicts_nbytes):
+		self.column_names = column_names
+		self.columns = columns
+		self.index = index
+		self.list_of_dicts_nbytes = list_of_dicts_nbytes
+
+	def __len__(self):
+		return len(self.index)
+
+	#-- numpy array of a numeric column or DictionaryColumn of a string column
+	def column(self, column_name):
+		return self.columns[column_name]
+
+	#-- row of a key as dictionary, None if not found
+	def get(self, key):
+		row = self.index.get(key)
+		if row is None:
+			return None
+		d = {}
+		for column_name in self.column_names:
+			value = self.columns[column_name][row]
+			#-- numpy scalars are returned as python values, nan as None
+			if isinstance(value, np.generic):
+				value = value.item()
+				if value != value:
+					value = None
+			d[column_name] = value
+		return d
+
+	@property
+	def nbytes(self):
+		return sum(column.nbytes for column in self.columns.values()) + \
+				sys.getsizeof(self.index) + sum(sys.getsizeof(key) for key in self.index)
+
+#-- build a ColumnarTable from a stream of rows. numeric columns are stored
+#-- as float64 with NULL as nan, other columns are dictionary encoded
+class ColumnarTableBuilder:
+
+	def __init__(self, column_names, numeric_column_names, key_names):
+		self.column_names = column_names
+		self.key_names = key_names
+		self.values = {}
+		self.encoders = {}
+		for column_name in column_names:
+			if column_name in numeric_column_names:
+				self.values[column_name] = array("d")
+			else:
+				self.values[column_name] = array("i")
+				self.encoders[column_name] = {}
+		self.index = {}
+		#-- size of the same rows as list of dictionary, for comparison
+		self.list_of_dicts_nbytes = sys.getsizeof([])
+
+	def append(self, row):
+		if len(self.key_names) == 1:
+			key = row[self.key_names[0]]
+		else:
+			key = tuple(row[key_name] for key_name in self.key_names)
+		self.index[key] = len(self.index)
+		for column_name in self.column_names:
+			value = row[column_name]
+			encoder = self.encoders.get(column_name)
+			if encoder is None:
+				self.values[column_name].append(np.nan if value is None else value)
+			else:
+				code = encoder.get(value)
+				if code is None:
+					code = encoder[value] = len(encoder)
+				self.values[column_name].append(code)
+		self.list_of_dicts_nbytes += 8 + sys.getsizeof(row) + \
+				sum(sys.getsizeof(value) for value in row.values())
+
+	def build(self):
+		columns = {}
+		for column_name in self.column_names:
+			values = self.values[column_name]
+			encoder = self.encoders.get(column_name)
+			if encoder is None:
+				columns[column_name] = np.array(values, dtype=np.float64)
+			else:
+				categories = np.empty(len(encoder), dtype=object)
+				for value, code in encoder.items():
+					categories[code] = value
+				columns[column_name] = DictionaryColumn(np.array(values, dtype=np.int32), categories)
+		return ColumnarTable(self.column_names, columns, self.index, self.list_of_dicts_nbytes)
+
+#-- columnar copy of security_base keyed by geneva_id and security_attributes
+#-- keyed by (security_id_type, security_id)
+class SecuritySnapshot:
+
+	def __init__(self, security_base, security_attributes):
+		self.security_base = security_base
+		self.security_attributes = security_attributes
+
+	def get_security_basic_info(self, geneva_id):
+		return self.security_base.get(geneva_id)
+
+	def get_security_attribute(self, security_id_type, security_id):
+		return self.security_attributes.get((security_id_type, security_id))
+
+	#-- bytes used by the snapshot and by the same rows as list of dictionary
+	def memory_usage(self):
+		usage = {}
+		for table_name, table in [("security_base", self.security_base), \
+								("security_attributes", self.security_attributes)]:
+			usage[table_name] = {
+				"rows" : len(table),
+				"snapshot_bytes" : table.nbytes,
+				"list_of_dicts_bytes" : table.list_of_dicts_nbytes
+			}
+		return usage
@@ -0,0 +1,124 @@
+# coding=utf-8
+#
+import hashlib
+import threading
+from sqlalchemy import select
+from security_data.utils.batch import chunked
+from security_data.utils.collation import fold_key
+from security_data.utils.upsert import update_by_key
+
+#-- columns not hashed, timestamp is the time of the load rather than content
+EXCLUDED_COLUMNS = ["timestamp"]
+#-- separator of the values and marker of NULL in the hashed text
+SEPARATOR = "\x1f"
+NULL = "\x00"
+#-- max number of keys in one query of the stored hashes
+QUERY_CHUNK_SIZE = 1000
+
+#-- hash of the business columns of a record stored in content_hash, so that
+#-- a write of a record identical to the stored row is skipped. numeric
+#-- values are hashed as float so that 1, 1.0 and "1.0" are the same.
+#-- a record without all the business columns has no hash, it is written and
+#-- the stored hash is set to NULL
+class ContentHasher:
+
+	def __init__(self, row_reader, key_columns):
+		self.table = row_reader.table
+		self.key_columns = key_columns
+		self.column_names = [c for c in row_reader.column_names if c not in EXCLUDED_COLUMNS]
+		self.numeric_column_names = set(row_reader.numeric_column_names)
+		self.lock = threading.Lock()
+		self.written = 0
+		self.skipped = 0
+
+	def get_hash(self, record):
+		values = []
+		for column_name in self.column_names:
+			if column_name not in record:
+				return None
+			value = record[column_name]
+			if value is None:
+				values.append(NULL)
+			elif column_name in self.numeric_column_names:
+				values.append(repr(float(value)))
+			else:
+				values.append(str(value))
+		return hashlib.blake2b(SEPARATOR.join(values).encode("utf-8"), digest_size=16).hexdigest()
+
+	def get_key(self, record):
+		if len(self.key_columns) == 1:
+			return record[self.key_columns[0]]
+		return tuple(record[c] for c in self.key_columns)
+
+	#-- folded key => content_hash of the stored rows of the records. as in
+	#-- the database, a key that differs only in case or accents matches
+	def query_stored_hashes(self, session, records):
+		keys = list(dict.fromkeys(self.get_key(record) for record in records))
+		columns = [self.table.c[c] for c in self.key_columns]
+		stored = {}
+		for chunk in chunked(keys, QUERY_CHUNK_SIZE):
+			statement = select(columns + [self.table.c.content_hash])
+			if len(self.key_columns) == 1:
+				statement = statement.where(columns[0].in_(chunk))
+			else:
+				#-- in on each key column selects a superset, matched below
+				for i, column in enumerate(columns):
+					statement = statement.where(column.in_(set(key[i] for key in chunk)))
+			chunk_keys = set(fold_key(key) for key in chunk)
+			for row in session.execute(statement):
+				key = row[0] if len(self.key_columns) == 1 else tuple(row[0:len(self.key_columns)])
+				key = fold_key(key)
+				if key in chunk_keys:
+					stored[key] = row[-1]
+		return stored
+
+	#-- the records to write with content_hash set, skipping the records
+	#-- identical to the stored rows, and the stored hashes by folded key. the
+	#-- keys of the stored hashes are the records that exist
+	def find_changed(self, session, records):
+		stored = self.query_stored_hashes(session, records)
+		changed = []
+		skipped = 0
+		for record in records:
+			content_hash = self.get_hash(record)
+			if content_hash is not None and stored.get(fold_key(self.get_key(record))) == content_hash:
+				skipped += 1
+			else:
+				changed.append(dict(record, content_hash=content_hash))
+		self.add_skipped(skipped)
+		return changed, stored
+
+	#-- update one record by key, skipped if identical to the stored row.
+	#-- return False if the record does not exist
+	def update(self, session, record):
+		content_hash = self.get_hash(record)
+		if content_hash is None:
+			#-- one UPDATE, the number of rows matched tells whether the
+			#-- record exists
+			if update_by_key(session, self.table, [dict(record, content_hash=None)], self.key_columns) == 0:
+				return False
+		else:
+			stored = self.query_stored_hashes(session, [record])
+			key = fold_key(self.get_key(record))
+			if key not in stored:
+				return False
+			if stored[key] == content_hash:
+				self.add_skipped(1)
+				return True
+			update_by_key(session, self.table, [dict(record, content_hash=content_hash)], self.key_columns)
+		self.add_written(1)
+		return True
+
+	def add_written(self, count):
+		with self.lock:
+			self.written += count
+
+	def add_skipped(self, count):
+		with self.lock:
+			self.skipped += count
+
+	def stats(self):
+		return {
+			"written" : self.written,
+			"skipped" : self.skipped
+		}
@@ -3,6 +3,8 @@
 from os.path import abspath, dirname, join
 
 import configparser
+import threading
+from contextlib import contextmanager
 from sqlalchemy import create_engine
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
@@ -13,6 +15,11 @@ getCurrentDirectory = lambda : \
 
 class DBConn:
 
+	#-- engines created by get_db, one per mode. an engine holds a connection
+	#-- pool so it is reused instead of creating a new one on every call
+	engines = {}
+	lock = threading.Lock()
+
 	#-- return a db engine based on the given mode
 	@staticmethod
 	def get_db(mode):
@@ -21,6 +28,26 @@ class DBConn:
 				mode != Constants.DBMODE_PRODUCTION:
 			message = "Unkown database mode: " + str(mode)
 			raise Exception(message)
+		with DBConn.lock:
+			engine = DBConn.engines.get(mode)
+			if engine is None:
+				engine = DBConn._create_engine(mode)
+				DBConn.engines[mode] = engine
+		return engine
+
+	#-- close the pooled connections of the given mode, all modes if None.
+	#-- get_db creates a new engine afterwards
+	@staticmethod
+	def dispose(mode=None):
+		with DBConn.lock:
+			modes = list(DBConn.engines.keys()) if mode is None else [mode]
+			for m in modes:
+				engine = DBConn.engines.pop(m, None)
+				if engine is not None:
+					engine.dispose()
+
+	@staticmethod
+	def _create_engine(mode):
 		config = configparser.ConfigParser()
 		config.read( join(getCurrentDirectory(), "..", "database_config.ini") )
 		#-- default is test database
@@ -34,7 +61,70 @@ class DBConn:
 		host = config.get(config_section, 'host')
 		port = config.get(config_section, 'port')
 		dbname = config.get(config_section, 'dbname')
+		#-- connection pool settings, sqlalchemy defaults if not configured
+		pool_size = config.getint(config_section, 'pool_size', fallback=5)
+		max_overflow = config.getint(config_section, 'max_overflow', fallback=10)
+		pool_timeout = config.getint(config_section, 'pool_timeout', fallback=30)
+		#-- recycle connections before mysql wait_timeout closes them
+		pool_recycle = config.getint(config_section, 'pool_recycle', fallback=3600)
+		pool_pre_ping = config.getboolean(config_section, 'pool_pre_ping', fallback=True)
 		#-- convert port to a string
 		conn_string = "mysql+mysqlconnector://" + username + ":" + password + "@" + host + ":" + str(port) + "/" + dbname
-		engine = create_engine(conn_string)
+		engine = create_engine(conn_string,
+								pool_size=pool_size,
+								max_overflow=max_overflow,
+								pool_timeout=pool_timeout,
+								pool_recycle=pool_recycle,
+								pool_pre_ping=pool_pre_ping)
 		return engine
+
+#-- one session factory per controller. the service calls made inside
+#-- transaction() in the same thread share one session and are committed once
+#-- at the end, otherwise each service call uses its own session
+class SessionManager:
+
+	def __init__(self, db):
+		self.db = db
+		self.session_factory = sessionmaker(bind=db)
+		self._local = threading.local()
+
+	def in_transaction(self):
+		return getattr(self._local, "session", None) is not None
+
+	#-- return the session of the current transaction or a new session
+	def get_session(self):
+		session = getattr(self._local, "session", None)
+		if session is None:
+			session = self.session_factory()
+		return session
+
+	#-- the session of a transaction is only flushed, it is committed at the
+	#-- end of transaction()
+	def commit(self, session):
+		if session is getattr(self._local, "session", None):
+			session.flush()
+		else:
+			session.commit()
+
+	def close(self, session):
+		if session is not getattr(self._local, "session", None):
+			session.close()
+
+	#-- commit once at the end, rollback if an exception is raised.
+	#-- a nested transaction() joins the outer one
+	@contextmanager
+	def transaction(self):
+		if self.in_transaction():
+			yield self._local.session
+			return
+		session = self.session_factory()
+		self._local.session = session
+		try:
+			yield session
+			session.commit()
+		except BaseException:
+			session.rollback()
+			raise
+		finally:
+			self._local.session = None
+			session.close()
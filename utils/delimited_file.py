@@ -0,0 +1,17 @@
+# coding=utf-8
+#
+import csv
+
+#-- read a delimited file with a header row one row at a time, so that the
+#-- memory use does not depend on the file size. yield (line number, row)
+#-- where row is a dictionary of header => value, or None if the row does
+#-- not have the same number of columns as the header
+def read_delimited_file(file_path, delimiter, encoding):
+	with open(file_path, newline="", encoding=encoding) as f:
+		reader = csv.DictReader(f, delimiter=delimiter)
+		for row in reader:
+			#-- DictReader puts extra values under None and fills missing values with None
+			if None in row or None in row.values():
+				yield reader.line_num, None
+			else:
+				yield reader.line_num, row
@@ -53,5 +53,9 @@ class SecurityAttributeAlreadyExistError(Exception):
         super().__init__(msg)
 
 class SecurityAttributeNotExistError(Exception):
+    def __init__(self, msg):
+        super().__init__(msg)
+
+class IdentifierResolverNotEnabledError(Exception):
     def __init__(self, msg):
         super().__init__(msg)
\ No newline at end of file
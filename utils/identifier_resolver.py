@@ -0,0 +1,121 @@
+# coding=utf-8
+#
+import re
+import threading
+
+#-- identifier columns of security_base, in the order tried by resolve
+ID_TYPES = ["geneva_id", "ticker", "isin", "bloomberg_id", "sedol"]
+
+#-- security_id_type of security_attributes and id type names accepted by
+#-- resolve, lower case without space and punctuation => security_base column
+ID_TYPE_ALIASES = {
+	"genevaid" : "geneva_id",
+	"geneva" : "geneva_id",
+	"ticker" : "ticker",
+	"isin" : "isin",
+	"bloombergid" : "bloomberg_id",
+	"bloomberg" : "bloomberg_id",
+	"bbgid" : "bloomberg_id",
+	"sedol" : "sedol"
+}
+
+#-- security_base column of an id type, None if it is not an identifier
+def get_id_column(id_type):
+	return ID_TYPE_ALIASES.get(re.sub("[^a-z0-9]", "", id_type.lower()))
+
+#-- hash maps of every identifier of security_base to geneva_id and the
+#-- (security_id_type, security_id) keys of security_attributes. values are
+#-- matched exactly. an identifier shared by more than one security resolves
+#-- to the one loaded first
+class IdentifierResolver:
+
+	def __init__(self):
+		self.lock = threading.Lock()
+		#-- geneva_id => (ticker, isin, bloomberg_id, sedol)
+		self.identifiers = {}
+		#-- column => value => list of geneva_id
+		self.maps = {column : {} for column in ID_TYPES[1:]}
+		self.security_attribute_keys = set()
+		#-- column => security_id_type of security_attributes for the column
+		self.security_attribute_types = {column : set() for column in ID_TYPES}
+
+	#-- add or replace the identifiers of a security, identifiers is a
+	#-- dictionary with the columns in ID_TYPES
+	def put_security_base(self, identifiers):
+		geneva_id = identifiers["geneva_id"]
+		values = tuple(identifiers[column] for column in ID_TYPES[1:])
+		with self.lock:
+			old_values = self.identifiers.get(geneva_id)
+			if old_values == values:
+				return
+			if old_values is not None:
+				self._remove_values(geneva_id, old_values)
+			self.identifiers[geneva_id] = values
+			for column, value in zip(ID_TYPES[1:], values):
+				#-- lists are replaced instead of modified, readers do not lock
+				self.maps[column][value] = self.maps[column].get(value, []) + [geneva_id]
+
+	def remove_security_base(self, geneva_id):
+		with self.lock:
+			old_values = self.identifiers.pop(geneva_id, None)
+			if old_values is not None:
+				self._remove_values(geneva_id, old_values)
+
+	def _remove_values(self, geneva_id, values):
+		for column, value in zip(ID_TYPES[1:], values):
+			geneva_ids = [g for g in self.maps[column][value] if g != geneva_id]
+			if len(geneva_ids) == 0:
+				del self.maps[column][value]
+			else:
+				self.maps[column][value] = geneva_ids
+
+	def add_security_attribute_key(self, security_id_type, security_id):
+		with self.lock:
+			self.security_attribute_keys.add((security_id_type, security_id))
+			column = get_id_column(security_id_type)
+			if column is not None and security_id_type not in self.security_attribute_types[column]:
+				#-- replaced instead of modified, readers do not lock
+				self.security_attribute_types[column] = \
+					self.security_attribute_types[column] | {security_id_type}
+
+	def remove_security_attribute_key(self, security_id_type, security_id):
+		with self.lock:
+			self.security_attribute_keys.discard((security_id_type, security_id))
+
+	#-- geneva_id of an identifier, None if not found. if id_type is None,
+	#-- value is tried as geneva_id, ticker, isin, bloomberg_id then sedol
+	def resolve(self, value, id_type=None):
+		if id_type is None:
+			columns = ID_TYPES
+		else:
+			column = get_id_column(id_type)
+			if column is None:
+				raise ValueError("Unknown id type: " + id_type)
+			columns = [column]
+		for column in columns:
+			if column == "geneva_id":
+				if value in self.identifiers:
+					return value
+			else:
+				geneva_ids = self.maps[column].get(value)
+				if geneva_ids:
+					return geneva_ids[0]
+		return None
+
+	#-- (security_id_type, security_id) of the security_attributes record of
+	#-- a security, tried in the order of ID_TYPES. None if not found
+	def resolve_security_attribute_key(self, geneva_id):
+		values = self.identifiers.get(geneva_id)
+		if values is None:
+			return None
+		for column, value in zip(ID_TYPES, (geneva_id,) + values):
+			for security_id_type in self.security_attribute_types[column]:
+				if (security_id_type, value) in self.security_attribute_keys:
+					return (security_id_type, value)
+		return None
+
+	def stats(self):
+		return {
+			"securities" : len(self.identifiers),
+			"security_attribute_keys" : len(self.security_attribute_keys)
+		}
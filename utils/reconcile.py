@@ -0,0 +1,230 @@
+# coding=utf-8
+#
+#-- reconcile a table with a complete extract. each record of the extract and
+#-- each row of the table is classified by the unique key as insert, update,
+#-- delete or unchanged, comparing the content hash of the record with the
+#-- stored one. the changes are spilled to temporary files and applied in
+#-- batches after the table is read, so that the memory use is bounded by
+#-- hash_join_max_rows records whatever the size of the table and extract.
+#-- the table is read by pages of id. an extract of at most
+#-- hash_join_max_rows records is joined in memory with the table. otherwise
+#-- the extract and the (key, content_hash) of the table are both sorted in
+#-- runs of hash_join_max_rows records spilled to temporary files, then
+#-- merge joined
+import heapq
+import json
+import tempfile
+from security_data.utils.batch import chunked
+from security_data.utils.collation import fold_key
+from security_data.utils.row_reader import iter_rows_by_id
+from security_data.utils.upsert import update_by_key, delete_by_key
+
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+UNCHANGED = "unchanged"
+
+#-- json lines in a temporary file, removed on close
+class SpillFile:
+
+	def __init__(self):
+		self.file = tempfile.TemporaryFile("w+", encoding="utf-8")
+		self.count = 0
+
+	def write(self, item):
+		self.file.write(json.dumps(item) + "\n")
+		self.count += 1
+
+	def __iter__(self):
+		self.file.seek(0)
+		for line in self.file:
+			yield json.loads(line)
+
+	def close(self):
+		self.file.close()
+
+#-- composite keys are written as json list and compared as tuple
+def _to_key(key):
+	return tuple(key) if isinstance(key, list) else key
+
+#-- order of the runs, the keys the database takes as the same are adjacent
+def _sort_key(key):
+	return (fold_key(key), key)
+
+#-- one reconciliation of a table, close() removes the temporary files
+class Reconciler:
+
+	def __init__(self, session_manager, content_hasher, hash_join_max_rows):
+		self.session_manager = session_manager
+		self.content_hasher = content_hasher
+		self.hash_join_max_rows = hash_join_max_rows
+		self.spills = {INSERT : SpillFile(), UPDATE : SpillFile(), DELETE : SpillFile()}
+		self.runs = []
+		self.stored_runs = []
+
+	#-- classify records, an iterable of validated dictionary, against the
+	#-- table. return the join used and the number of records of each class.
+	#-- the last record of a key repeated in records is kept. keys differ only
+	#-- in case or accents from another key of records are counted as
+	#-- conflict, they cannot be all stored under the unique key
+	def classify(self, records):
+		report = {
+			"join" : None,
+			"duplicate" : 0,
+			"conflict" : 0,
+			INSERT : 0,
+			UPDATE : 0,
+			DELETE : 0,
+			UNCHANGED : 0
+		}
+		buffer = {}
+		for record in records:
+			#-- columns missing in the extract are NULL
+			full_record = dict.fromkeys(self.content_hasher.column_names)
+			full_record.update(record)
+			key = self.content_hasher.get_key(full_record)
+			if key in buffer:
+				report["duplicate"] += 1
+			buffer[key] = full_record
+			if len(buffer) >= self.hash_join_max_rows:
+				self.runs.append(self._write_run(buffer.items()))
+				buffer = {}
+		if len(self.runs) == 0:
+			report["join"] = "hash"
+			report["conflict"] = len(buffer) - len(set(fold_key(key) for key in buffer))
+			changes = self._hash_join(buffer)
+		else:
+			if len(buffer) > 0:
+				self.runs.append(self._write_run(buffer.items()))
+			buffer = None
+			report["join"] = "merge"
+			changes = self._merge_join(self._merge_runs(self.runs, report), self._sort_stored())
+		for change, item in changes:
+			report[change] += 1
+			if change != UNCHANGED:
+				self.spills[change].write(item)
+		self.content_hasher.add_skipped(report[UNCHANGED])
+		return report
+
+	def close(self):
+		for spill in list(self.spills.values()) + self.runs + self.stored_runs:
+			spill.close()
+
+	#-- run of [key, value] sorted by key
+	def _write_run(self, items):
+		run = SpillFile()
+		for key, value in sorted(items, key=lambda item: _sort_key(item[0])):
+			run.write([key, value])
+		return run
+
+	#-- (key, value) of runs in the order of key
+	def _iter_runs(self, runs):
+		return heapq.merge(*[((_to_key(key), value) for key, value in run) for run in runs], \
+							key=lambda item: _sort_key(item[0]))
+
+	#-- (key, record) of all runs in the order of key, the last record of a
+	#-- key repeated in more than one run is kept
+	def _merge_runs(self, runs, report):
+		previous = None
+		for item in self._iter_runs(runs):
+			if previous is not None:
+				if previous[0] == item[0]:
+					report["duplicate"] += 1
+				else:
+					if fold_key(previous[0]) == fold_key(item[0]):
+						report["conflict"] += 1
+					yield previous
+			previous = item
+		if previous is not None:
+			yield previous
+
+	#-- (key, content_hash) of the table rows in the order of id
+	def _iter_stored(self):
+		table = self.content_hasher.table
+		key_columns = [table.c[c] for c in self.content_hasher.key_columns]
+		key_count = len(key_columns)
+		try:
+			session = self.session_manager.get_session()
+			for row in iter_rows_by_id(session, table, key_columns + [table.c.content_hash]):
+				key = row[0] if key_count == 1 else tuple(row[0:key_count])
+				yield key, row[key_count]
+		finally:
+			self.session_manager.close(session)
+
+	#-- (key, content_hash) of the table rows in the order of key, sorted in
+	#-- runs of hash_join_max_rows rows
+	def _sort_stored(self):
+		for items in chunked(self._iter_stored(), self.hash_join_max_rows):
+			self.stored_runs.append(self._write_run(items))
+		return self._iter_runs(self.stored_runs)
+
+	def _compare(self, record, stored_hash):
+		content_hash = self.content_hasher.get_hash(record)
+		if content_hash == stored_hash:
+			return UNCHANGED, None
+		return UPDATE, dict(record, content_hash=content_hash)
+
+	def _insert(self, record):
+		return INSERT, dict(record, content_hash=self.content_hasher.get_hash(record))
+
+	def _hash_join(self, buffer):
+		for key, stored_hash in self._iter_stored():
+			record = buffer.pop(key, None)
+			if record is None:
+				yield DELETE, key
+			else:
+				yield self._compare(record, stored_hash)
+		for record in buffer.values():
+			yield self._insert(record)
+
+	#-- both items and stored in the order of key
+	def _merge_join(self, items, stored):
+		stored_item = next(stored, None)
+		for key, record in items:
+			while stored_item is not None and _sort_key(stored_item[0]) < _sort_key(key):
+				yield DELETE, stored_item[0]
+				stored_item = next(stored, None)
+			if stored_item is not None and stored_item[0] == key:
+				yield self._compare(record, stored_item[1])
+				stored_item = next(stored, None)
+			else:
+				yield self._insert(record)
+		while stored_item is not None:
+			yield DELETE, stored_item[0]
+			stored_item = next(stored, None)
+
+	#-- apply the changes classified, one statement and transaction per
+	#-- batch. deletes go first so that a key deleted and inserted in another
+	#-- case does not violate the unique key. prepare(session, records) is
+	#-- called before a batch of records is inserted or updated, in the same
+	#-- transaction. on_applied(written_keys, deleted_keys) is called after a
+	#-- batch is committed
+	def apply(self, batch_size, prepare=None, on_applied=None):
+		spills = self.spills
+		table = self.content_hasher.table
+		key_columns = self.content_hasher.key_columns
+		try:
+			session = self.session_manager.get_session()
+			for keys in chunked((_to_key(key) for key in spills[DELETE]), batch_size):
+				if len(key_columns) == 1:
+					records = [{key_columns[0] : key} for key in keys]
+				else:
+					records = [dict(zip(key_columns, key)) for key in keys]
+				delete_by_key(session, table, records, key_columns)
+				self.session_manager.commit(session)
+				if on_applied is not None:
+					on_applied([], keys)
+			for change in [UPDATE, INSERT]:
+				for records in chunked(spills[change], batch_size):
+					if prepare is not None:
+						prepare(session, records)
+					if change == UPDATE:
+						update_by_key(session, table, records, key_columns)
+					else:
+						session.execute(table.insert(), records)
+					self.session_manager.commit(session)
+					self.content_hasher.add_written(len(records))
+					if on_applied is not None:
+						on_applied([self.content_hasher.get_key(record) for record in records], [])
+		finally:
+			self.session_manager.close(session)
@@ -0,0 +1,90 @@
+# coding=utf-8
+#
+from sqlalchemy import Numeric, bindparam, select
+
+#-- date columns are returned as yyyy-mm-dd
+def to_date_string(value):
+	return str(value)[0:10]
+
+#-- NULL numeric values are returned as None
+def to_float(value):
+	if value is None:
+		return None
+	return float(value)
+
+#-- numeric columns are returned as float, other columns as string
+def get_converter(column):
+	if isinstance(column.type, Numeric):
+		return to_float
+	return str
+
+#-- stream the rows of columns of table in the order of id, one query of
+#-- batch_size rows per batch starting after the last id read, so that at
+#-- most batch_size rows are held in memory even though the database driver
+#-- buffers the whole result of a query. the batches are read in the
+#-- transaction of session, so they are of one snapshot in a repeatable read
+#-- transaction
+def iter_rows_by_id(session, table, columns, batch_size=10000, compiled_cache=None):
+	id_column = table.c.id
+	first_statement = select(columns + [id_column]).order_by(id_column).limit(bindparam("limit"))
+	next_statement = first_statement.where(id_column > bindparam("last_id"))
+	connection = session.connection()
+	if compiled_cache is not None:
+		connection = connection.execution_options(compiled_cache=compiled_cache)
+	params = {"limit" : batch_size}
+	rows = connection.execute(first_statement, params).fetchall()
+	while len(rows) > 0:
+		for row in rows:
+			yield row[0:-1]
+		if len(rows) < batch_size:
+			break
+		params["last_id"] = rows[-1][-1]
+		rows = connection.execute(next_statement, params).fetchall()
+
+#-- read rows of a table as list of dictionary with a core select statement
+#-- built once and a converter per column generated from the column types,
+#-- so that a row is converted in one pass without checking the column name.
+#-- converters overrides the converter of the given column names
+class RowReader:
+
+	def __init__(self, table, column_names, converters=None):
+		if converters is None:
+			converters = {}
+		self.table = table
+		self.columns = [table.c[column_name] for column_name in column_names]
+		self.column_names = [column.name for column in self.columns]
+		self.converters = [converters.get(column.name, get_converter(column)) \
+							for column in self.columns]
+		self.numeric_column_names = [column.name for column in self.columns \
+									if isinstance(column.type, Numeric)]
+		#-- the compiled statements are reused by the connection
+		self.compiled_cache = {}
+
+	#-- reader of a subset of the columns with the same converters
+	def project(self, column_names):
+		converters = dict(zip(self.column_names, self.converters))
+		return RowReader(self.table, column_names, converters)
+
+	#-- build a select statement of the columns, use bindparam in whereclause
+	#-- so that the statement can be built once and executed with parameters
+	def select(self, whereclause=None, order_by=None):
+		statement = select(self.columns)
+		if whereclause is not None:
+			statement = statement.where(whereclause)
+		if order_by is not None:
+			statement = statement.order_by(order_by)
+		return statement
+
+	def to_dict(self, row):
+		return {column_name : convert(value) for column_name, convert, value \
+				in zip(self.column_names, self.converters, row)}
+
+	def read(self, session, statement, params=None):
+		connection = session.connection().execution_options(compiled_cache=self.compiled_cache)
+		result = connection.execute(statement, params or {})
+		return [self.to_dict(row) for row in result]
+
+	#-- stream all rows in the order of id, batch_size rows at a time
+	def iter_read(self, session, batch_size=10000):
+		for row in iter_rows_by_id(session, self.table, self.columns, batch_size, self.compiled_cache):
+			yield self.to_dict(row)
@@ -0,0 +1,202 @@
+# coding=utf-8
+#
+#-- fixed layout snapshot file shared by processes through mmap.
+#-- layout, all integers little endian:
+#--   preamble: magic, uint64 header offset, uint64 header length
+#--   per table: rows, string heap, key index
+#--   header: json of the tables with the offsets of their sections
+#-- a row has 8 bytes per column: (uint32 offset, uint32 length) into the
+#-- string heap of the table for string columns, float64 for numeric columns.
+#-- the key index is (uint64 hash of key, uint32 row) sorted by hash
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from array import array
+
+MAGIC = b"SDSNAP01"
+PREAMBLE = struct.Struct("<8sQQ")
+INDEX_ENTRY = struct.Struct("<QI")
+#-- string length of a NULL value
+NULL_LENGTH = 0xFFFFFFFF
+#-- separator of the columns of a composite key
+KEY_SEPARATOR = "\x1f"
+
+def _hash_key(key):
+	if isinstance(key, tuple):
+		key = KEY_SEPARATOR.join(key)
+	return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+def _get_row_struct(column_types):
+	return struct.Struct("<" + "".join("d" if t == "f" else "II" for t in column_types))
+
+#-- write tables to file_path. tables is a list of dictionary with keys
+#-- name, column_names, numeric_column_names, key_names and rows, an iterable
+#-- of dictionary. rows are streamed, only the key index is kept in memory.
+#-- the file is written to a temporary file and renamed to file_path, so
+#-- readers see either the old or the new file
+def write_snapshot_file(file_path, tables):
+	directory = os.path.dirname(os.path.abspath(file_path))
+	fd, temp_path = tempfile.mkstemp(prefix=".snapshot-", dir=directory)
+	try:
+		with os.fdopen(fd, "wb") as f:
+			f.write(PREAMBLE.pack(MAGIC, 0, 0))
+			header = {"tables" : {}}
+			for table in tables:
+				header["tables"][table["name"]] = _write_table(f, table)
+			header_bytes = json.dumps(header).encode("utf-8")
+			header_offset = f.tell()
+			f.write(header_bytes)
+			f.seek(0)
+			f.write(PREAMBLE.pack(MAGIC, header_offset, len(header_bytes)))
+			f.flush()
+			os.fsync(f.fileno())
+		#-- mkstemp creates the file readable by the owner only
+		os.chmod(temp_path, 0o644)
+		os.replace(temp_path, file_path)
+	except BaseException:
+		os.remove(temp_path)
+		raise
+	return header["tables"]
+
+def _write_table(f, table):
+	column_names = list(table["column_names"])
+	column_types = ["f" if c in table["numeric_column_names"] else "s" for c in column_names]
+	key_names = list(table["key_names"])
+	row_struct = _get_row_struct(column_types)
+	hashes = array("Q")
+	rows_offset = f.tell()
+	heap_size = 0
+	with tempfile.TemporaryFile() as heap:
+		for row in table["rows"]:
+			values = []
+			for column_name, column_type in zip(column_names, column_types):
+				value = row[column_name]
+				if column_type == "f":
+					values.append(float("nan") if value is None else value)
+				elif value is None:
+					values.extend((0, NULL_LENGTH))
+				else:
+					encoded = value.encode("utf-8")
+					if heap_size + len(encoded) >= NULL_LENGTH:
+						raise ValueError("String values of " + table["name"] + " exceed 4GB")
+					heap.write(encoded)
+					values.extend((heap_size, len(encoded)))
+					heap_size += len(encoded)
+			f.write(row_struct.pack(*values))
+			if len(key_names) == 1:
+				hashes.append(_hash_key(row[key_names[0]]))
+			else:
+				hashes.append(_hash_key(tuple(row[key_name] for key_name in key_names)))
+		heap_offset = f.tell()
+		heap.seek(0)
+		shutil.copyfileobj(heap, f)
+	index_offset = f.tell()
+	for row_number in sorted(range(len(hashes)), key=hashes.__getitem__):
+		f.write(INDEX_ENTRY.pack(hashes[row_number], row_number))
+	return {
+		"column_names" : column_names,
+		"column_types" : column_types,
+		"key_names" : key_names,
+		"rows" : len(hashes),
+		"rows_offset" : rows_offset,
+		"heap_offset" : heap_offset,
+		"index_offset" : index_offset
+	}
+
+#-- read only view of a snapshot file. the file is mapped in memory, so the
+#-- pages are shared by all processes through the page cache and only the
+#-- rows looked up are decoded
+class SnapshotFileReader:
+
+	def __init__(self, file_path):
+		self.file_path = file_path
+		with open(file_path, "rb") as f:
+			self.stat = os.fstat(f.fileno())
+			self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		magic, header_offset, header_length = PREAMBLE.unpack_from(self.buffer, 0)
+		if magic != MAGIC:
+			self.buffer.close()
+			raise ValueError("Not a snapshot file: " + file_path)
+		self.tables = json.loads(self.buffer[header_offset:header_offset + header_length].decode("utf-8"))["tables"]
+		for table in self.tables.values():
+			table["row_struct"] = _get_row_struct(table["column_types"])
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+	def close(self):
+		self.buffer.close()
+
+	#-- True if the file is replaced by a newer snapshot since it is opened
+	def is_stale(self):
+		try:
+			stat = os.stat(self.file_path)
+		except FileNotFoundError:
+			return True
+		return (stat.st_ino, stat.st_mtime_ns) != (self.stat.st_ino, self.stat.st_mtime_ns)
+
+	def count(self, table_name):
+		return self.tables[table_name]["rows"]
+
+	#-- row of a key as dictionary, None if not found. the key of a table with
+	#-- more than one key column is a tuple
+	def get(self, table_name, key):
+		table = self.tables[table_name]
+		key_hash = _hash_key(key)
+		#-- binary search the first index entry of the hash
+		low, high = 0, table["rows"]
+		while low < high:
+			middle = (low + high) // 2
+			if INDEX_ENTRY.unpack_from(self.buffer, table["index_offset"] + middle * INDEX_ENTRY.size)[0] < key_hash:
+				low = middle + 1
+			else:
+				high = middle
+		#-- compare the keys of the rows with the same hash
+		while low < table["rows"]:
+			entry_hash, row_number = INDEX_ENTRY.unpack_from(self.buffer, \
+					table["index_offset"] + low * INDEX_ENTRY.size)
+			if entry_hash != key_hash:
+				break
+			row = self._read_row(table, row_number)
+			if len(table["key_names"]) == 1:
+				row_key = row[table["key_names"][0]]
+			else:
+				row_key = tuple(row[key_name] for key_name in table["key_names"])
+			if row_key == key:
+				return row
+			low += 1
+		return None
+
+	#-- stream all rows of a table in the order written
+	def iter_rows(self, table_name):
+		table = self.tables[table_name]
+		for row_number in range(table["rows"]):
+			yield self._read_row(table, row_number)
+
+	def _read_row(self, table, row_number):
+		row_struct = table["row_struct"]
+		values = row_struct.unpack_from(self.buffer, table["rows_offset"] + row_number * row_struct.size)
+		heap_offset = table["heap_offset"]
+		d = {}
+		i = 0
+		for column_name, column_type in zip(table["column_names"], table["column_types"]):
+			if column_type == "f":
+				value = values[i]
+				d[column_name] = None if value != value else value
+				i += 1
+			else:
+				offset, length = values[i], values[i + 1]
+				if length == NULL_LENGTH:
+					d[column_name] = None
+				else:
+					start = heap_offset + offset
+					d[column_name] = self.buffer[start:start + length].decode("utf-8")
+				i += 2
+		return d
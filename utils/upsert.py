@@ -0,0 +1,111 @@
+# coding=utf-8
+# 
+from sqlalchemy import bindparam, text
+
+#-- build an insert statement that updates update_columns of the existing row
+#-- when a row with the same unique key exists. an empty update_columns keeps
+#-- the existing row as is, i.e. only inserts the new rows.
+#-- mysql uses INSERT ... ON DUPLICATE KEY UPDATE or INSERT IGNORE, sqlite
+#-- uses INSERT ... ON CONFLICT (...) DO UPDATE so that it can be tested locally
+def get_upsert_sql(dialect, table_name, columns, key_columns, update_columns):
+	quote = dialect.identifier_preparer.quote
+	#-- a no-op ON DUPLICATE KEY UPDATE counts the existing rows as affected
+	#-- with CLIENT_FOUND_ROWS, the rows ignored by INSERT IGNORE are not. the
+	#-- records are validated before, so the other errors INSERT IGNORE turns
+	#-- into warnings do not occur
+	ignore = dialect.name == "mysql" and len(update_columns) == 0
+	sql = ("INSERT IGNORE INTO " if ignore else "INSERT INTO ") + quote(table_name) + \
+			" (" + ", ".join(quote(c) for c in columns) + ")" + \
+			" VALUES (" + ", ".join(":" + c for c in columns) + ")"
+	if dialect.name == "mysql":
+		if len(update_columns) > 0:
+			assignments = [quote(c) + " = VALUES(" + quote(c) + ")" for c in update_columns]
+			sql += " ON DUPLICATE KEY UPDATE " + ", ".join(assignments)
+	elif dialect.name == "sqlite":
+		sql += " ON CONFLICT (" + ", ".join(quote(c) for c in key_columns) + ")"
+		if len(update_columns) > 0:
+			assignments = [quote(c) + " = excluded." + quote(c) for c in update_columns]
+			sql += " DO UPDATE SET " + ", ".join(assignments)
+		else:
+			sql += " DO NOTHING"
+	else:
+		raise Exception("Upsert is not supported by database: " + dialect.name)
+	return sql
+
+#-- insert or update the records in the session, one statement per run of
+#-- records having the same columns. only the columns given in a record are
+#-- updated. return the number of affected rows reported by the database
+def upsert(session, table, records, key_columns):
+	return _execute(session, table, records, key_columns, True)
+
+#-- insert the records not exist yet and keep the existing rows as is.
+#-- return the number of rows inserted
+def insert_ignore(session, table, records, key_columns):
+	return _execute(session, table, records, key_columns, False)
+
+#-- update the rows of the records by key_columns with one executemany per run
+#-- of records having the same columns. only the columns given in a record are
+#-- updated. the key values are bound as b_<column> as the column names are
+#-- reserved for the values set. return the number of rows matched, the
+#-- mysql dialects of sqlalchemy connect with CLIENT_FOUND_ROWS so that rows
+#-- matched but unchanged are counted as well
+def update_by_key(session, table, records, key_columns):
+	rowcount = 0
+	for run in _split_runs(records):
+		columns = [c for c in run[0].keys() if c not in key_columns]
+		if len(columns) > 0:
+			values = {c : bindparam(c) for c in columns}
+		else:
+			#-- no-op assignment, only counts the rows matched
+			values = {key_columns[0] : table.c[key_columns[0]]}
+		statement = table.update() \
+					.where(_and_keys(table, key_columns)) \
+					.values(values)
+		result = session.execute(statement, [dict(record, **{"b_" + c : record[c] for c in key_columns}) \
+											for record in run])
+		if result.rowcount is not None and result.rowcount > 0:
+			rowcount += result.rowcount
+	return rowcount
+
+#-- delete the rows of the records by key_columns with one executemany.
+#-- return the number of rows deleted
+def delete_by_key(session, table, records, key_columns):
+	if len(records) == 0:
+		return 0
+	statement = table.delete().where(_and_keys(table, key_columns))
+	result = session.execute(statement, [{"b_" + c : record[c] for c in key_columns} for record in records])
+	if result.rowcount is None or result.rowcount < 0:
+		return 0
+	return result.rowcount
+
+def _and_keys(table, key_columns):
+	clause = None
+	for c in key_columns:
+		condition = table.c[c] == bindparam("b_" + c)
+		clause = condition if clause is None else clause & condition
+	return clause
+
+#-- split the records into runs of the same columns, keep the input order
+def _split_runs(records):
+	start = 0
+	while start < len(records):
+		end = start + 1
+		while end < len(records) and records[end].keys() == records[start].keys():
+			end += 1
+		yield records[start:end]
+		start = end
+
+def _execute(session, table, records, key_columns, update):
+	dialect = session.get_bind().dialect
+	rowcount = 0
+	#-- executemany needs the same columns for all the records
+	for run in _split_runs(records):
+		columns = list(run[0].keys())
+		update_columns = []
+		if update:
+			update_columns = [c for c in columns if c not in key_columns]
+		sql = get_upsert_sql(dialect, table.name, columns, key_columns, update_columns)
+		result = session.execute(text(sql), run)
+		if result.rowcount is not None and result.rowcount > 0:
+			rowcount += result.rowcount
+	return rowcount
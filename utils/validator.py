@@ -3,50 +3,45 @@
 from cerberus import Validator
 from cerberus.errors import BasicErrorHandler
 from datetime import datetime
+import threading
 import yaml
 import re
+from security_data.models.security_attribute import SecurityAttribute
 
 class AppValidatorFactory:
 
+	#-- method name => builder of the validator for that method
+	validator_builders = {
+		"get_security_basic_info" : "_get_get_security_basic_info_validator",
+		"get_security_basic_info_many" : "_get_get_security_basic_info_many_validator",
+		"get_security_basic_info_by" : "_get_get_security_basic_info_by_validator",
+		"get_security_basic_info_by_many" : "_get_get_security_basic_info_by_many_validator",
+		"add_security_basic_info" : "_get_add_security_basic_info_validator",
+		"update_security_basic_info" : "_get_update_security_basic_info_validator",
+		"get_futures_info" : "_get_get_futures_info_validator",
+		"add_futures_info" : "_get_add_futures_info_validator",
+		"update_futures_info" : "_get_update_futures_info_validator",
+		"get_fixed_deposit_info" : "_get_get_fixed_deposit_info_validator",
+		"add_fixed_deposit_info" : "_get_add_fixed_deposit_info_validator",
+		"update_fixed_deposit_info" : "_get_update_fixed_deposit_info_validator",
+		"get_fx_forward_info" : "_get_get_fx_forward_info_validator",
+		"add_fx_forward_info" : "_get_add_fx_forward_info_validator",
+		"update_fx_forward_info" : "_get_update_fx_forward_info_validator",
+		"add_counter_party_info" : "_get_add_counter_party_validator",
+		"update_counter_party_info" : "_get_update_counter_party_info_validator",
+		"get_counter_parties" : "_get_get_counter_parties_validator",
+		"get_security_attribute" : "_get_get_security_attribute_validator",
+		"get_security_attributes_many" : "_get_get_security_attributes_many_validator",
+		"add_security_attribute" : "_get_add_security_attribute_validator",
+		"update_security_attribute" : "_get_add_security_attribute_validator"
+	}
+
 	def get_validator(self, method_name):
-		if method_name == "get_security_basic_info":
-			return self._get_get_security_basic_info_validator()
-		elif method_name == "add_security_basic_info":
-			return self._get_add_security_basic_info_validator()
-		elif method_name == "update_security_basic_info":
-			return self._get_update_security_basic_info_validator()
-		elif method_name == "get_futures_info":
-			return self._get_get_futures_info_validator()
-		elif method_name == "add_futures_info":
-			return self._get_add_futures_info_validator()
-		elif method_name == "update_futures_info":
-			return self._get_update_futures_info_validator()
-		elif method_name == "get_fixed_deposit_info":
-			return self._get_get_fixed_deposit_info_validator()
-		elif method_name == "add_fixed_deposit_info":
-			return self._get_add_fixed_deposit_info_validator()
-		elif method_name == "update_fixed_deposit_info":
-			return self._get_update_fixed_deposit_info_validator()
-		elif method_name == "get_fx_forward_info":
-			return self._get_get_fx_forward_info_validator()
-		elif method_name == "add_fx_forward_info":
-			return self._get_add_fx_forward_info_validator()
-		elif method_name == "update_fx_forward_info":
-			return self._get_update_fx_forward_info_validator()
-		elif method_name == "add_counter_party_info":
-			return self._get_add_counter_party_validator()
-		elif method_name == "update_counter_party_info":
-			return self._get_update_counter_party_info_validator()
-		elif method_name == "get_security_attribute":
-			return self._get_get_security_attribute_validator()
-		elif method_name == "add_security_attribute":
-			return self._get_add_security_attribute_validator()
-		elif method_name == "update_security_attribute":
-			return self._get_add_security_attribute_validator()
-		else:
+		if method_name not in self.validator_builders:
 			raise Exception("No validator defined for method_name: " + \
 								method_name + \
 								". Please check and add back")
+		return getattr(self, self.validator_builders[method_name])()
 
 	def _get_get_security_basic_info_validator(self):
 		#-- note: yaml need to use space not tab for indentation
@@ -60,6 +55,51 @@ geneva_id:
 		schema = yaml.load(schema_text, Loader=yaml.FullLoader)
 		return AppValidator(schema)
 
+	def _get_get_security_basic_info_many_validator(self):
+		schema_text = '''
+geneva_ids:
+  required: true
+  type: list
+  schema:
+    empty: false
+    type: string
+    maxlength: 100
+'''
+		schema = yaml.load(schema_text, Loader=yaml.FullLoader)
+		return AppValidator(schema)
+
+	def _get_get_security_basic_info_by_validator(self):
+		schema_text = '''
+id_type:
+  required: true
+  type: string
+  allowed: ['geneva_id', 'ticker', 'isin', 'bloomberg_id', 'sedol']
+value:
+  required: true
+  empty: false
+  type: string
+  maxlength: 100
+'''
+		schema = yaml.load(schema_text, Loader=yaml.FullLoader)
+		return AppValidator(schema)
+
+	def _get_get_security_basic_info_by_many_validator(self):
+		schema_text = '''
+id_type:
+  required: true
+  type: string
+  allowed: ['geneva_id', 'ticker', 'isin', 'bloomberg_id', 'sedol']
+values:
+  required: true
+  type: list
+  schema:
+    empty: false
+    type: string
+    maxlength: 100
+'''
+		schema = yaml.load(schema_text, Loader=yaml.FullLoader)
+		return AppValidator(schema)
+
 	def _get_add_security_basic_info_validator(self):
 		schema_text = '''
 geneva_id:
@@ -481,6 +521,55 @@ security_id:
   empty: false
   type: string
   maxlength: 100
+fields:
+  required: false
+  nullable: true
+  empty: false
+  type: list
+  schema:
+    type: string
+'''
+		schema = yaml.load(schema_text, Loader=yaml.FullLoader)
+		#-- fields can be any column of security_attributes except the audit columns
+		schema["fields"]["schema"]["allowed"] = [column.name for column in SecurityAttribute.__table__.columns \
+				if column.name not in ("id", "content_hash", "created_at", "updated_at", "created_by", "updated_by")]
+		return AppValidator(schema)
+
+	def _get_get_counter_parties_validator(self):
+		schema_text = '''
+party_type:
+  required: true
+  nullable: true
+  type: string
+  allowed: ['Fixed Deposit', 'Repo', 'FX Forward']
+after:
+  required: true
+  nullable: true
+  type: integer
+  min: 0
+limit:
+  required: true
+  type: integer
+  min: 1
+'''
+		schema = yaml.load(schema_text, Loader=yaml.FullLoader)
+		return AppValidator(schema)
+
+	def _get_get_security_attributes_many_validator(self):
+		#-- list of (security_id_type, security_id)
+		schema_text = '''
+pairs:
+  required: true
+  type: list
+  schema:
+    type: list
+    items:
+      - empty: false
+        type: string
+        maxlength: 100
+      - empty: false
+        type: string
+        maxlength: 100
 '''
 		schema = yaml.load(schema_text, Loader=yaml.FullLoader)
 		return AppValidator(schema)
@@ -801,6 +890,44 @@ trading_volume_90_days:
 
 
 
+#-- compiles the schema of each method once and hands out reusable validators.
+#-- a cerberus validator keeps the document and the errors of the last
+#-- validation on the instance, so every thread gets its own validator per
+#-- method while the compiled schema is shared
+class AppValidatorRegistry:
+
+	def __init__(self):
+		self._schemas = {}
+		self._lock = threading.Lock()
+		self._local = threading.local()
+
+	def compile_all(self):
+		for method_name in AppValidatorFactory.validator_builders:
+			self._get_schema(method_name)
+
+	def get_validator(self, method_name):
+		validators = getattr(self._local, "validators", None)
+		if validators is None:
+			validators = {}
+			self._local.validators = validators
+		validator = validators.get(method_name)
+		if validator is None:
+			validator = AppValidator(self._get_schema(method_name))
+			validators[method_name] = validator
+		return validator
+
+	def _get_schema(self, method_name):
+		schema = self._schemas.get(method_name)
+		if schema is None:
+			with self._lock:
+				schema = self._schemas.get(method_name)
+				if schema is None:
+					#-- parse the yaml and validate the schema definition once
+					schema = AppValidatorFactory().get_validator(method_name).schema
+					self._schemas[method_name] = schema
+		return schema
+
+
 class AppValidator(Validator):
 	
 	#-- comment out as the date in the getRepo() is removed
@@ -816,3 +943,5 @@ class AppValidator(Validator):
 		except ValueError:
 			self._error(field, "must be of number type")
 
+#-- validators are shared by all controllers, see AppValidatorRegistry
+validator_registry = AppValidatorRegistry()